@@ -1,15 +1,68 @@
+import asyncio
+import contextvars
+import hmac
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from mysql.connector import MySQLConnection
-from ..core.database import get_db
+from typing import Dict, Optional
+from ..core.config import settings
+from ..core.database import RequestConnection, db_executor, get_db
 from ..core.security import decode_access_token
-from ..models.user import get_user_by_id
+from ..models.user import get_user_by_id, principal_cache, sync_principal_cache
 
 security = HTTPBearer()
 
+def _principal_from_claims(user_id: int, payload: Dict) -> Optional[Dict]:
+    """Build the principal from token claims (claims-only mode)."""
+    if "roles" not in payload or "username" not in payload:
+        return None  # token minted before roles were embedded
+    return {
+        "id": user_id,
+        "username": payload["username"],
+        "email": payload.get("email", ""),
+        "is_active": True,  # /auth/login only issues tokens to active users
+        "roles": payload["roles"],
+    }
+
+def _done_with_auth_queries(conn: RequestConnection) -> None:
+    # Auth runs before the endpoint; hand the connection back unless the
+    # endpoint queries too, so routes that don't (or stream) never hold it.
+    # A kept connection ends the auth read so the endpoint starts with a
+    # fresh snapshot and can begin its own transaction
+    if not conn.endpoint_uses:
+        conn.release()
+    elif conn.acquired and conn.in_transaction:
+        conn.rollback()
+
+def _fetch_principal(conn: RequestConnection, user_id: int) -> Optional[Dict]:
+    try:
+        return get_user_by_id(conn, user_id)
+    finally:
+        _done_with_auth_queries(conn)
+
+def _sync_principals(conn: RequestConnection) -> None:
+    try:
+        sync_principal_cache(conn)
+    finally:
+        _done_with_auth_queries(conn)
+
+async def _load_principal(conn: RequestConnection, user_id: int) -> Optional[Dict]:
+    """Cached user lookup; only goes to the database (off the event loop) on a
+    miss, or to check the shared version, using the request's own connection."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # keeps the queries in the request's metrics
+    if principal_cache.sync_due(settings.PRINCIPAL_CACHE_CHECK_SECONDS):
+        await loop.run_in_executor(db_executor, context.run, _sync_principals, conn)
+    user = principal_cache.get(user_id)
+    if user is None:
+        version = principal_cache.version
+        user = await loop.run_in_executor(db_executor, context.run, _fetch_principal, conn, user_id)
+        if user:
+            principal_cache.set(user_id, user, version=version)
+    return dict(user) if user else None
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    conn: MySQLConnection = Depends(get_db)
+    conn: RequestConnection = Depends(get_db)
 ):
     token = credentials.credentials
     payload = decode_access_token(token)
@@ -22,18 +75,37 @@ async def get_current_user(
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
-    
-    user = get_user_by_id(conn, int(user_id))
+
+    user = None
+    if settings.AUTH_CLAIMS_ONLY:
+        user = _principal_from_claims(int(user_id), payload)
+    if user is None:
+        user = await _load_principal(conn, int(user_id))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     if not user["is_active"]:
         raise HTTPException(status_code=401, detail="Inactive user")
-    
+
     return user
 
 async def get_current_active_manager(current_user = Depends(get_current_user)):
     roles = current_user.get("roles", "")
-    print(f"🔍 DEBUG - User {current_user['username']} has roles: '{roles}'")  
     if "manager" not in roles and "admin" not in roles:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_admin(current_user = Depends(get_current_user)):
+    if "admin" not in current_user.get("roles", ""):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
+
+async def get_metrics_reader(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    conn: RequestConnection = Depends(get_db)
+) -> Optional[Dict]:
+    """Scrapers present METRICS_TOKEN as their bearer token; anyone else must
+    be an admin. Returns the admin, or None for a scraper."""
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return None
+    return await get_current_admin(await get_current_user(credentials, conn))
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import zlib
+from typing import Callable, Dict, Iterator, Sequence
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from mysql.connector import MySQLConnection
+from ..core.database import pooled_connection, route_label
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+FLUSH_BYTES = 64 * 1024
+
+def _encode(rows: Iterator[Dict], columns: Sequence[str], fmt: str) -> Iterator[bytes]:
+    """Serialise rows into ~64KB CSV/NDJSON byte chunks."""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row[c] for c in columns])
+            if buffer.tell() >= FLUSH_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    else:
+        for row in rows:
+            buffer.write(json.dumps({c: row[c] for c in columns}, default=str))
+            buffer.write("\n")
+            if buffer.tell() >= FLUSH_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_response(
+    request: Request,
+    fmt: str,
+    filename: str,
+    columns: Sequence[str],
+    fetch: Callable[[MySQLConnection], Iterator[Dict]]
+) -> StreamingResponse:
+    """Stream `fetch(conn)` rows as a CSV/NDJSON download in constant memory.
+
+    The connection is checked out when streaming starts and held only while
+    rows are being sent. The body is gzip-encoded when the client accepts it.
+    """
+    gzip = "gzip" in request.headers.get("accept-encoding", "")
+    label = route_label(request)
+
+    def generate() -> Iterator[bytes]:
+        with pooled_connection(label) as conn:
+            chunks = _encode(fetch(conn), columns, fmt)
+            yield from (_gzip(chunks) if gzip else chunks)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(generate(), media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException
+from mysql.connector import MySQLConnection
+
+from ...schemas.user import UserActiveUpdate, UserRolesUpdate, UserResponse
+from ...models.reference import reference_data, reload_reference_data
+from ...models.user import get_user_by_id, set_user_active, set_user_roles
+from ...core.database import get_db, RequestConnectionRoute
+from ...api.dependencies import get_current_admin
+
+router = APIRouter(prefix="/admin", tags=["Admin"], route_class=RequestConnectionRoute)
+
+# -------------------- REFERENCE DATA --------------------
+@router.get("/reference-data")
+def get_reference_data_status(current_user = Depends(get_current_admin)):
+    return reference_data.stats()
+
+@router.post("/reference-data/reload")
+def reload_reference(
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """Re-read movement types and roles after editing them in the database."""
+    return reload_reference_data(conn)
+
+# -------------------- USERS --------------------
+# Takes effect at once on this worker (its principal cache entry is dropped);
+# other workers pick it up within PRINCIPAL_CACHE_TTL_SECONDS, and in
+# AUTH_CLAIMS_ONLY mode only when the user's current token expires.
+@router.put("/users/{user_id}/active", response_model=UserResponse)
+def update_user_active(
+    user_id: int,
+    update: UserActiveUpdate,
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """Activate or deactivate a user."""
+    if user_id == current_user["id"] and not update.is_active:
+        raise HTTPException(status_code=400, detail="You cannot deactivate yourself")
+    if not set_user_active(conn, user_id, update.is_active):
+        if not get_user_by_id(conn, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+    return UserResponse(**get_user_by_id(conn, user_id))
+
+@router.put("/users/{user_id}/roles", response_model=UserResponse)
+def update_user_roles(
+    user_id: int,
+    update: UserRolesUpdate,
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    """Replace a user's roles."""
+    unknown = [name for name in update.roles if not reference_data.role(conn, name)]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown roles: {', '.join(unknown)}")
+    if not get_user_by_id(conn, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    set_user_roles(conn, user_id, update.roles)
+    return UserResponse(**get_user_by_id(conn, user_id))
@@ -1,41 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from mysql.connector import MySQLConnection
 from datetime import timedelta
 
 from ...schemas.user import UserCreate, UserLogin, Token, UserResponse
-from ...models.user import create_user, get_user_by_username, get_user_by_id
-from ...core.database import get_db
-from ...core.security import verify_password, create_access_token
+from ...models.user import (
+    create_user, get_user_by_username, get_user_by_id, update_password_hash, principal_cache
+)
+from ...core.database import run_db, RequestConnectionRoute
+from ...core.security import (
+    PasswordHasherBusyError, create_access_token, password_hasher, password_needs_rehash, principal_claims
+)
 from ...core.config import settings
-from ...api.dependencies import get_current_user
+from ...api.dependencies import get_current_user, get_current_active_manager
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=RequestConnectionRoute)
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, conn: MySQLConnection = Depends(get_db)):
-    existing = get_user_by_username(conn, user.username)
+async def register(user: UserCreate):
+    existing = await run_db(get_user_by_username, user.username)
     if existing:
         raise HTTPException(status_code=400, detail="Username already registered")
-    
+
+    password_hash = await password_hasher.hash(user.password)
     try:
-        user_id = create_user(conn, user.dict())
-        new_user = get_user_by_id(conn, user_id)
+        user_id = await run_db(create_user, {**user.dict(), "password_hash": password_hash})
+        new_user = await run_db(get_user_by_id, user_id)
         return UserResponse(**new_user)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, conn: MySQLConnection = Depends(get_db)):
-    user = get_user_by_username(conn, user_data.username)
-    if not user or not verify_password(user_data.password, user["password_hash"]):
+async def login(user_data: UserLogin):
+    """bcrypt runs on the password hasher pool; no connection is held meanwhile."""
+    user = await run_db(get_user_by_username, user_data.username)
+    if not user or not await password_hasher.verify(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    
+    if not user["is_active"]:
+        raise HTTPException(status_code=401, detail="Inactive user")
+
+    # BCRYPT_ROUNDS changed since this hash was made: upgrade it while we have the password
+    if password_needs_rehash(user["password_hash"]):
+        try:
+            new_hash = await password_hasher.hash(user_data.password)
+            await run_db(update_password_hash, user["id"], user["password_hash"], new_hash)
+        except PasswordHasherBusyError:
+            pass  # busy; try again on the next login
+
     access_token = create_access_token(
-        data={"sub": str(user["id"])},
+        data=principal_claims(user),
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     return Token(access_token=access_token)
 
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user = Depends(get_current_user)):
-    return UserResponse(**current_user)
\ No newline at end of file
+    return UserResponse(**current_user)
+
+@router.get("/cache-stats")
+def get_principal_cache_stats(current_user = Depends(get_current_active_manager)):
+    """Hit/miss counters for the authenticated-principal cache, and the password hasher pool."""
+    return {
+        "claims_only": settings.AUTH_CLAIMS_ONLY,
+        **principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+    }
\ No newline at end of file
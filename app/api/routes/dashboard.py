@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from mysql.connector import MySQLConnection
 from datetime import date
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from ...schemas.dashboard import (
     LowStockAlert,
@@ -11,10 +14,16 @@ from ...schemas.dashboard import (
     DashboardSummary
 )
 from ...models import dashboard as dashboard_model
-from ...core.database import get_db
-from ...api.dependencies import get_current_user
+from ...models import sales_rollup as rollup_model
+from ...models.replenishment import CHANGE_LOG_OVERLAP_SECONDS
+from ...core.broadcast import Broadcaster
+from ...core.config import settings
+from ...core.database import get_db, pooled_connection, run_db, RequestConnectionRoute
+from ...core.jobs import Job, job_runner
+from ...api.dependencies import get_current_user, get_current_active_manager
+from ...api.pagination import decode_cursor, set_next_cursor
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=RequestConnectionRoute)
 
 @router.get("/low-stock", response_model=List[LowStockAlert])
 def get_low_stock_alerts(
@@ -42,25 +51,131 @@ def get_current_inventory(
     """Get current inventory snapshot."""
     return dashboard_model.get_current_inventory(conn, active_only)
 
+_sales_index_checked: Optional[date] = None
+
+def _rebuild_sales_index(job: Job) -> Dict:
+    with pooled_connection("job:product_sales_index") as conn:
+        return {"rows": rollup_model.rebuild_product_sales_index(conn)}
+
+def _ensure_sales_index_fresh(conn: MySQLConnection) -> None:
+    """Once a day per worker, re-anchor the rolling sales index in the background."""
+    global _sales_index_checked
+    today = date.today()
+    if _sales_index_checked == today:
+        return
+    _sales_index_checked = today
+    if rollup_model.is_product_sales_index_stale(conn):
+        job_runner.submit("product_sales_index", {}, _rebuild_sales_index)
+
 @router.get("/product-performance", response_model=List[ProductPerformance])
 def get_product_performance(
+    response: Response,
+    days: int = Query(30, ge=1, le=365),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get product sales performance for last 30 days."""
-    return dashboard_model.get_product_performance(conn)
+    """Top products by units sold over the last `days` days (paginated).
+
+    Pass the X-Next-Cursor response header back as `cursor` for keyset paging.
+    """
+    after = decode_cursor(cursor, 2)
+    if days in rollup_model.INDEXED_WINDOWS:
+        _ensure_sales_index_fresh(conn)
+    products = dashboard_model.get_product_performance(conn, days, limit, offset, after)
+    set_next_cursor(response, products, limit, ("total_sold", "sku"))
+    return products
 
 @router.get("/summary", response_model=DashboardSummary)
-def get_dashboard_summary(
-    conn: MySQLConnection = Depends(get_db),
-    current_user = Depends(get_current_user)
-):
-    """Get summary metrics for the dashboard."""
+def get_dashboard_summary(current_user = Depends(get_current_user)):
+    """Get summary metrics for the dashboard.
+
+    Served from a short-lived shared cache; concurrent polls on a miss wait
+    for a single database query.
+    """
+    today = date.today()
+
+    def load():
+        with pooled_connection() as conn:
+            return dashboard_model.get_dashboard_summary(conn, today)
+
+    return dashboard_model.summary_cache.get_or_load(today, load)
+
+@router.get("/summary/cache-stats")
+def get_summary_cache_stats(current_user = Depends(get_current_active_manager)):
+    """Hit/miss/coalesced counters for the dashboard summary cache."""
+    return dashboard_model.summary_cache.stats()
+
+# -------------------- LIVE STREAM (SSE) --------------------
+def _refresh_summary(conn: MySQLConnection) -> Dict:
     today = date.today()
-    return {
-        "total_products": dashboard_model.get_total_products_count(conn),
-        "total_stock_value": dashboard_model.get_total_stock_value(conn),
-        "low_stock_count": dashboard_model.get_low_stock_count(conn),
-        "out_of_stock_count": dashboard_model.get_out_of_stock_count(conn),
-        "today_sales": dashboard_model.get_daily_sales_summary(conn, today)
-    }
\ No newline at end of file
+    summary = dashboard_model.get_dashboard_summary(conn, today)
+    dashboard_model.summary_cache.set(today, summary)
+    return summary
+
+async def _watch_stock_changes(stream: Broadcaster) -> None:
+    """Shared producer: polls sku_change_log and publishes what changed.
+
+    Emits one `stock` event per SKU whose level, threshold or active flag
+    moved, then one `summary` event with fresh totals.
+    """
+    position = None
+    last_sent: Dict[str, Tuple] = {}
+    while True:
+        try:
+            if position is None:
+                position = await run_db(dashboard_model.get_change_log_position)
+                continue
+            await asyncio.sleep(settings.DASHBOARD_STREAM_POLL_SECONDS)
+            rows, position = await run_db(
+                dashboard_model.get_stock_changes, position, CHANGE_LOG_OVERLAP_SECONDS
+            )
+            changed = False
+            for row in rows:
+                state = (row["quantity_in_stock"], row["reorder_threshold"], bool(row["is_active"]))
+                if last_sent.get(row["sku"]) == state:
+                    continue  # repeat from the overlap window
+                last_sent[row["sku"]] = state
+                changed = True
+                stream.publish("stock", {
+                    "sku": row["sku"],
+                    "name": row["name"],
+                    "quantity_in_stock": row["quantity_in_stock"],
+                    "reorder_threshold": row["reorder_threshold"],
+                    "is_active": bool(row["is_active"]),
+                    "low_stock": bool(row["is_active"]) and row["quantity_in_stock"] <= row["reorder_threshold"],
+                })
+            if changed:
+                stream.publish("summary", await run_db(_refresh_summary))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Database or pool hiccup: keep the stream alive and retry
+            await asyncio.sleep(settings.DASHBOARD_STREAM_POLL_SECONDS)
+
+dashboard_stream = Broadcaster(_watch_stock_changes)
+
+async def _sse_events() -> AsyncIterator[str]:
+    async with dashboard_stream.subscribe() as queue:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event, data = await asyncio.wait_for(
+                    queue.get(), timeout=settings.DASHBOARD_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/stream")
+async def stream_dashboard(current_user = Depends(get_current_user)):
+    """Server-sent events for live dashboards: `stock`, `summary` and `resync`.
+
+    All connected tabs share one change-log poll per worker, so the cost does
+    not grow with the number of viewers.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_sse_events(), media_type="text/event-stream", headers=headers)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from mysql.connector import MySQLConnection
+from datetime import date
 from typing import List, Optional
 
 from ...schemas.inventory import (
@@ -7,14 +8,20 @@ from ...schemas.inventory import (
     StockAdjustmentCreate,
     StockMovementResponse,
     MovementTypeResponse,
-    StockLevelResponse
+    StockLevelResponse,
+    StockReceiptBulkCreate,
+    StockReceiptBulkResponse
 )
 from ...models import stock_movement as movement_model
 from ...models import product as product_model
-from ...core.database import get_db
+from ...models import dashboard as dashboard_model
+from ...models.reference import reference_data
+from ...core.database import get_db, RequestConnectionRoute
 from ...api.dependencies import get_current_user, get_current_active_manager
+from ...api.pagination import decode_cursor, set_next_cursor
+from ...api.export import export_response
 
-router = APIRouter(prefix="/inventory", tags=["Inventory"])
+router = APIRouter(prefix="/inventory", tags=["Inventory"], route_class=RequestConnectionRoute)
 
 # ---------- PUBLIC (any authenticated user) ----------
 @router.get("/movement-types", response_model=List[MovementTypeResponse])
@@ -22,23 +29,51 @@ def get_movement_types(
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)  # any auth user
 ):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id, name, description, sign FROM movement_types ORDER BY name")
-    types = cursor.fetchall()
-    cursor.close()
-    return types
+    return reference_data.movement_types(conn)
 
 @router.get("/movements", response_model=List[StockMovementResponse])
 def get_movements(
+    response: Response,
     product_sku: Optional[str] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)  # any auth user
 ):
-    movements = movement_model.get_stock_movements(conn, product_sku, limit, offset)
+    after = decode_cursor(cursor, 2)
+    movements = movement_model.get_stock_movements(conn, product_sku, limit, offset, after)
+    set_next_cursor(response, movements, limit, ("created_at", "id"))
     return movements
 
+@router.get("/movements/export")
+def export_movements(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    product_sku: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user = Depends(get_current_user)  # any auth user
+):
+    """Stream full movement history (optionally by product/date range) as CSV or NDJSON."""
+    columns = ["id", "product_sku", "product_name", "movement_type", "quantity", "previous_quantity",
+               "new_quantity", "reference_id", "reason", "performed_by", "created_at"]
+    return export_response(
+        request, format, "stock_movements", columns,
+        lambda conn: movement_model.iter_stock_movements(conn, product_sku, from_date, to_date)
+    )
+
+@router.get("/export")
+def export_inventory(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user = Depends(get_current_user)  # any auth user
+):
+    """Stream the current inventory snapshot as CSV or NDJSON."""
+    columns = ["sku", "name", "category", "quantity_in_stock", "reorder_threshold",
+               "selling_price", "potential_revenue", "is_active"]
+    return export_response(request, format, "inventory", columns, dashboard_model.iter_current_inventory)
+
 @router.get("/stock/{sku}", response_model=StockLevelResponse)
 def get_stock_level(
     sku: str,
@@ -64,7 +99,7 @@ def receive_stock(
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_active_manager)  # 🔒 MANAGER/ADMIN ONLY
 ):
-    product = product_model.get_product_by_sku(conn, receipt.product_sku)
+    product = product_model.get_cached_product(conn, receipt.product_sku)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     if not product["is_active"]:
@@ -87,13 +122,47 @@ def receive_stock(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to record receipt: {str(e)}")
 
+MAX_RECEIPT_LINES = 2000
+
+@router.post("/receipts/bulk", status_code=status.HTTP_201_CREATED, response_model=StockReceiptBulkResponse)
+def receive_stock_bulk(
+    manifest: StockReceiptBulkCreate,
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_active_manager)  # 🔒 MANAGER/ADMIN ONLY
+):
+    """Receive a full delivery manifest under one reference, all lines or none."""
+    if len(manifest.lines) > MAX_RECEIPT_LINES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RECEIPT_LINES} lines per delivery")
+
+    try:
+        lines, errors = movement_model.create_stock_receipts(
+            conn,
+            [{"sku": line.product_sku, "quantity": line.quantity} for line in manifest.lines],
+            manifest.reference_id,
+            manifest.reason,
+            current_user["id"]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to record delivery: {str(e)}")
+    if errors:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Delivery rejected; no stock was received", "errors": errors}
+        )
+    return {
+        "reference_id": manifest.reference_id,
+        "lines_received": len(lines),
+        "units_received": sum(line["quantity"] for line in lines),
+        "lines": lines
+    }
+
 @router.post("/adjust", status_code=status.HTTP_201_CREATED)
 def adjust_stock(
     adjustment: StockAdjustmentCreate,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_active_manager)  # 🔒 MANAGER/ADMIN ONLY
 ):
-    product = product_model.get_product_by_sku(conn, adjustment.product_sku)
+    product = product_model.get_cached_product(conn, adjustment.product_sku)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
@@ -101,37 +170,28 @@ def adjust_stock(
     if adjustment.movement_type not in valid_types:
         raise HTTPException(status_code=400, detail=f"Movement type must be one of: {valid_types}")
 
-    # Check stock for decrease operations
-    movement_type_id = movement_model.get_movement_type_id(conn, adjustment.movement_type)
-    cursor = conn.cursor()
-    cursor.execute("SELECT sign FROM movement_types WHERE id = %s", (movement_type_id,))
-    sign = cursor.fetchone()[0]
-    cursor.close()
-
-    if sign == -1:
-        current_stock = movement_model.get_product_stock_level(conn, adjustment.product_sku)
-        if current_stock is not None and adjustment.quantity > current_stock:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock. Available: {current_stock}, tried to remove: {adjustment.quantity}"
-            )
+    movement_type = reference_data.movement_type(conn, adjustment.movement_type)
+    if not movement_type:
+        raise HTTPException(status_code=400, detail=f"Invalid movement type: {adjustment.movement_type}")
 
+    # Stock is checked and changed atomically by the database (no read-then-write race)
     try:
-        movement_id = movement_model.create_stock_adjustment(
+        result = movement_model.create_stock_adjustment(
             conn,
             adjustment.product_sku,
             adjustment.quantity,
-            adjustment.movement_type,
+            movement_type["id"],
+            adjustment.reference_id,
             adjustment.reason,
             current_user["id"]
         )
-        new_qty = movement_model.get_product_stock_level(conn, adjustment.product_sku)
         return {
             "message": f"Stock {adjustment.movement_type} recorded successfully",
-            "movement_id": movement_id,
-            "new_quantity": new_qty
+            "movement_id": result["movement_id"],
+            "previous_quantity": result["previous_quantity"],
+            "new_quantity": result["new_quantity"]
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to record adjustment: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to record adjustment: {str(e)}")
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import csv
+import json
+import threading
+import time
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from mysql.connector import MySQLConnection
-from typing import List, Optional
+from pydantic import ValidationError
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from ...schemas.product import (
     ProductCreate, ProductUpdate, ProductResponse,
     CategoryCreate, CategoryResponse,
-    SupplierCreate, SupplierResponse
+    SupplierCreate, SupplierResponse,
+    BulkImportResult, ProductSearchResult
 )
 from ...models import product as product_model
-from ...core.database import get_db
+from ...core.database import get_db, pooled_connection, run_db, RequestConnectionRoute
+from ...core.jobs import Job, job_runner
 from ...api.dependencies import get_current_user, get_current_active_manager
+from ...api.pagination import decode_cursor, set_next_cursor
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=RequestConnectionRoute)
 
 # -------------------- CATEGORY ENDPOINTS --------------------
 @router.get("/categories", response_model=List[CategoryResponse])
@@ -50,13 +59,209 @@ def create_supplier(
 # -------------------- PRODUCT ENDPOINTS --------------------
 @router.get("", response_model=List[ProductResponse])
 def get_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     active_only: bool = True,
+    cursor: Optional[str] = None,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    return product_model.get_all_products(conn, skip, limit, active_only)
+    after = decode_cursor(cursor, 2)
+    products = product_model.get_all_products(conn, skip, limit, active_only, after)
+    set_next_cursor(response, products, limit, ("name", "sku"))
+    return products
+
+# -------------------- BULK IMPORT --------------------
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Yield decoded lines from the request body as it streams in."""
+    buffer = b""
+    first = True
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+            first = False
+    if buffer.strip():
+        yield buffer.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+
+async def _iter_records(request: Request, fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield (row_number, record, parse_error) for each CSV row or NDJSON line."""
+    row_number = 0
+    if fmt == "ndjson":
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, record, None
+        return
+
+    header = None
+    pending = ""
+    async for line in _iter_lines(request):
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue  # quoted field spans lines
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells fall back to schema defaults / NULL
+        yield row_number, {k: v for k, v in zip(header, values) if v != ""}, None
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    upsert: bool = True,
+    chunk_size: int = Query(500, ge=1, le=5000),
+    current_user = Depends(get_current_active_manager)
+):
+    """Import products from a streamed CSV or NDJSON body.
+
+    Rows are validated against ProductCreate and written in chunked
+    transactions; existing SKUs are updated when `upsert` is true. The
+    format defaults from the Content-Type header (text/csv or
+    application/x-ndjson).
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+
+    started = time.perf_counter()
+    received = inserted = updated = 0
+    errors: List[Dict] = []
+    seen_skus, seen_barcodes = set(), {}
+    chunk: List[Tuple[int, Dict]] = []
+
+    async def flush():
+        nonlocal inserted, updated
+        try:
+            ins, upd, chunk_errors = await run_db(product_model.import_products, list(chunk), upsert)
+        except Exception as e:
+            ins, upd = 0, 0
+            chunk_errors = [{"row": n, "sku": p["sku"], "error": f"Chunk failed: {e}"} for n, p in chunk]
+        inserted += ins
+        updated += upd
+        errors.extend(chunk_errors)
+        chunk.clear()
+
+    async for row_number, record, parse_error in _iter_records(request, format):
+        received += 1
+        if parse_error:
+            errors.append({"row": row_number, "sku": None, "error": parse_error})
+            continue
+        try:
+            product = ProductCreate(**record).dict()
+        except ValidationError as e:
+            errors.append({"row": row_number, "sku": record.get("sku"), "error": _validation_message(e)})
+            continue
+        if product["sku"] in seen_skus:
+            errors.append({"row": row_number, "sku": product["sku"], "error": "Duplicate SKU in upload"})
+            continue
+        if seen_barcodes.get(product["barcode"], product["sku"]) != product["sku"]:
+            errors.append({"row": row_number, "sku": product["sku"], "error": "Duplicate barcode in upload"})
+            continue
+        seen_skus.add(product["sku"])
+        seen_barcodes[product["barcode"]] = product["sku"]
+        chunk.append((row_number, product))
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "rows_received": received,
+        "inserted": inserted,
+        "updated": updated,
+        "failed": len(errors),
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(received / elapsed, 1) if elapsed else 0.0,
+        "errors": errors,
+    }
+
+def _with_stock(conn: MySQLConnection, product: Optional[Dict]) -> Dict:
+    # Catalogue fields come from the cache; stock is always read live
+    stock = product_model.get_product_stock(conn, product["sku"]) if product else None
+    if not stock:
+        raise HTTPException(status_code=404, detail="Product not found")
+    product.update(stock)
+    return product
+
+# -------------------- SEARCH --------------------
+_search_build_lock = threading.Lock()
+
+def _catch_up_search_index(job: Job) -> Dict:
+    with pooled_connection("job:search_index") as conn:
+        return product_model.catch_up_search_index(conn)
+
+@router.get("/search", response_model=List[ProductSearchResult])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    category_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    min_stock: Optional[int] = Query(None, ge=0),
+    max_stock: Optional[int] = Query(None, ge=0),
+    active_only: bool = True,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Search products by SKU, barcode or name (prefix, substring and typo-tolerant).
+
+    Best matches first; an exact SKU or barcode always ranks on top.
+    """
+    if not product_model.search_index.built:
+        with _search_build_lock:
+            if not product_model.search_index.built:
+                product_model.rebuild_search_index(conn)
+    elif product_model.search_index_is_stale(conn):
+        # Another worker changed the catalogue: re-read what changed in the background
+        job_runner.submit("search_index", {}, _catch_up_search_index)
+    return product_model.search_products(
+        conn, q, category_id, supplier_id, min_price, max_price,
+        min_stock, max_stock, active_only, limit, offset
+    )
+
+@router.get("/search/stats")
+def search_index_stats(current_user = Depends(get_current_active_manager)):
+    return product_model.search_index.stats()
+
+@router.get("/cache-stats")
+def catalogue_cache_stats(current_user = Depends(get_current_active_manager)):
+    return product_model.catalogue_cache.stats()
+
+@router.get("/by-barcode/{barcode}", response_model=ProductResponse)
+def get_product_by_barcode(
+    barcode: str,
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    return _with_stock(conn, product_model.get_cached_product_by_barcode(conn, barcode))
 
 @router.get("/{sku}", response_model=ProductResponse)
 def get_product(
@@ -64,10 +269,7 @@ def get_product(
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    product = product_model.get_product_by_sku(conn, sku)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return _with_stock(conn, product_model.get_cached_product(conn, sku))
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(
@@ -76,10 +278,10 @@ def create_product(
     current_user = Depends(get_current_active_manager)
 ):
     # Check if SKU or barcode already exists
-    existing = product_model.get_product_by_sku(conn, product.sku)
+    existing = product_model.get_cached_product(conn, product.sku)
     if existing:
         raise HTTPException(status_code=400, detail="SKU already exists")
-    existing = product_model.get_product_by_barcode(conn, product.barcode)
+    existing = product_model.get_cached_product_by_barcode(conn, product.barcode)
     if existing:
         raise HTTPException(status_code=400, detail="Barcode already exists")
     
@@ -97,13 +299,13 @@ def update_product(
     current_user = Depends(get_current_active_manager)
 ):
     # Verify product exists
-    existing = product_model.get_product_by_sku(conn, sku)
+    existing = product_model.get_cached_product(conn, sku)
     if not existing:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # If barcode is being updated, check it's not taken by another product
     if product_update.barcode and product_update.barcode != existing["barcode"]:
-        barcode_exists = product_model.get_product_by_barcode(conn, product_update.barcode)
+        barcode_exists = product_model.get_cached_product_by_barcode(conn, product_update.barcode)
         if barcode_exists and barcode_exists["sku"] != sku:
             raise HTTPException(status_code=400, detail="Barcode already in use by another product")
     
@@ -118,7 +320,7 @@ def delete_product(
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_active_manager)
 ):
-    existing = product_model.get_product_by_sku(conn, sku)
+    existing = product_model.get_cached_product(conn, sku)
     if not existing:
         raise HTTPException(status_code=404, detail="Product not found")
     success = product_model.delete_product(conn, sku)
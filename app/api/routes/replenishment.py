@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from mysql.connector import MySQLConnection
-from typing import List
+from typing import List, Optional
 
 from ...schemas.replenishment import (
     ReplenishmentSuggestionCreate,
@@ -8,39 +8,90 @@ from ...schemas.replenishment import (
     ReplenishmentAction
 )
 from ...models import replenishment as replenishment_model
-from ...core.database import get_db
+from ...core.database import get_db, pooled_connection, RequestConnectionRoute
+from ...core.jobs import Job, job_runner
 from ...api.dependencies import get_current_active_manager  # manager/admin only
+from ...api.pagination import decode_cursor, set_next_cursor
 
-router = APIRouter(prefix="/replenishment", tags=["Replenishment"])
+router = APIRouter(prefix="/replenishment", tags=["Replenishment"], route_class=RequestConnectionRoute)
 
-@router.post("/generate", status_code=status.HTTP_201_CREATED)
-def generate_suggestions(
-    params: ReplenishmentSuggestionCreate = Depends(),  # query params
-    conn: MySQLConnection = Depends(get_db),
-    current_user = Depends(get_current_active_manager)  # 🔒 manager/admin only
-):
-    """Generate replenishment suggestions using predictive algorithm."""
-    try:
+def _run_generation(params: ReplenishmentSuggestionCreate, job: Job):
+    """Job body: generate suggestions on a connection owned by the job."""
+    with pooled_connection("job:replenishment") as conn:
+        if params.engine == "incremental":
+            result = replenishment_model.generate_suggestions_incremental(
+                conn,
+                params.lookback_days,
+                params.forecast_days,
+                params.safety_stock_factor,
+                progress=job.report
+            )
+            return {"engine": "incremental", **result}
+        if params.engine == "python":
+            count = replenishment_model.generate_suggestions_python(
+                conn,
+                params.lookback_days,
+                params.forecast_days,
+                params.safety_stock_factor,
+                progress=job.report
+            )
+            return {"engine": "python", "suggestions": count}
+        job.report(0.0, "running GenerateReplenishmentSuggestions")
         replenishment_model.generate_suggestions(
             conn,
             params.lookback_days,
             params.forecast_days,
             params.safety_stock_factor
         )
-        return {"message": "Replenishment suggestions generated successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+        return {"engine": "procedure"}
+
+@router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
+def generate_suggestions(
+    params: ReplenishmentSuggestionCreate = Depends(),  # query params
+    current_user = Depends(get_current_active_manager)  # 🔒 manager/admin only
+):
+    """Start replenishment generation as a background job.
+
+    Returns immediately with a job id; poll GET /replenishment/jobs/{job_id}
+    (on any worker). A request matching a run that is still in progress, on
+    this worker or another, joins that run.
+    """
+    if params.engine not in ("procedure", "python", "incremental"):
+        raise HTTPException(status_code=400, detail="Engine must be 'procedure', 'python' or 'incremental'")
+    job = job_runner.submit(
+        "replenishment",
+        params.dict(),
+        lambda job: _run_generation(params, job),
+        shared=True  # any worker may be polled for it
+    )
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}")
+def get_generation_job(
+    job_id: str,
+    current_user = Depends(get_current_active_manager)  # 🔒 manager/admin only
+):
+    """Status and progress of a generation job."""
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @router.get("/suggestions", response_model=List[ReplenishmentSuggestionResponse])
 def get_suggestions(
+    response: Response,
     active_only: bool = True,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_active_manager)  # 🔒 manager/admin only
 ):
     """Get list of replenishment suggestions."""
-    return replenishment_model.get_suggestions(conn, active_only, limit, offset)
+    after = decode_cursor(cursor, 3)
+    suggestions = replenishment_model.get_suggestions(conn, active_only, limit, offset, after)
+    set_next_cursor(response, suggestions, limit, ("date_generated", "suggested_quantity", "id"))
+    return suggestions
 
 @router.post("/actions")
 def take_action(
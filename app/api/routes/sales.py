@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from mysql.connector import MySQLConnection
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 from ...schemas.sale import (
-    SaleCreate, SaleTransactionResponse, SaleItemResponse, SaleSummaryResponse
+    SaleCreate, SaleTransactionResponse, SaleItemResponse, SaleSummaryResponse,
+    SaleHourlySummaryResponse, SalesAnalyticsResponse, SaleBatchCreate, SaleBatchResponse
 )
 from ...models import sale as sale_model
-from ...core.database import get_db
+from ...models import product as product_model
+from ...models import sales_rollup as rollup_model
+from ...core.database import get_db, RequestConnectionRoute
 from ...api.dependencies import get_current_user
+from ...api.pagination import decode_cursor, set_next_cursor
+from ...api.export import export_response
 
-router = APIRouter(prefix="/sales", tags=["Sales"])
+router = APIRouter(prefix="/sales", tags=["Sales"], route_class=RequestConnectionRoute)
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=SaleTransactionResponse)
 def create_sale(
@@ -21,9 +26,9 @@ def create_sale(
     """Process a sale transaction."""
     # Validate that all SKUs exist (optional – the procedure will also validate)
     # But we can do quick existence check
-    from ...models.product import get_product_by_sku
+    from ...models.product import get_cached_product
     for item in sale.items:
-        product = get_product_by_sku(conn, item.sku)
+        product = get_cached_product(conn, item.sku)
         if not product:
             raise HTTPException(
                 status_code=404,
@@ -67,24 +72,123 @@ def create_sale(
             raise HTTPException(status_code=400, detail=error_msg)
         raise HTTPException(status_code=500, detail=f"Failed to process sale: {error_msg}")
 
+MAX_BATCH_SALES = 1000
+
+@router.post("/batch", response_model=SaleBatchResponse)
+def create_sales_batch(
+    batch: SaleBatchCreate,
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_user)  # any authenticated user (clerk, manager, admin)
+):
+    """Replay sales buffered by an offline till.
+
+    Idempotent on transaction_number: sales already recorded are reported as
+    duplicates with their existing id. A failing sale does not abort the
+    rest of the batch.
+    """
+    if len(batch.sales) > MAX_BATCH_SALES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SALES} sales per batch")
+
+    numbers = [s.transaction_number for s in batch.sales]
+    existing = sale_model.get_transaction_ids_by_number(conn, numbers)
+    products = product_model.get_products_by_skus(
+        conn, list({item.sku for s in batch.sales for item in s.items})
+    )
+
+    results = {}
+    to_create = []
+    queued = set()
+    for sale in batch.sales:
+        number = sale.transaction_number
+        if number in existing:
+            results[number] = {"status": "duplicate", "transaction_id": existing[number],
+                               "error": "Transaction already recorded"}
+            continue
+        if number in results or number in queued:
+            continue  # repeated within this batch; the first copy wins
+        error = None
+        if not sale.items:
+            error = "Sale has no items"
+        for item in sale.items:
+            product = products.get(item.sku)
+            if not product:
+                error = f"Product with SKU '{item.sku}' not found"
+                break
+            if not product["is_active"]:
+                error = f"Product '{item.sku}' is inactive and cannot be sold"
+                break
+        if error:
+            results[number] = {"status": "failed", "transaction_id": None, "error": error}
+            continue
+        queued.add(number)
+        to_create.append({
+            "transaction_number": number,
+            "transaction_date": sale.transaction_date.date(),
+            "items": [
+                {"sku": item.sku, "quantity": item.quantity, "unit_price": item.unit_price}
+                for item in sale.items
+            ]
+        })
+
+    try:
+        results.update(sale_model.create_sales_batch(conn, current_user["id"], to_create))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
+
+    ordered = []
+    for number in dict.fromkeys(numbers):
+        ordered.append({"transaction_number": number, **results[number]})
+    return {
+        "created": sum(1 for r in ordered if r["status"] == "created"),
+        "duplicates": sum(1 for r in ordered if r["status"] == "duplicate"),
+        "failed": sum(1 for r in ordered if r["status"] == "failed"),
+        "results": ordered,
+    }
+
 @router.get("/transactions", response_model=List[SaleTransactionResponse])
 def get_transactions(
+    response: Response,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    include_items: bool = True,
     conn: MySQLConnection = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get sales transactions (paginated, optionally filtered by date)."""
-    transactions = sale_model.get_transactions(conn, from_date, to_date, limit, offset)
+    """Get sales transactions (paginated, optionally filtered by date).
+
+    Pass the X-Next-Cursor response header back as `cursor` for keyset paging.
+    """
+    after = decode_cursor(cursor, 2)
+    transactions = sale_model.get_transactions(conn, from_date, to_date, limit, offset, after)
+    set_next_cursor(response, transactions, limit, ("transaction_date", "id"))
     
-    # Fetch items for each transaction
-    for t in transactions:
-        t["items"] = sale_model.get_transaction_items(conn, t["id"])
+    # Fetch items for the whole page in a single query
+    if include_items:
+        items_by_id = sale_model.get_items_for_transactions(conn, [t["id"] for t in transactions])
+        for t in transactions:
+            t["items"] = items_by_id[t["id"]]
     
     return transactions
 
+@router.get("/transactions/export")
+def export_transactions(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user = Depends(get_current_user)
+):
+    """Stream sold line items (one row per item) for a date range as CSV or NDJSON."""
+    columns = ["transaction_id", "transaction_number", "transaction_date", "username", "product_sku",
+               "product_name", "quantity", "unit_price", "line_total"]
+    return export_response(
+        request, format, "sales", columns,
+        lambda conn: sale_model.iter_sale_lines(conn, from_date, to_date)
+    )
+
 @router.get("/transactions/{transaction_id}", response_model=SaleTransactionResponse)
 def get_transaction(
     transaction_id: int,
@@ -109,4 +213,47 @@ def get_daily_summary(
     summary = sale_model.get_daily_summary(conn, transaction_date)
     if not summary:
         summary = {"total_transactions": 0, "total_revenue": 0, "total_items_sold": 0}
-    return summary
\ No newline at end of file
+    return summary
+
+@router.get("/summary/hourly", response_model=List[SaleHourlySummaryResponse])
+def get_hourly_summary(
+    transaction_date: date = Query(default_factory=lambda: datetime.now().date()),
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Get per-hour sales totals for a specific day (hours with no sales omitted)."""
+    return rollup_model.get_hourly_rollup(conn, transaction_date)
+
+MAX_HOURLY_RANGE_DAYS = 92
+
+@router.get("/analytics", response_model=SalesAnalyticsResponse)
+def get_sales_analytics(
+    from_date: date = Query(default_factory=lambda: datetime.now().date() - timedelta(days=29)),
+    to_date: date = Query(default_factory=lambda: datetime.now().date()),
+    granularity: str = Query("day", pattern="^(hour|day|week|month)$"),
+    group_by: Optional[str] = Query(None, pattern="^(sku|category)$"),
+    top: int = Query(20, ge=1, le=500),
+    conn: MySQLConnection = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Revenue, units and transaction-count series bucketed by hour/day/week/month.
+
+    Optionally grouped by SKU or category (top groups by revenue; daily or
+    coarser buckets only). Served from the sales rollups in one query.
+    """
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must not be before from_date")
+    if granularity == "hour":
+        if group_by:
+            raise HTTPException(status_code=400, detail="Hourly series cannot be grouped")
+        if (to_date - from_date).days >= MAX_HOURLY_RANGE_DAYS:
+            raise HTTPException(status_code=400, detail=f"Hourly series are limited to {MAX_HOURLY_RANGE_DAYS} days")
+    series = rollup_model.get_sales_series(conn, from_date, to_date, granularity, group_by, top)
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "granularity": granularity,
+        "group_by": group_by,
+        "series": series,
+    }
+
@@ -0,0 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Set, Tuple
+
+Event = Tuple[str, Any]
+
+
+class Broadcaster:
+    """Fans events from one shared producer out to any number of subscribers.
+
+    The producer coroutine is started with the first subscriber and cancelled
+    when the last one leaves, so an idle server does no work. A subscriber
+    that falls `queue_size` events behind is sent a single "resync" event in
+    place of its backlog and should reload its state.
+    """
+
+    def __init__(self, producer: Callable[["Broadcaster"], Awaitable[None]], queue_size: int = 100):
+        self._producer = producer
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.resyncs = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._producer(self))
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def publish(self, event: str, data: Any) -> None:
+        """Queue an event for every subscriber (call from the event loop)."""
+        self.published += 1
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("resync", None))
+                self.resyncs += 1
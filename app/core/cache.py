@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live.
+
+    Optionally kept coherent across worker processes with a shared version
+    stamp, like CatalogueCache: sync_version() drops every entry when the
+    stamp moved, and set() with the version read before loading refuses
+    values loaded before the move.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Hashable, list] = {}  # key -> [lock, callers using it]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.version: Optional[int] = None
+        self.invalidations = 0
+        self._checked_at = float("-inf")
+
+    def _lookup(self, key: Hashable) -> Any:
+        # Caller holds self._lock
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value or load it, running at most one loader per key at a time.
+
+        Concurrent callers that miss on the same key wait for the first
+        caller's load instead of repeating it (single-flight).
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            slot = self._loading.get(key)
+            if slot is None:
+                slot = self._loading[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                with self._lock:
+                    value = self._lookup(key)
+                    if value is not _MISSING:
+                        self.coalesced += 1
+                        return value
+                value = loader()
+                self.set(key, value)
+        finally:
+            # The lock stays registered while anyone holds or waits on it, so
+            # a caller arriving after a failed load queues behind the waiters
+            # instead of loading concurrently with them
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._loading[key]
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        version: Optional[int] = None
+    ) -> None:
+        """Store a value; with `version`, only if the cache has not moved past it since."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def sync_due(self, interval: float) -> bool:
+        """True at most once per `interval` seconds: the caller should then sync_version()."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < interval:
+                return False
+            self._checked_at = now
+            return True
+
+    def sync_version(self, version: int) -> None:
+        """Clear the cache if the shared version moved; never goes back to an older one."""
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return
+            if self.version is not None:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "version": self.version,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class CatalogueCache:
+    """Thread-safe LRU of catalogue records keyed by SKU, also indexed by barcode.
+
+    Coherence across worker processes comes from a shared version stamp:
+    writers bump it, and sync() compares it at most every `check_interval`
+    seconds, dropping every entry when it moved. Where the stamp lives is up
+    to the caller (see sync), so a shared store can stand in for the
+    database row.
+    """
+
+    def __init__(self, max_size: int = 10000, check_interval: float = 1.0):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._by_barcode: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def sync(self, read_version: Callable[[], int]) -> None:
+        """Clear the cache if the shared version changed since the last check."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = read_version()
+        with self._lock:
+            self._checked_at = now
+            # A reader on an older snapshot may see an older version than a
+            # local write already moved to (see written); never go back
+            if self.version is not None and version < self.version:
+                return
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._by_barcode.clear()
+                self.version = version
+
+    def _lookup(self, sku: Optional[str]) -> Optional[Dict]:
+        # Caller holds self._lock
+        record = self._entries.get(sku) if sku is not None else None
+        if record is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(sku)
+        self.hits += 1
+        return dict(record)
+
+    def get(self, sku: str) -> Optional[Dict]:
+        with self._lock:
+            return self._lookup(sku)
+
+    def get_by_barcode(self, barcode: str) -> Optional[Dict]:
+        with self._lock:
+            return self._lookup(self._by_barcode.get(barcode))
+
+    def put(self, record: Dict, version: Optional[int]) -> None:
+        """Store a record read while the cache was at `version`.
+
+        Records read before a version change are dropped, so a slow reader
+        cannot re-insert data that a concurrent write already replaced.
+        """
+        with self._lock:
+            if version != self.version:
+                return
+            self._remove(record["sku"])
+            self._entries[record["sku"]] = dict(record)
+            self._by_barcode[record["barcode"]] = record["sku"]
+            while len(self._entries) > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._by_barcode.pop(evicted["barcode"], None)
+                self.evictions += 1
+
+    def _remove(self, sku: str) -> None:
+        record = self._entries.pop(sku, None)
+        if record is not None and self._by_barcode.get(record["barcode"]) == sku:
+            del self._by_barcode[record["barcode"]]
+
+    def written(self, skus: Iterable[str], version: int) -> None:
+        """After this process committed a write of `skus` that moved the shared version to `version`.
+
+        Drops the SKUs and moves to `version` at once, so a put() from a read
+        that started before the write cannot bring the old row back. If other
+        writes came in between, this process has not seen them: clear all.
+        """
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                for sku in skus:
+                    self._remove(sku)
+                return
+            if self.version is not None and version == self.version + 1:
+                for sku in skus:
+                    self._remove(sku)
+            else:
+                self._entries.clear()
+                self._by_barcode.clear()
+            self.version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_barcode.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -10,10 +10,67 @@ class Settings:
     DB_NAME = os.getenv("DB_NAME")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+    DB_POOL_RECYCLE_SECONDS = float(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
     
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+    # Password hashing. Stored hashes with a different bcrypt cost are
+    # re-hashed on the user's next login. Hashing runs on its own pool of
+    # PASSWORD_HASH_WORKERS threads; requests queued longer than the timeout
+    # get a 503.
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 5))
+
+    # Auth principal cache
+    # Claims-only mode trusts the roles embedded in the token and never queries
+    # the database during auth; role/is_active changes then apply once the
+    # user's current token expires. Otherwise an admin change applies at once
+    # on the worker that made it and, through the shared version stamp
+    # checked at most every PRINCIPAL_CACHE_CHECK_SECONDS, on the others.
+    AUTH_CLAIMS_ONLY = os.getenv("AUTH_CLAIMS_ONLY", "false").lower() == "true"
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+    PRINCIPAL_CACHE_CHECK_SECONDS = float(os.getenv("PRINCIPAL_CACHE_CHECK_SECONDS", 1))
+    PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 1024))
+
+    # Background jobs (replenishment generation). Replenishment jobs are
+    # recorded in background_jobs so every worker can report them; the running
+    # worker writes progress every JOB_HEARTBEAT_SECONDS, and a job silent for
+    # JOB_STALE_SECONDS is reported failed. Finished jobs are kept
+    # JOB_RETENTION_SECONDS.
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 2))
+    JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 60))
+    JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 7 * 86400))
+
+    # Product catalogue cache (SKU/barcode lookups). Workers re-check the shared
+    # version stamp at most every CATALOGUE_CACHE_CHECK_SECONDS.
+    CATALOGUE_CACHE_MAX_SIZE = int(os.getenv("CATALOGUE_CACHE_MAX_SIZE", 50000))
+    CATALOGUE_CACHE_CHECK_SECONDS = float(os.getenv("CATALOGUE_CACHE_CHECK_SECONDS", 1))
+    CATALOGUE_CACHE_WARM_SIZE = int(os.getenv("CATALOGUE_CACHE_WARM_SIZE", 0))
+    # In-memory product search index (built at startup unless disabled)
+    SEARCH_INDEX_PRELOAD = os.getenv("SEARCH_INDEX_PRELOAD", "true").lower() == "true"
+
+    # Reference data (movement types, roles); reloads reach other workers
+    # within this many seconds
+    REFERENCE_DATA_CHECK_SECONDS = float(os.getenv("REFERENCE_DATA_CHECK_SECONDS", 30))
+
+    # Dashboard
+    DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 15))
+    # Live stream: one change-log poll per worker per interval, shared by all tabs
+    DASHBOARD_STREAM_POLL_SECONDS = float(os.getenv("DASHBOARD_STREAM_POLL_SECONDS", 2))
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS = float(os.getenv("DASHBOARD_STREAM_KEEPALIVE_SECONDS", 15))
+
+    # Request metrics (/metrics); slower requests are logged as JSON lines.
+    # /metrics and /api/health/routes need an admin token, or METRICS_TOKEN
+    # as the bearer token (for scrapers); unset, only admins can read them.
+    SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", 0.5))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 settings = Settings()
\ No newline at end of file
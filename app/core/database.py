@@ -1,9 +1,15 @@
-import mysql.connector.pooling
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from .config import settings
+from .pool import ConnectionPool
 
 db_config = {
-    "pool_name": "smart_inventory_pool",
-    "pool_size": 5,
     "host": settings.DB_HOST,
     "port": settings.DB_PORT,
     "database": settings.DB_NAME,
@@ -11,12 +17,126 @@ db_config = {
     "password": settings.DB_PASSWORD,
 }
 
-connection_pool = mysql.connector.pooling.MySQLConnectionPool(**db_config)
+connection_pool = ConnectionPool(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+    timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    **db_config
+)
 
-def get_db():
-    """FastAPI dependency: yields a database connection."""
-    conn = connection_pool.get_connection()
+# One worker per possible connection: awaiting callers queue here instead of
+# blocking the event loop or racing for connections.
+db_executor = ThreadPoolExecutor(max_workers=connection_pool.max_connections, thread_name_prefix="db")
+
+def route_label(request: Request) -> str:
+    """Route template (e.g. /products/{sku}) used to label pool metrics."""
+    route = request.scope.get("route")
+    return getattr(route, "path", request.url.path)
+
+@contextmanager
+def pooled_connection(label: str = "-"):
+    """Check out a pooled connection outside of FastAPI dependency injection."""
+    conn = connection_pool.get_connection(label)
     try:
         yield conn
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+def begin_transaction(conn) -> None:
+    """Start an explicit transaction, ending any read-only one already open.
+
+    Autocommit is off, so an earlier SELECT on the connection (a prefetch,
+    the auth lookup, a reference-data check) has implicitly opened a
+    transaction and start_transaction() would raise "Transaction already
+    in progress". Committing it also drops that read's stale snapshot.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.start_transaction()
+
+class RequestConnection:
+    """A request's database connection, checked out from the pool on first use.
+
+    Requests that never query (cached or claims-only paths) never take a
+    connection. release() hands it back early; a later use checks out again.
+    `endpoint_uses` tells dependencies whether the endpoint will query too.
+    """
+
+    def __init__(self, label: str, endpoint_uses: bool = False):
+        self._label = label
+        self._conn = None
+        self.endpoint_uses = endpoint_uses
+
+    @property
+    def acquired(self) -> bool:
+        return self._conn is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._conn is None:
+            self._conn = connection_pool.get_connection(self._label)
+        return getattr(self._conn, name)
+
+    def release(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            conn.close()
+
+    close = release
+
+async def get_db(request: Request):
+    """FastAPI dependency: yields the request's lazily acquired connection.
+
+    FastAPI caches it per request, so the route and its dependencies share
+    one connection; RequestConnectionRoute releases it when the endpoint
+    returns rather than after the response is sent.
+    """
+    route = request.scope.get("route")
+    conn = RequestConnection(route_label(request), getattr(route, "endpoint_uses_db", False))
+    try:
+        yield conn
+    finally:
+        if conn.acquired:
+            await run_in_threadpool(conn.release)
+
+def _acquired_connections(values: Dict[str, Any]):
+    return [v for v in values.values() if isinstance(v, RequestConnection) and v.acquired]
+
+class RequestConnectionRoute(APIRoute):
+    """Route that returns the request's connection to the pool as soon as the
+    endpoint returns, before the response is validated, serialised and sent."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.endpoint_uses_db = any(d.call is get_db for d in self.dependant.dependencies)
+        call = self.dependant.call
+        # The request handler decided sync vs async from the original endpoint,
+        # so the wrapper keeps its kind
+        if asyncio.iscoroutinefunction(call):
+            async def endpoint(**values):
+                try:
+                    return await call(**values)
+                finally:
+                    for conn in _acquired_connections(values):
+                        await run_in_threadpool(conn.release)
+        else:
+            def endpoint(**values):
+                try:
+                    return call(**values)
+                finally:
+                    for conn in _acquired_connections(values):
+                        conn.release()
+        self.dependant.call = endpoint
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a blocking model function, called as func(conn, *args, **kwargs).
+
+    Any function in app.models can be used from async code this way; it runs
+    on db_executor with its own pooled connection.
+    """
+    def call():
+        with pooled_connection() as conn:
+            return func(conn, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # keeps the queries in the request's metrics
+    return await loop.run_in_executor(db_executor, context.run, call)
\ No newline at end of file
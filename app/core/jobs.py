@@ -0,0 +1,222 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+from .config import settings
+from .database import pooled_connection
+from ..models import job as job_model
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class Job:
+    """State of one background job, updated by the worker running it."""
+
+    def __init__(self, kind: str, params: Dict[str, Any], shared: bool = False):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.shared = shared
+        self.status = "queued"
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Job":
+        """A read-only copy of a job recorded in background_jobs."""
+        job = cls(row["kind"], json.loads(row["params"]) if row["params"] else {}, shared=True)
+        job.id = row["id"]
+        job.status = row["status"]
+        job.progress = float(row["progress"])
+        job.message = row["message"]
+        job.result = json.loads(row["result"]) if row["result"] else None
+        job.error = row["error"]
+        job.created_at = row["created_at"].timestamp()
+        job.started_at = row["started_at"].timestamp() if row["started_at"] else None
+        job.finished_at = row["finished_at"].timestamp() if row["finished_at"] else None
+        return job
+
+    def state_row(self) -> Dict[str, Any]:
+        """The background_jobs columns this job's worker keeps current."""
+        stamp = lambda t: datetime.fromtimestamp(t) if t is not None else None
+        return {
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message[:255] if self.message else None,
+            "result": json.dumps(self.result, default=str) if self.result is not None else None,
+            "error": self.error,
+            "started_at": stamp(self.started_at),
+            "finished_at": stamp(self.finished_at),
+        }
+
+
+class JobRunner:
+    """Runs jobs on a bounded worker pool and coalesces duplicate submissions.
+
+    Submitting a job whose key matches one that is still queued or running
+    returns the existing job instead of starting another run.
+
+    Jobs are private to this process unless submitted with shared=True: those
+    are recorded in background_jobs, so they coalesce across workers and any
+    worker can report them. Their worker writes progress back every
+    `heartbeat_interval` seconds; a shared job whose worker has been silent
+    for `stale_after` seconds is reported as failed.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        history: int = 100,
+        heartbeat_interval: float = 2.0,
+        stale_after: float = 60.0,
+        retention: float = 7 * 86400
+    ):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Hashable, Job] = {}
+        self._history = history
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.retention = retention
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, params: Dict[str, Any], func: Callable[[Job], Any], shared: bool = False) -> Job:
+        key = (kind, tuple(sorted(params.items())))
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None and existing.status in ACTIVE_STATES:
+                return existing
+            job = Job(kind, params, shared)
+            if not shared:
+                self._register(key, job)
+        if shared:
+            existing = self._record(job)
+            if existing is not None:
+                return existing
+            with self._lock:
+                self._register(key, job)
+                self._start_heartbeat()
+        self._executor.submit(self._run, key, job, func)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job by id: this process's own copy, else the shared record."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        with pooled_connection("job:state") as conn:
+            row = job_model.get_job(conn, job_id, self.stale_after)
+        return Job.from_row(row) if row else None
+
+    def _register(self, key: Hashable, job: Job) -> None:
+        # Caller holds self._lock
+        self._jobs[job.id] = job
+        self._active[key] = job
+        self._prune()
+
+    def _record(self, job: Job) -> Optional[Job]:
+        """Insert a shared job; returns the active run it should join instead, if any."""
+        job_key = hashlib.sha1(
+            json.dumps([job.kind, job.params], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with pooled_connection("job:state") as conn:
+            job_model.delete_finished_jobs(conn, self.retention)
+            existing = job_model.insert_job(conn, {
+                "id": job.id,
+                "kind": job.kind,
+                "job_key": job_key,
+                "params": json.dumps(job.params, default=str),
+                "status": job.status,
+                "created_at": datetime.fromtimestamp(job.created_at),
+            }, self.stale_after)
+        return Job.from_row(existing) if existing else None
+
+    def _save(self, job: Job) -> None:
+        with pooled_connection("job:state") as conn:
+            job_model.update_job(conn, job.id, job.state_row())
+
+    def _start_heartbeat(self) -> None:
+        # Caller holds self._lock
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._lock:
+                running = [j for j in self._jobs.values() if j.shared and j.status in ACTIVE_STATES]
+            for job in running:
+                try:
+                    self._save(job)
+                except Exception:
+                    pass  # the next beat retries; a long outage marks the job stale
+
+    def _run(self, key: Hashable, job: Job, func: Callable[[Job], Any]) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            if job.shared:
+                self._save(job)
+            job.result = func(job)
+            job.progress = 1.0
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._active.get(key) is job:
+                    del self._active[key]
+            if job.shared:
+                try:
+                    self._save(job)
+                except Exception:
+                    pass  # readers elsewhere see it go stale and fail
+
+    def _prune(self) -> None:
+        # Caller holds self._lock; forget the oldest finished jobs
+        finished = [jid for jid, j in self._jobs.items() if j.status not in ACTIVE_STATES]
+        for jid in finished[:max(0, len(self._jobs) - self._history)]:
+            del self._jobs[jid]
+
+
+job_runner = JobRunner(
+    max_workers=settings.JOB_WORKERS,
+    heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+    stale_after=settings.JOB_STALE_SECONDS,
+    retention=settings.JOB_RETENTION_SECONDS
+)
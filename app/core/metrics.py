@@ -0,0 +1,188 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; suits both pool checkout waits and connection hold times
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe histogram with fixed upper-bound buckets (Prometheus style)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts keyed by upper bound, plus count/sum/max."""
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, n in zip(self.buckets + (float("inf"),), self._counts):
+                running += n
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 6),
+                "max": round(self.max, 6),
+                "buckets": cumulative,
+            }
+
+
+# Per-request query counts
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class RequestStats:
+    """Database work done while serving one request (filled by the cursor wrapper)."""
+
+    __slots__ = ("queries", "db_time", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class _RouteEntry:
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_time = Histogram()
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+
+class RouteMetrics:
+    """Latency, query count and DB time histograms per (method, route template)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteEntry] = {}
+
+    def observe(self, method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            entry = self._routes.get((method, route))
+            if entry is None:
+                entry = self._routes[(method, route)] = _RouteEntry()
+            entry.statuses[status] = entry.statuses.get(status, 0) + 1
+            if stats.slowest > entry.slowest:
+                entry.slowest = stats.slowest
+                entry.slowest_statement = stats.slowest_statement
+        entry.latency.observe(duration)
+        entry.db_time.observe(stats.db_time)
+        entry.queries.observe(stats.queries)
+
+    def snapshot(self, include_statements: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Per-route stats; include_statements=False leaves out the SQL text."""
+        with self._lock:
+            routes = list(self._routes.items())
+        snapshot = {}
+        for (method, route), entry in routes:
+            stats = {
+                "statuses": dict(entry.statuses),
+                "latency_seconds": entry.latency.snapshot(),
+                "db_time_seconds": entry.db_time.snapshot(),
+                "queries": entry.queries.snapshot(),
+                "slowest_statement_seconds": round(entry.slowest, 6),
+            }
+            if include_statements:
+                stats["slowest_statement"] = entry.slowest_statement
+            snapshot[f"{method} {route}"] = stats
+        return snapshot
+
+
+route_metrics = RouteMetrics()
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Matched route template for metric labels; never the raw path (unbounded)."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path", None) or "static"
+
+
+# -------------------- Prometheus text format --------------------
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+def _histogram_lines(name: str, labels: Dict[str, Any], snapshot: Dict[str, Any]) -> List[str]:
+    lines = [f"{name}_bucket{_labels({**labels, 'le': bound})} {count}"
+             for bound, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
+
+def render_prometheus(routes: Dict[str, Dict[str, Any]], pool: Dict[str, Any]) -> str:
+    """Render route_metrics.snapshot() and ConnectionPool.stats() as Prometheus text."""
+    out: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> None:
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    parsed = []
+    for key, entry in routes.items():
+        method, route = key.split(" ", 1)
+        parsed.append(({"method": method, "route": route}, entry))
+
+    family("http_requests_total", "counter", "Requests served, by route and status.")
+    for labels, entry in parsed:
+        for status, count in sorted(entry["statuses"].items()):
+            out.append(f"http_requests_total{_labels({**labels, 'status': status})} {count}")
+    family("http_request_duration_seconds", "histogram", "Time to response start, by route.")
+    for labels, entry in parsed:
+        out.extend(_histogram_lines("http_request_duration_seconds", labels, entry["latency_seconds"]))
+    family("http_request_db_seconds", "histogram", "Database time per request, by route.")
+    for labels, entry in parsed:
+        out.extend(_histogram_lines("http_request_db_seconds", labels, entry["db_time_seconds"]))
+    family("http_request_db_queries", "histogram", "Statements executed per request, by route.")
+    for labels, entry in parsed:
+        out.extend(_histogram_lines("http_request_db_queries", labels, entry["queries"]))
+    family("http_request_db_slowest_statement_seconds", "gauge", "Slowest single statement seen, by route.")
+    for labels, entry in parsed:
+        out.append(f"http_request_db_slowest_statement_seconds{_labels(labels)} {entry['slowest_statement_seconds']}")
+
+    for name in ("open", "in_use", "idle", "waiting"):
+        family(f"db_pool_{name}", "gauge", f"Pool connections: {name.replace('_', ' ')}.")
+        out.append(f"db_pool_{name} {pool[name]}")
+    for name in ("exhausted_events", "timeouts", "recycled"):
+        family(f"db_pool_{name}_total", "counter", f"Pool {name.replace('_', ' ')}.")
+        out.append(f"db_pool_{name}_total {pool[name]}")
+    family("db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.")
+    out.extend(_histogram_lines("db_pool_checkout_wait_seconds", {}, pool["checkout_wait_seconds"]))
+    family("db_pool_hold_seconds", "histogram", "Time a connection was checked out, by route.")
+    for route, snapshot in pool["hold_seconds_by_route"].items():
+        out.extend(_histogram_lines("db_pool_hold_seconds", {"route": route}, snapshot))
+    return "\n".join(out) + "\n"
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+import mysql.connector
+
+from .metrics import Histogram, current_request_stats
+
+
+class PoolTimeoutError(Exception):
+    """No connection became available within the checkout timeout."""
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times each statement into the current request's stats."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, statement: str, method, *args, **kwargs):
+        stats = current_request_stats.get()
+        if stats is None:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            if isinstance(statement, bytes):
+                statement = statement.decode("utf-8", "replace")
+            stats.record(" ".join(statement.split())[:200], time.perf_counter() - start)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(operation, self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params):
+        return self._timed(operation, self._cursor.executemany, operation, seq_params)
+
+    def callproc(self, procname, args=()):
+        return self._timed(f"CALL {procname}", self._cursor.callproc, procname, args)
+
+
+class PooledConnection:
+    """Proxy for a checked-out connection; close() hands it back to the pool."""
+
+    def __init__(self, pool: "ConnectionPool", cnx, created_at: float, label: str):
+        self._pool = pool
+        self._cnx = cnx
+        self._created_at = created_at
+        self._label = label
+        self._checked_out_at = time.monotonic()
+
+    def __getattr__(self, name: str) -> Any:
+        if self._cnx is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(self._cnx, name)
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        if self._cnx is None:
+            raise AttributeError("connection already returned to the pool (cursor)")
+        return InstrumentedCursor(self._cnx.cursor(*args, **kwargs))
+
+    def close(self) -> None:
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        held = time.monotonic() - self._checked_out_at
+        self._pool._release(cnx, self._created_at, self._label, held)
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with overflow, queued checkout and recycling.
+
+    Up to `pool_size` idle connections are kept; bursts may open
+    `max_overflow` extra ones that are closed on return. When every
+    connection is in use, callers wait up to `timeout` seconds before
+    PoolTimeoutError is raised. Connections older than `recycle` seconds are
+    replaced on checkout.
+    """
+
+    def __init__(self, pool_size: int, max_overflow: int, timeout: float, recycle: float, **connect_args):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self._connect_args = connect_args
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self.exhausted_events = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.wait_time = Histogram()
+        self.hold_time: Dict[str, Histogram] = {}
+
+    @property
+    def max_connections(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def get_connection(self, label: str = "-") -> PooledConnection:
+        """Check out a connection, waiting up to `timeout` if the pool is exhausted."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        cnx, created_at = None, 0.0
+        with self._cond:
+            if not self._idle and self._open >= self.max_connections:
+                self.exhausted_events += 1
+                self._waiting += 1
+                try:
+                    while not self._idle and self._open >= self.max_connections:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise PoolTimeoutError(
+                                f"No database connection available after {self.timeout}s"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            if self._idle:
+                cnx, created_at = self._idle.pop()
+            else:
+                self._open += 1  # reserve a slot; connect outside the lock
+            self._in_use += 1
+
+        if cnx is not None and time.monotonic() - created_at > self.recycle:
+            self._close_quietly(cnx)
+            with self._cond:
+                self.recycled += 1
+            cnx = None
+        if cnx is None:
+            try:
+                cnx = mysql.connector.connect(**self._connect_args)
+                created_at = time.monotonic()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+        self.wait_time.observe(time.monotonic() - start)
+        return PooledConnection(self, cnx, created_at, label)
+
+    def _release(self, cnx, created_at: float, label: str, held: float) -> None:
+        reusable = True
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+        except Exception:
+            reusable = False
+
+        with self._cond:
+            histogram = self.hold_time.get(label)
+            if histogram is None:
+                histogram = self.hold_time[label] = Histogram()
+            self._in_use -= 1
+            if reusable and len(self._idle) < self.pool_size:
+                self._idle.append((cnx, created_at))
+                cnx = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        histogram.observe(held)
+        if cnx is not None:
+            self._close_quietly(cnx)
+
+    @staticmethod
+    def _close_quietly(cnx) -> None:
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            state = {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "timeout_seconds": self.timeout,
+                "recycle_seconds": self.recycle,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "exhausted_events": self.exhausted_events,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
+            labels = list(self.hold_time.items())
+        state["checkout_wait_seconds"] = self.wait_time.snapshot()
+        state["hold_seconds_by_route"] = {label: h.snapshot() for label, h in labels}
+        return state
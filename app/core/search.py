@@ -0,0 +1,281 @@
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Per-token scores; a document's score is the sum over query tokens
+EXACT_SCORE = 100.0   # whole query equals the SKU or barcode
+WORD_SCORE = 10.0     # token equals a word
+PREFIX_SCORE = 8.0    # token starts a word
+SUBSTRING_SCORE = 4.0
+FUZZY_SCORE = 3.0     # scaled by trigram similarity
+FUZZY_THRESHOLD = 0.5
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+def _padded_trigrams(word: str) -> Set[str]:
+    # Padded like pg_trgm so a word's first and last letters form trigrams
+    # too; short words otherwise share too few to survive a typo
+    return _trigrams("  " + word + " ")
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """At most one insertion, deletion, substitution or adjacent swap apart."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+
+
+class _State:
+    def __init__(self):
+        self.docs: List[Optional[Dict]] = []     # doc id -> record, None once replaced
+        self.by_key: Dict[str, int] = {}         # record key -> live doc id
+        self.exact: Dict[str, Set[int]] = {}     # normalised SKU/barcode -> doc ids
+        self.vocab: List[str] = []               # sorted distinct words, for prefix scans
+        self.postings: Dict[str, array] = {}     # word -> doc ids
+        self.grams: Dict[str, List[str]] = {}    # padded trigram -> words containing it
+        self.retired = 0
+
+    def copy(self) -> "_State":
+        # Shallow: inner sets, arrays and lists are still shared and must be
+        # replaced, not mutated
+        state = _State()
+        state.docs = list(self.docs)
+        state.by_key = dict(self.by_key)
+        state.exact = dict(self.exact)
+        state.vocab = list(self.vocab)
+        state.postings = dict(self.postings)
+        state.grams = dict(self.grams)
+        state.retired = self.retired
+        return state
+
+
+class SearchIndex:
+    """In-memory search over a catalogue: exact, prefix, substring and typo-tolerant.
+
+    Records are indexed on the words of their `fields`; substring and fuzzy
+    matching run over the (much smaller) vocabulary of distinct words through
+    a trigram index, then expand to documents. Replacing a record appends a
+    new document and retires the old one; rebuild() compacts everything.
+    Searches read the current state without locking. Writers serialise on a
+    lock and never touch a published state: they change a copy and swap it in
+    with one assignment, so a search sees each write whole or not at all.
+    """
+
+    def __init__(self, key: str, fields: Iterable[str], exact_fields: Iterable[str]):
+        self.key = key
+        self.fields = tuple(fields)
+        self.exact_fields = tuple(exact_fields)
+        self._lock = threading.Lock()
+        self._state = _State()
+        self.version: Optional[int] = None
+        self.built = False
+
+    # ---- writes ----
+    def _build(self, records: Iterable[Dict]) -> _State:
+        state = _State()
+        for record in records:
+            self._add(state, record)
+        state.vocab.sort()
+        return state
+
+    def rebuild(self, records: Iterable[Dict], version: Optional[int]) -> int:
+        state = self._build(records)
+        with self._lock:
+            self._state = state
+            self.version = version
+            self.built = True
+        return len(state.by_key)
+
+    def apply(self, records: Iterable[Dict], removed_keys: Iterable[str], version: int) -> bool:
+        """Apply one write on top of `version - 1`; returns False if the index has moved on."""
+        with self._lock:
+            if not self.built or self.version != version - 1:
+                return False
+            self._replace(records, removed_keys)
+            self.version = version
+            return True
+
+    def refresh(self, records: Iterable[Dict], version: int) -> bool:
+        """Replace `records` with freshly read copies and move to `version`.
+
+        For catching up with writes made elsewhere, whatever versions they
+        carried; the caller re-reads every record changed since it last synced.
+        """
+        with self._lock:
+            if not self.built:
+                return False
+            self._replace(records, ())
+            if self.version is None or version > self.version:
+                self.version = version
+            return True
+
+    def _replace(self, records: Iterable[Dict], removed_keys: Iterable[str]) -> None:
+        # Caller holds self._lock
+        state = self._state.copy()
+        for key in removed_keys:
+            self._retire(state, key)
+        for record in records:
+            self._retire(state, record[self.key])
+            self._add(state, record, shared=True)
+        if state.retired > max(1000, len(state.by_key) // 2):
+            state = self._build(d for d in state.docs if d is not None)
+        self._state = state
+
+    def _retire(self, state: _State, key: str) -> None:
+        doc_id = state.by_key.pop(key, None)
+        if doc_id is not None:
+            state.docs[doc_id] = None
+            state.retired += 1
+
+    def _add(self, state: _State, record: Dict, shared: bool = False) -> None:
+        # shared: `state` is a copy whose inner containers a published state
+        # still uses, so they are replaced rather than appended to
+        doc_id = len(state.docs)
+        state.docs.append(record)
+        state.by_key[record[self.key]] = doc_id
+        for field in self.exact_fields:
+            if record.get(field):
+                value = str(record[field]).lower()
+                if shared:
+                    state.exact[value] = state.exact.get(value, set()) | {doc_id}
+                else:
+                    state.exact.setdefault(value, set()).add(doc_id)
+        words = set()
+        for field in self.fields:
+            words.update(_words(str(record.get(field) or "")))
+        for word in words:
+            posting = state.postings.get(word)
+            if posting is None:
+                posting = state.postings[word] = array("I")
+                if shared:
+                    insort(state.vocab, word)
+                else:
+                    state.vocab.append(word)
+                for gram in _padded_trigrams(word):
+                    if shared:
+                        state.grams[gram] = state.grams.get(gram, []) + [word]
+                    else:
+                        state.grams.setdefault(gram, []).append(word)
+            elif shared:
+                posting = state.postings[word] = array("I", posting)
+            posting.append(doc_id)
+
+    # ---- reads ----
+    def search(
+        self,
+        query: str,
+        predicate: Optional[Callable[[Dict], bool]] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[float, Dict]]:
+        """Best matches first as (score, record); every query token must match,
+        falling back to fuzzy matching on any token when nothing does."""
+        state = self._state
+        tokens = _words(query)
+        if not tokens:
+            return []
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            matches = self._expand(state, self._match_words(state, token))
+            if scores is None:
+                scores = matches
+            else:
+                scores = {d: s + matches[d] for d, s in scores.items() if d in matches}
+            if not scores:
+                break
+        if not scores:
+            scores = {}
+            for token in tokens:
+                for doc_id, score in self._expand(state, self._fuzzy_words(state, token)).items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        for doc_id in state.exact.get(query.strip().lower(), ()):
+            scores[doc_id] = scores.get(doc_id, 0.0) + EXACT_SCORE
+
+        docs = state.docs
+        hits = []
+        for doc_id, score in scores.items():
+            record = docs[doc_id]
+            if record is not None and (predicate is None or predicate(record)):
+                hits.append((score, record))
+        # Stable order for paging: score, then shorter (more specific) names
+        sort_key = lambda hit: (-hit[0], len(hit[1]["name"]), hit[1]["name"], hit[1][self.key])
+        if limit is not None:
+            return heapq.nsmallest(limit, hits, key=sort_key)
+        return sorted(hits, key=sort_key)
+
+    @staticmethod
+    def _expand(state: _State, word_scores: Dict[str, float]) -> Dict[int, float]:
+        # Lowest scores first so a document keeps the best score of its words
+        matches: Dict[int, float] = {}
+        for word, score in sorted(word_scores.items(), key=lambda item: item[1]):
+            matches.update(dict.fromkeys(state.postings[word], score))
+        return matches
+
+    def _match_words(self, state: _State, token: str) -> Dict[str, float]:
+        words: Dict[str, float] = {}
+        # Substrings inside words (tokens of 3+ characters)
+        grams = _trigrams(token)
+        if grams:
+            lists = sorted((state.grams.get(g, ()) for g in grams), key=len)
+            candidates = set(lists[0])
+            for other in lists[1:]:
+                candidates.intersection_update(other)
+                if not candidates:
+                    break
+            for word in candidates:
+                if token in word:
+                    words[word] = SUBSTRING_SCORE
+        # Whole words and word prefixes
+        vocab = state.vocab
+        i = bisect_left(vocab, token)
+        while i < len(vocab) and vocab[i].startswith(token):
+            word = vocab[i]
+            words[word] = WORD_SCORE if word == token else PREFIX_SCORE
+            i += 1
+        return words
+
+    def _fuzzy_words(self, state: _State, token: str) -> Dict[str, float]:
+        if len(token) < 3:
+            return {}
+        grams = _padded_trigrams(token)
+        shared = Counter()
+        for gram in grams:
+            shared.update(state.grams.get(gram, ()))
+        words = {}
+        for word, count in shared.items():
+            # Dice coefficient over padded trigrams
+            similarity = 2 * count / (len(grams) + len(word) + 1)
+            if similarity < FUZZY_THRESHOLD and _one_edit_apart(token, word):
+                # Short words share few trigrams even one typo apart
+                # ("mlik"/"milk"); candidates all share at least one
+                similarity = 1 - 1 / max(len(token), len(word))
+            if similarity >= FUZZY_THRESHOLD:
+                words[word] = FUZZY_SCORE * similarity
+        return words
+
+    def stats(self) -> Dict:
+        state = self._state
+        return {
+            "built": self.built,
+            "version": self.version,
+            "documents": len(state.by_key),
+            "retired": state.retired,
+            "words": len(state.vocab),
+            "trigrams": len(state.grams),
+        }
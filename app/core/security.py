@@ -1,16 +1,102 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 import bcrypt
 import jwt
 from .config import settings
 
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different cost than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+# -------------------- HASHING POOL --------------------
+class PasswordHasherBusyError(Exception):
+    """A hashing request waited longer than the queue timeout for a worker."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small thread pool.
+
+    bcrypt is deliberately CPU-bound; a burst of logins on the shared
+    threadpool would hold every thread for the length of a hash. Here at
+    most `workers` hashes run at once, and a request still queued after
+    `queue_timeout` seconds is refused without being hashed, so a backlog
+    drains quickly instead of every caller waiting out the whole queue.
+    """
+
+    def __init__(self, workers: int, queue_timeout: float):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            self._queued += 1
+        future = self._executor.submit(self._call, time.monotonic(), func, args)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, submitted: float, func: Callable[..., Any], args) -> Any:
+        waited = time.monotonic() - submitted
+        with self._lock:
+            self._queued -= 1
+            self.max_wait = max(self.max_wait, waited)
+            if waited > self.queue_timeout:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Too many sign-ins in progress, please retry shortly")
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rounds": settings.BCRYPT_ROUNDS,
+                "workers": self.workers,
+                "queue_timeout_seconds": self.queue_timeout,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_wait_seconds": round(self.max_wait, 4),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+)
+
+# -------------------- TOKENS --------------------
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -21,6 +107,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def principal_claims(user: dict) -> dict:
+    """Token claims describing the user, so auth can run without a user lookup."""
+    return {
+        "sub": str(user["id"]),
+        "username": user["username"],
+        "email": user["email"],
+        "roles": user.get("roles") or "",
+    }
+
 def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
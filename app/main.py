@@ -1,11 +1,22 @@
-from fastapi import FastAPI, Request, Response
+import gc
+import json
+import logging
+import time
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from .api.routes import dashboard
 from .api.routes import auth, products, inventory, sales
 from .core.config import settings
+from .core.database import connection_pool, pooled_connection
+from .core.metrics import RequestStats, current_request_stats, render_prometheus, route_metrics, route_template
+from .core.pool import PoolTimeoutError
+from .core.security import PasswordHasherBusyError
 from .api.routes import replenishment
+from .api.routes import admin
+from .api.dependencies import get_metrics_reader
 
 app = FastAPI(
     title="Smart Inventory System API",
@@ -38,8 +49,77 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ----------------------------------------------------------------------
+# ✅ Per-route latency, query count and DB time (served on /metrics);
+#    requests slower than SLOW_REQUEST_SECONDS are logged as JSON lines
+# ----------------------------------------------------------------------
+slow_request_logger = logging.getLogger("smart_inventory.slow_requests")
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - start
+        current_request_stats.reset(token)
+        route = route_template(request.scope)
+        route_metrics.observe(request.method, route, status_code, duration, stats)
+        if duration >= settings.SLOW_REQUEST_SECONDS:
+            slow_request_logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "route": route,
+                "path": request.url.path,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "queries": stats.queries,
+                "db_ms": round(stats.db_time * 1000, 1),
+                "slowest_statement_ms": round(stats.slowest * 1000, 1),
+                "slowest_statement": stats.slowest_statement,
+            }))
+
+# ----------------------------------------------------------------------
+# ✅ Database pool exhaustion → 503 instead of a generic 500
+# ----------------------------------------------------------------------
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+# Login burst beyond what the password hasher pool can absorb → 503, retry soon
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# ----------------------------------------------------------------------
+# ✅ Preload reference data and the product search index; optionally warm
+#    the product catalogue cache (otherwise filled lazily)
+# ----------------------------------------------------------------------
+@app.on_event("startup")
+def preload_caches():
+    from .models.product import rebuild_search_index, warm_catalogue_cache
+    from .models.reference import reference_data
+    with pooled_connection("startup") as conn:
+        reference_data.load(conn)
+        if settings.CATALOGUE_CACHE_WARM_SIZE > 0:
+            warm_catalogue_cache(conn, settings.CATALOGUE_CACHE_WARM_SIZE)
+        if settings.SEARCH_INDEX_PRELOAD:
+            rebuild_search_index(conn)
+    # Move everything loaded so far (search index, reference data, imports)
+    # out of the collector's reach, once: full collections would otherwise
+    # rescan the whole index (100ms+ pauses at 100k products). Later index
+    # updates are incremental and stay small.
+    gc.collect()
+    gc.freeze()
+
 # ----------------------------------------------------------------------
 # ✅ Include all API routers
 # ----------------------------------------------------------------------
@@ -49,6 +129,7 @@ app.include_router(inventory.router)
 app.include_router(sales.router)
 app.include_router(dashboard.router)
 app.include_router(replenishment.router)
+app.include_router(admin.router)
 
 # ----------------------------------------------------------------------
 # ✅ Serve static frontend files (HTML, CSS, JS)
@@ -62,4 +143,21 @@ if frontend_path.exists():
 # ----------------------------------------------------------------------
 @app.get("/api/health")
 def health_check():
-    return {"status": "ok", "database": settings.DB_NAME}
\ No newline at end of file
+    return {"status": "ok", "database": settings.DB_NAME}
+
+@app.get("/api/health/pool")
+def pool_stats():
+    return connection_pool.stats()
+
+@app.get("/api/health/routes")
+def route_stats(reader = Depends(get_metrics_reader)):  # 🔒 admin or METRICS_TOKEN
+    """Per-route stats; the slowest statements' SQL text is shown to admins only."""
+    return route_metrics.snapshot(include_statements=reader is not None)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(reader = Depends(get_metrics_reader)):  # 🔒 admin or METRICS_TOKEN
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(
+        render_prometheus(route_metrics.snapshot(), connection_pool.stats()),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,25 @@
+from mysql.connector import MySQLConnection
+
+# Rows of `cache_versions`, one per cached data set. Writers bump the version
+# inside their own transaction; workers compare it to drop stale local copies.
+
+def get_cache_version(conn: MySQLConnection, name: str) -> int:
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM cache_versions WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else 0
+
+def bump_cache_version(cursor, name: str) -> int:
+    """Increment a version using the caller's cursor (and transaction).
+
+    Returns the new version; the row stays locked until the caller commits,
+    so it is exactly the version that describes the caller's write.
+    """
+    cursor.execute(
+        "INSERT INTO cache_versions (name, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1",
+        (name,)
+    )
+    cursor.execute("SELECT version FROM cache_versions WHERE name = %s", (name,))
+    return cursor.fetchone()[0]
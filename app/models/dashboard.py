@@ -1,6 +1,12 @@
 from mysql.connector import MySQLConnection
-from typing import List, Dict, Optional
-from datetime import date
+from typing import List, Dict, Iterator, Optional, Tuple
+from datetime import date, datetime
+from ..core.cache import TTLCache
+from ..core.config import settings
+from .sales_rollup import INDEXED_WINDOWS, get_daily_rollup
+
+# Shared by all dashboard tabs; keyed by date (see get_dashboard_summary)
+summary_cache = TTLCache(max_size=8, ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
 
 def get_low_stock_alerts(conn: MySQLConnection) -> List[Dict]:
     """Fetch all low stock alerts from the low_stock_alerts view."""
@@ -12,13 +18,9 @@ def get_low_stock_alerts(conn: MySQLConnection) -> List[Dict]:
     return results
 
 def get_daily_sales_summary(conn: MySQLConnection, target_date: date) -> Optional[Dict]:
-    """Get sales summary for a specific date from the daily_sales_summary view."""
-    cursor = conn.cursor(dictionary=True)
-    query = "SELECT * FROM daily_sales_summary WHERE transaction_date = %s"
-    cursor.execute(query, (target_date,))
-    result = cursor.fetchone()
-    cursor.close()
-    return result
+    """Get sales summary for a specific date from the sales rollups (None if no sales)."""
+    summary = get_daily_rollup(conn, target_date)
+    return summary if summary["transaction_count"] else None
 
 def get_current_inventory(conn: MySQLConnection, active_only: bool = True) -> List[Dict]:
     """Fetch current inventory snapshot from the current_inventory view."""
@@ -34,13 +36,82 @@ def get_current_inventory(conn: MySQLConnection, active_only: bool = True) -> Li
     cursor.close()
     return results
 
-def get_product_performance(conn: MySQLConnection, days: int = 30) -> List[Dict]:
-    """Fetch product performance (last 30 days sales) from the product_performance view."""
+def iter_current_inventory(conn: MySQLConnection, batch_size: int = 1000) -> Iterator[Dict]:
+    """Stream the current_inventory view from an unbuffered (server-side) cursor."""
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute("SELECT * FROM current_inventory ORDER BY sku")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def _performance_status(row: Dict) -> str:
+    if not row["total_sold"]:
+        return "No sales"
+    if row["quantity_in_stock"] == 0:
+        return "Out of stock"
+    if row["quantity_in_stock"] <= row["reorder_threshold"]:
+        return "Reorder needed"
+    return "OK"
+
+def get_product_performance(
+    conn: MySQLConnection,
+    days: int = 30,
+    limit: int = 50,
+    offset: int = 0,
+    after: Optional[List] = None
+) -> List[Dict]:
+    """Active products ranked by units sold over the last `days` days (including today).
+
+    7/30/90/365-day windows read the precomputed product_sales_index through
+    its (units, sku) index; other windows aggregate the per-product daily
+    rollup. `after` holds the (total_sold, sku) of the last row already seen;
+    when given, keyset pagination is used and `offset` is ignored.
+    """
     cursor = conn.cursor(dictionary=True)
-    query = "SELECT * FROM product_performance ORDER BY total_sold_30d DESC"
-    cursor.execute(query)
+    params: List = []
+    if days in INDEXED_WINDOWS:
+        # Rank on the index's own columns, reading it first, so the
+        # (units, product_sku) index hands rows over already in order
+        units, revenue, sku = f"i.units_{days}d", f"i.revenue_{days}d", "i.product_sku"
+        source = "product_sales_index i STRAIGHT_JOIN products p ON p.sku = i.product_sku"
+    else:
+        units, revenue, sku = "COALESCE(s.units, 0)", "COALESCE(s.revenue, 0)", "p.sku"
+        source = """
+            products p
+            LEFT JOIN (
+                SELECT product_sku, SUM(quantity_sold) AS units, SUM(revenue) AS revenue
+                FROM sales_product_daily_rollup
+                WHERE sales_date > CURDATE() - INTERVAL %s DAY
+                GROUP BY product_sku
+            ) s ON s.product_sku = p.sku
+        """
+        params.append(days)
+    query = f"""
+        SELECT p.sku, p.name, c.name AS category_name, p.quantity_in_stock, p.reorder_threshold,
+               {units} AS total_sold, {revenue} AS revenue
+        FROM {source}
+        LEFT JOIN categories c ON p.category_id = c.id
+        WHERE p.is_active = TRUE
+    """
+    if after:
+        query += f" AND ({units} < %s OR ({units} = %s AND {sku} < %s))"
+        params.extend([after[0], after[0], after[1]])
+        offset = 0
+    query += f" ORDER BY {units} DESC, {sku} DESC LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    cursor.execute(query, tuple(params))
     results = cursor.fetchall()
     cursor.close()
+    for row in results:
+        row["total_sold"] = int(row["total_sold"])
+        row["days"] = days
+        row["avg_daily_sales"] = round(row["total_sold"] / days, 2)
+        row["status"] = _performance_status(row)
     return results
 
 def get_total_products_count(conn: MySQLConnection) -> int:
@@ -77,4 +148,90 @@ def get_out_of_stock_count(conn: MySQLConnection) -> int:
     cursor.execute(query)
     count = cursor.fetchone()[0]
     cursor.close()
-    return count
\ No newline at end of file
+    return count
+
+def get_dashboard_summary(conn: MySQLConnection, target_date: date) -> Dict:
+    """All dashboard summary metrics in one round-trip (conditional aggregates
+    over products plus the day's sales rollup)."""
+    cursor = conn.cursor(dictionary=True)
+    query = """
+        SELECT
+            pa.total_products,
+            pa.total_stock_value,
+            pa.low_stock_count,
+            pa.out_of_stock_count,
+            ds.transaction_count,
+            ds.unique_products_sold,
+            ds.total_items_sold,
+            ds.total_revenue
+        FROM (
+            SELECT
+                COUNT(*) AS total_products,
+                COALESCE(SUM(cost_price * quantity_in_stock), 0) AS total_stock_value,
+                COALESCE(SUM(quantity_in_stock <= reorder_threshold), 0) AS low_stock_count,
+                COALESCE(SUM(quantity_in_stock = 0), 0) AS out_of_stock_count
+            FROM products
+            WHERE is_active = TRUE
+        ) pa
+        CROSS JOIN (
+            SELECT
+                SUM(transaction_count) AS transaction_count,
+                SUM(items_sold) AS total_items_sold,
+                SUM(revenue) AS total_revenue,
+                (SELECT COUNT(*) FROM sales_product_daily_rollup WHERE sales_date = %s) AS unique_products_sold
+            FROM sales_daily_rollup
+            WHERE sales_date = %s
+        ) ds
+    """
+    cursor.execute(query, (target_date, target_date))
+    row = cursor.fetchone()
+    cursor.close()
+    today_sales = None
+    if row["transaction_count"]:
+        today_sales = {
+            "transaction_date": target_date,
+            "transaction_count": int(row["transaction_count"]),
+            "unique_products_sold": int(row["unique_products_sold"]),
+            "total_items_sold": int(row["total_items_sold"]),
+            "total_revenue": row["total_revenue"],
+        }
+    return {
+        "total_products": row["total_products"],
+        "total_stock_value": row["total_stock_value"],
+        "low_stock_count": int(row["low_stock_count"]),
+        "out_of_stock_count": int(row["out_of_stock_count"]),
+        "today_sales": today_sales,
+    }
+
+def get_change_log_position(conn: MySQLConnection) -> datetime:
+    """Database clock to start watching sku_change_log from."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT NOW(6)")
+    position = cursor.fetchone()[0]
+    cursor.close()
+    return position
+
+def get_stock_changes(
+    conn: MySQLConnection,
+    since: datetime,
+    overlap_seconds: int
+) -> Tuple[List[Dict], datetime]:
+    """Current stock state of SKUs stamped in sku_change_log after `since`.
+
+    The window reaches back `overlap_seconds` to catch movements that
+    committed after a previous poll, so callers should expect repeats.
+    Returns (rows, position for the next call).
+    """
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT NOW(6) AS position")
+    position = cursor.fetchone()["position"]
+    query = """
+        SELECT p.sku, p.name, p.quantity_in_stock, p.reorder_threshold, p.is_active
+        FROM sku_change_log cl
+        JOIN products p ON p.sku = cl.product_sku
+        WHERE cl.changed_at > %s - INTERVAL %s SECOND
+    """
+    cursor.execute(query, (since, overlap_seconds))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows, position
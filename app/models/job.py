@@ -0,0 +1,84 @@
+import mysql.connector
+from mysql.connector import MySQLConnection, errorcode
+from typing import Dict, Optional
+
+# Rows of `background_jobs`: the shared record of jobs that any worker may be
+# asked about. The worker running a job keeps its row (and heartbeat) current.
+
+STALE_ERROR = "The worker running this job stopped responding"
+
+def _fail_stale_jobs(cursor, stale_seconds: float, job_id: Optional[str] = None) -> None:
+    """Mark active jobs whose heartbeat stopped as failed (their worker is gone)."""
+    query = """
+        UPDATE background_jobs
+        SET status = 'failed', error = %s, finished_at = NOW(6)
+        WHERE active_key IS NOT NULL AND heartbeat_at < NOW(6) - INTERVAL %s SECOND
+    """
+    params = [STALE_ERROR, stale_seconds]
+    if job_id is not None:
+        query += " AND id = %s"
+        params.append(job_id)
+    cursor.execute(query, tuple(params))
+
+def insert_job(conn: MySQLConnection, job: Dict, stale_seconds: float) -> Optional[Dict]:
+    """Record a new queued job unless one with the same job_key is still active.
+
+    Returns None when the job was recorded, otherwise the active job's row
+    (the caller joins that run instead).
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        _fail_stale_jobs(cursor, stale_seconds)
+        conn.commit()  # kept even if the insert below is refused
+        cursor.execute(
+            """
+            INSERT INTO background_jobs (id, kind, job_key, params, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (job["id"], job["kind"], job["job_key"], job["params"], job["status"], job["created_at"])
+        )
+        conn.commit()
+        return None
+    except mysql.connector.Error as e:
+        conn.rollback()
+        if e.errno != errorcode.ER_DUP_ENTRY:
+            raise e
+        cursor.execute("SELECT * FROM background_jobs WHERE active_key = %s", (job["job_key"],))
+        existing = cursor.fetchone()
+        conn.commit()
+        if existing is None:  # finished in between; start a new run
+            return insert_job(conn, job, stale_seconds)
+        return existing
+    finally:
+        cursor.close()
+
+def get_job(conn: MySQLConnection, job_id: str, stale_seconds: float) -> Optional[Dict]:
+    cursor = conn.cursor(dictionary=True)
+    _fail_stale_jobs(cursor, stale_seconds, job_id)
+    cursor.execute("SELECT * FROM background_jobs WHERE id = %s", (job_id,))
+    job = cursor.fetchone()
+    conn.commit()
+    cursor.close()
+    return job
+
+def update_job(conn: MySQLConnection, job_id: str, fields: Dict) -> None:
+    """Write a job's current state and refresh its heartbeat."""
+    assignments = ", ".join(f"{column} = %s" for column in fields)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"UPDATE background_jobs SET {assignments}, heartbeat_at = NOW(6) WHERE id = %s",
+        (*fields.values(), job_id)
+    )
+    conn.commit()
+    cursor.close()
+
+def delete_finished_jobs(conn: MySQLConnection, older_than_seconds: float) -> int:
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE FROM background_jobs WHERE active_key IS NULL AND finished_at < NOW(6) - INTERVAL %s SECOND",
+        (older_than_seconds,)
+    )
+    deleted = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return deleted
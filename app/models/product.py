@@ -1,5 +1,20 @@
+import time
+from decimal import Decimal
 from mysql.connector import MySQLConnection
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from ..core.cache import CatalogueCache
+from ..core.search import SearchIndex
+from ..core.config import settings
+from .cache_version import get_cache_version, bump_cache_version
+
+# Catalogue attributes of products by SKU and barcode. Stock (and updated_at,
+# which moves with it) is never cached; it is read live by primary key.
+catalogue_cache = CatalogueCache(
+    max_size=settings.CATALOGUE_CACHE_MAX_SIZE,
+    check_interval=settings.CATALOGUE_CACHE_CHECK_SECONDS
+)
+CATALOGUE_VERSION_KEY = "products"
+STOCK_FIELDS = ("quantity_in_stock", "updated_at")
 
 # -------------------- CATEGORIES --------------------
 def create_category(conn: MySQLConnection, name: str, description: str = None) -> int:
@@ -82,8 +97,10 @@ def create_product(conn: MySQLConnection, product_data: Dict) -> str:
         product_data.get("reorder_threshold", 5),
         product_data.get("is_active", True)
     ))
+    version = _bump_catalogue_version(cursor)
     conn.commit()
     cursor.close()
+    _catalogue_written(conn, [product_data["sku"]], version)
     return product_data["sku"]
 
 def get_product_by_sku(conn: MySQLConnection, sku: str) -> Optional[Dict]:
@@ -102,6 +119,26 @@ def get_product_by_sku(conn: MySQLConnection, sku: str) -> Optional[Dict]:
     cursor.close()
     return product
 
+def get_product_stock(conn: MySQLConnection, sku: str) -> Optional[Dict]:
+    """Live stock fields of one product (primary-key lookup)."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT quantity_in_stock, updated_at FROM products WHERE sku = %s", (sku,))
+    result = cursor.fetchone()
+    cursor.close()
+    return result
+
+def get_products_by_skus(conn: MySQLConnection, skus: List[str]) -> Dict[str, Dict]:
+    """Fetch sku/is_active/stock for many SKUs in one query, keyed by SKU."""
+    if not skus:
+        return {}
+    cursor = conn.cursor(dictionary=True)
+    placeholders = ", ".join(["%s"] * len(skus))
+    query = f"SELECT sku, is_active, quantity_in_stock FROM products WHERE sku IN ({placeholders})"
+    cursor.execute(query, tuple(skus))
+    products = {p["sku"]: p for p in cursor.fetchall()}
+    cursor.close()
+    return products
+
 def get_product_by_barcode(conn: MySQLConnection, barcode: str) -> Optional[Dict]:
     cursor = conn.cursor(dictionary=True)
     query = "SELECT * FROM products WHERE barcode = %s"
@@ -110,12 +147,335 @@ def get_product_by_barcode(conn: MySQLConnection, barcode: str) -> Optional[Dict
     cursor.close()
     return product
 
+# -------------------- PRODUCT CATALOGUE CACHE --------------------
+def get_catalogue_version(conn: MySQLConnection) -> int:
+    return get_cache_version(conn, CATALOGUE_VERSION_KEY)
+
+def _bump_catalogue_version(cursor) -> int:
+    # Runs inside the writer's transaction so other workers see the new
+    # version no earlier than the data it describes
+    return bump_cache_version(cursor, CATALOGUE_VERSION_KEY)
+
+def _catalogue_written(conn: MySQLConnection, skus: List[str], version: int) -> None:
+    """After a committed product write: drop cached rows, update the search index."""
+    catalogue_cache.written(skus, version)
+    if search_index.built:
+        search_index.apply(_search_records(conn, skus), [], version)
+
+def _load_catalogue(conn: MySQLConnection, column: str, value: str) -> Optional[Dict]:
+    version = catalogue_cache.version
+    cursor = conn.cursor(dictionary=True)
+    query = f"""
+        SELECT p.*,
+               c.name as category_name,
+               s.name as supplier_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN suppliers s ON p.supplier_id = s.id
+        WHERE p.{column} = %s
+    """
+    cursor.execute(query, (value,))
+    product = cursor.fetchone()
+    cursor.close()
+    if product is None:
+        return None
+    for field in STOCK_FIELDS:
+        product.pop(field, None)
+    catalogue_cache.put(product, version)
+    return product
+
+def get_cached_product(conn: MySQLConnection, sku: str) -> Optional[Dict]:
+    """Catalogue fields of a product by SKU, without stock; served from cache when possible."""
+    catalogue_cache.sync(lambda: get_catalogue_version(conn))
+    product = catalogue_cache.get(sku)
+    if product is None:
+        product = _load_catalogue(conn, "sku", sku)
+    return product
+
+def get_cached_product_by_barcode(conn: MySQLConnection, barcode: str) -> Optional[Dict]:
+    """Catalogue fields of a product by barcode, without stock; served from cache when possible."""
+    catalogue_cache.sync(lambda: get_catalogue_version(conn))
+    product = catalogue_cache.get_by_barcode(barcode)
+    if product is None:
+        product = _load_catalogue(conn, "barcode", barcode)
+    return product
+
+def warm_catalogue_cache(conn: MySQLConnection, limit: int) -> int:
+    """Preload up to `limit` active products, most recently updated first."""
+    catalogue_cache.sync(lambda: get_catalogue_version(conn))
+    version = catalogue_cache.version
+    cursor = conn.cursor(dictionary=True)
+    query = """
+        SELECT p.*,
+               c.name as category_name,
+               s.name as supplier_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN suppliers s ON p.supplier_id = s.id
+        WHERE p.is_active = TRUE
+        ORDER BY p.updated_at DESC
+        LIMIT %s
+    """
+    cursor.execute(query, (limit,))
+    loaded = 0
+    for product in cursor:
+        for field in STOCK_FIELDS:
+            product.pop(field, None)
+        catalogue_cache.put(product, version)
+        loaded += 1
+    cursor.close()
+    return loaded
+
+# -------------------- PRODUCT SEARCH --------------------
+# Text and catalogue filters run in memory; stock is filtered and read live
+search_index = SearchIndex(key="sku", fields=("sku", "barcode", "name"), exact_fields=("sku", "barcode"))
+_search_checked_at = float("-inf")
+_search_synced_at = None  # database time the index last caught up with sku_change_log
+SEARCH_STOCK_BATCH = 500
+SEARCH_CHANGE_LOG_OVERLAP_SECONDS = 5  # covers writes still committing at the previous sync
+SEARCH_CATCH_UP_MAX_SECONDS = 86400    # sku_change_log keeps two days (see replenishment)
+
+def _search_records(conn: MySQLConnection, skus: Optional[List[str]] = None) -> List[Dict]:
+    cursor = conn.cursor(dictionary=True)
+    query = "SELECT sku, barcode, name, category_id, supplier_id, selling_price, is_active FROM products"
+    params: Tuple = ()
+    if skus is not None:
+        query += f" WHERE sku IN ({', '.join(['%s'] * len(skus))})"
+        params = tuple(skus)
+    cursor.execute(query, params)
+    records = cursor.fetchall()
+    cursor.close()
+    return records
+
+def _database_now(conn: MySQLConnection):
+    cursor = conn.cursor()
+    cursor.execute("SELECT NOW(6)")
+    now = cursor.fetchone()[0]
+    cursor.close()
+    return now
+
+def rebuild_search_index(conn: MySQLConnection) -> int:
+    """Load every product into the search index; returns the number indexed."""
+    global _search_synced_at
+    synced_at = _database_now(conn)  # taken first: writes during the load are re-read later
+    version = get_catalogue_version(conn)
+    count = search_index.rebuild(_search_records(conn), version)
+    _search_synced_at = synced_at
+    return count
+
+def catch_up_search_index(conn: MySQLConnection) -> Dict:
+    """Bring the index up to date with catalogue writes made by other workers.
+
+    Re-reads only the SKUs logged in sku_change_log since the last sync, so
+    the cost follows write activity rather than catalogue size. Falls back
+    to a full rebuild if the index is older than the log is kept.
+    """
+    global _search_synced_at
+    synced_at = _database_now(conn)
+    previous = _search_synced_at
+    if previous is None or (synced_at - previous).total_seconds() > SEARCH_CATCH_UP_MAX_SECONDS:
+        return {"mode": "full", "products": rebuild_search_index(conn)}
+    version = get_catalogue_version(conn)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT product_sku FROM sku_change_log WHERE changed_at >= %s - INTERVAL %s SECOND",
+        (previous, SEARCH_CHANGE_LOG_OVERLAP_SECONDS)
+    )
+    skus = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    records = []
+    for start in range(0, len(skus), SEARCH_STOCK_BATCH):
+        records.extend(_search_records(conn, skus[start:start + SEARCH_STOCK_BATCH]))
+    search_index.refresh(records, version)
+    _search_synced_at = synced_at
+    return {"mode": "incremental", "products": len(records)}
+
+def search_index_is_stale(conn: MySQLConnection) -> bool:
+    """Whether another worker changed the catalogue since the index was built
+    (checked against the shared version at most every CATALOGUE_CACHE_CHECK_SECONDS)."""
+    global _search_checked_at
+    now = time.monotonic()
+    if now - _search_checked_at < settings.CATALOGUE_CACHE_CHECK_SECONDS:
+        return False
+    _search_checked_at = now
+    return get_catalogue_version(conn) != search_index.version
+
+def _get_products_for_search(
+    conn: MySQLConnection,
+    skus: List[str],
+    min_stock: Optional[int],
+    max_stock: Optional[int]
+) -> Dict[str, Dict]:
+    cursor = conn.cursor(dictionary=True)
+    query = f"""
+        SELECT p.*,
+               c.name as category_name,
+               s.name as supplier_name
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN suppliers s ON p.supplier_id = s.id
+        WHERE p.sku IN ({', '.join(['%s'] * len(skus))})
+    """
+    params = list(skus)
+    if min_stock is not None:
+        query += " AND p.quantity_in_stock >= %s"
+        params.append(min_stock)
+    if max_stock is not None:
+        query += " AND p.quantity_in_stock <= %s"
+        params.append(max_stock)
+    cursor.execute(query, tuple(params))
+    products = {p["sku"]: p for p in cursor.fetchall()}
+    cursor.close()
+    return products
+
+def search_products(
+    conn: MySQLConnection,
+    query: str,
+    category_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    min_stock: Optional[int] = None,
+    max_stock: Optional[int] = None,
+    active_only: bool = True,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Dict]:
+    """Ranked product search over SKU, barcode and name.
+
+    Matching (exact, prefix, substring, typo-tolerant) and the catalogue
+    filters use the in-memory index; rows, and the stock filters, come from
+    primary-key lookups of the ranked candidates only.
+    """
+    def matches(record: Dict) -> bool:
+        return (
+            (not active_only or record["is_active"])
+            and (category_id is None or record["category_id"] == category_id)
+            and (supplier_id is None or record["supplier_id"] == supplier_id)
+            and (min_price is None or record["selling_price"] >= min_price)
+            and (max_price is None or record["selling_price"] <= max_price)
+        )
+
+    wanted = offset + limit
+    if min_stock is None and max_stock is None:
+        hits = search_index.search(query, matches, limit=wanted)[offset:]
+        batches = [hits]
+    else:
+        # Stock is only known to the database; walk the ranking in batches
+        hits = search_index.search(query, matches)
+        batches = [hits[i:i + SEARCH_STOCK_BATCH] for i in range(0, len(hits), SEARCH_STOCK_BATCH)]
+
+    results: List[Dict] = []
+    skipped = 0 if min_stock is None and max_stock is None else offset
+    for batch in batches:
+        if not batch:
+            continue
+        products = _get_products_for_search(conn, [r["sku"] for _, r in batch], min_stock, max_stock)
+        for score, record in batch:
+            product = products.get(record["sku"])
+            if product is None:
+                continue
+            if skipped:
+                skipped -= 1
+                continue
+            product["score"] = round(score, 2)
+            results.append(product)
+            if len(results) >= limit:
+                return results
+    return results
+
+def import_products(
+    conn: MySQLConnection,
+    rows: List[Tuple[int, Dict]],
+    upsert: bool = True
+) -> Tuple[int, int, List[Dict]]:
+    """Write a chunk of validated (row_number, product) pairs in one transaction.
+
+    SKU/barcode conflicts are checked with a single locking query and the
+    remaining rows are written with one multi-row INSERT ... ON DUPLICATE KEY
+    UPDATE. Existing products keep their stock level (stock only changes via
+    movements). Returns (inserted, updated, errors).
+    """
+    if not rows:
+        return 0, 0, []
+    skus = [p["sku"] for _, p in rows]
+    barcodes = [p["barcode"] for _, p in rows]
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        sku_ph = ", ".join(["%s"] * len(skus))
+        barcode_ph = ", ".join(["%s"] * len(barcodes))
+        cursor.execute(
+            f"SELECT sku, barcode FROM products WHERE sku IN ({sku_ph}) OR barcode IN ({barcode_ph}) FOR UPDATE",
+            (*skus, *barcodes)
+        )
+        existing_skus = set()
+        barcode_owner = {}
+        for sku, barcode in cursor.fetchall():
+            existing_skus.add(sku)
+            barcode_owner[barcode] = sku
+
+        errors, values = [], []
+        inserted = updated = 0
+        for row_number, p in rows:
+            owner = barcode_owner.get(p["barcode"])
+            if owner is not None and owner != p["sku"]:
+                errors.append({"row": row_number, "sku": p["sku"],
+                               "error": f"Barcode already in use by product '{owner}'"})
+                continue
+            if p["sku"] in existing_skus:
+                if not upsert:
+                    errors.append({"row": row_number, "sku": p["sku"], "error": "SKU already exists"})
+                    continue
+                updated += 1
+            else:
+                inserted += 1
+            values.extend((
+                p["sku"], p["barcode"], p["name"], p.get("category_id"), p.get("supplier_id"),
+                p["cost_price"], p["selling_price"], p.get("quantity_in_stock", 0),
+                p.get("reorder_threshold", 5), p.get("is_active", True)
+            ))
+
+        if values:
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * (len(values) // 10))
+            query = f"""
+                INSERT INTO products (sku, barcode, name, category_id, supplier_id,
+                                      cost_price, selling_price, quantity_in_stock, reorder_threshold, is_active)
+                VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE
+                    barcode = VALUES(barcode),
+                    name = VALUES(name),
+                    category_id = VALUES(category_id),
+                    supplier_id = VALUES(supplier_id),
+                    cost_price = VALUES(cost_price),
+                    selling_price = VALUES(selling_price),
+                    reorder_threshold = VALUES(reorder_threshold),
+                    is_active = VALUES(is_active)
+            """
+            cursor.execute(query, tuple(values))
+            version = _bump_catalogue_version(cursor)
+        conn.commit()
+        if values:
+            _catalogue_written(conn, skus, version)
+        return inserted, updated, errors
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
 def get_all_products(
     conn: MySQLConnection, 
     skip: int = 0, 
     limit: int = 100,
-    active_only: bool = True
+    active_only: bool = True,
+    after: Optional[List] = None
 ) -> List[Dict]:
+    """List products by name.
+
+    `after` holds the (name, sku) of the last row already seen; when given,
+    keyset pagination is used and `skip` is ignored.
+    """
     cursor = conn.cursor(dictionary=True)
     query = """
         SELECT p.*, 
@@ -130,7 +490,11 @@ def get_all_products(
     if active_only:
         query += " AND p.is_active = %s"
         params.append(True)
-    query += " ORDER BY p.name LIMIT %s OFFSET %s"
+    if after:
+        query += " AND (p.name > %s OR (p.name = %s AND p.sku > %s))"
+        params.extend([after[0], after[0], after[1]])
+        skip = 0
+    query += " ORDER BY p.name, p.sku LIMIT %s OFFSET %s"
     params.extend([limit, skip])
     cursor.execute(query, tuple(params))
     products = cursor.fetchall()
@@ -151,9 +515,12 @@ def update_product(conn: MySQLConnection, sku: str, update_data: Dict) -> bool:
     values.append(sku)
     query = f"UPDATE products SET {', '.join(fields)} WHERE sku = %s"
     cursor.execute(query, tuple(values))
-    conn.commit()
     affected = cursor.rowcount
+    version = _bump_catalogue_version(cursor) if affected else None
+    conn.commit()
     cursor.close()
+    if version is not None:
+        _catalogue_written(conn, [sku], version)
     return affected > 0
 
 def delete_product(conn: MySQLConnection, sku: str) -> bool:
@@ -161,7 +528,10 @@ def delete_product(conn: MySQLConnection, sku: str) -> bool:
     cursor = conn.cursor()
     query = "UPDATE products SET is_active = FALSE WHERE sku = %s"
     cursor.execute(query, (sku,))
-    conn.commit()
     affected = cursor.rowcount
+    version = _bump_catalogue_version(cursor) if affected else None
+    conn.commit()
     cursor.close()
+    if version is not None:
+        _catalogue_written(conn, [sku], version)
     return affected > 0
\ No newline at end of file
@@ -0,0 +1,95 @@
+import threading
+import time
+from mysql.connector import MySQLConnection
+from typing import Dict, List, Optional
+from ..core.config import settings
+from .cache_version import get_cache_version, bump_cache_version
+
+REFERENCE_VERSION_KEY = "reference_data"
+
+
+class ReferenceData:
+    """In-memory copy of the seeded lookup tables (movement_types, roles).
+
+    Loaded on first use (or at startup) and swapped atomically on reload.
+    Lookups cost no queries; other workers pick up a reload when the shared
+    version changes, checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._movement_types: Dict[str, Dict] = {}
+        self._roles: Dict[str, Dict] = {}
+        self._checked_at = float("-inf")
+        self.version: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+
+    def load(self, conn: MySQLConnection) -> None:
+        """Re-read both tables and replace the in-memory copy."""
+        version = get_cache_version(conn, REFERENCE_VERSION_KEY)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT id, name, description, sign FROM movement_types ORDER BY name")
+        movement_types = {row["name"]: row for row in cursor.fetchall()}
+        cursor.execute("SELECT id, name, description FROM roles ORDER BY name")
+        roles = {row["name"].lower(): row for row in cursor.fetchall()}
+        cursor.close()
+        with self._lock:
+            self._movement_types = movement_types
+            self._roles = roles
+            self.version = version
+            self._checked_at = time.monotonic()
+            self.loaded_at = time.time()
+            self.reloads += 1
+
+    def _refresh(self, conn: MySQLConnection) -> None:
+        if self.version is None:
+            self.load(conn)
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = get_cache_version(conn, REFERENCE_VERSION_KEY)
+        with self._lock:
+            self._checked_at = now
+            changed = version != self.version
+        if changed:
+            self.load(conn)
+
+    def movement_type(self, conn: MySQLConnection, name: str) -> Optional[Dict]:
+        self._refresh(conn)
+        row = self._movement_types.get(name)
+        return dict(row) if row else None
+
+    def movement_types(self, conn: MySQLConnection) -> List[Dict]:
+        self._refresh(conn)
+        return [dict(row) for row in self._movement_types.values()]
+
+    def role(self, conn: MySQLConnection, name: str) -> Optional[Dict]:
+        self._refresh(conn)
+        row = self._roles.get(name.strip().lower())
+        return dict(row) if row else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "loaded_at": self.loaded_at,
+                "reloads": self.reloads,
+                "check_interval_seconds": self.check_interval,
+                "movement_types": sorted(self._movement_types),
+                "roles": sorted(self._roles),
+            }
+
+
+reference_data = ReferenceData(check_interval=settings.REFERENCE_DATA_CHECK_SECONDS)
+
+def reload_reference_data(conn: MySQLConnection) -> Dict:
+    """Reload this worker's copy and bump the version so other workers follow."""
+    cursor = conn.cursor()
+    bump_cache_version(cursor, REFERENCE_VERSION_KEY)
+    conn.commit()
+    cursor.close()
+    reference_data.load(conn)
+    return reference_data.stats()
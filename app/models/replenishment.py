@@ -1,6 +1,30 @@
+import threading
+import numpy as np
+from contextlib import contextmanager
 from mysql.connector import MySQLConnection
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Callable, List, Dict, Optional, Tuple
+from datetime import date, datetime
+from ..core.database import begin_transaction
+from .product import get_products_by_skus
+
+GENERATION_LOCK = "smart_inventory_replenishment"
+
+@contextmanager
+def _generation_lock(conn: MySQLConnection, timeout: int = 60):
+    """Serialise generation runs (every engine) across workers with a MySQL named lock."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (GENERATION_LOCK, timeout))
+    acquired = cursor.fetchone()[0] == 1
+    cursor.close()
+    if not acquired:
+        raise RuntimeError("Another replenishment run is in progress")
+    try:
+        yield
+    finally:
+        cursor = conn.cursor()
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (GENERATION_LOCK,))
+        cursor.fetchall()
+        cursor.close()
 
 def generate_suggestions(
     conn: MySQLConnection,
@@ -9,21 +33,261 @@ def generate_suggestions(
     safety_stock_factor: float = 1.5
 ) -> None:
     """Call the stored procedure to generate replenishment suggestions."""
+    with _generation_lock(conn):
+        cursor = conn.cursor()
+        cursor.callproc(
+            "GenerateReplenishmentSuggestions",
+            (lookback_days, forecast_days, safety_stock_factor)
+        )
+        conn.commit()
+        cursor.close()
+
+# -------------------- PYTHON ENGINE --------------------
+def load_demand_history(
+    conn: MySQLConnection,
+    lookback_days: int,
+    only_skus: Optional[List[str]] = None
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Bulk-load active SKUs, their stock and a (sku x day) matrix of units sold.
+
+    Column d holds sales from d+1 days ago; only full days are counted.
+    `only_skus` restricts both queries to the given SKUs.
+    """
+    sku_filter, sku_params = "", ()
+    if only_skus is not None:
+        if not only_skus:
+            return [], np.zeros(0, dtype=np.int64), np.zeros((0, lookback_days), dtype=np.float64)
+        sku_filter = f" AND {{col}} IN ({', '.join(['%s'] * len(only_skus))})"
+        sku_params = tuple(only_skus)
+
     cursor = conn.cursor()
-    cursor.callproc(
-        "GenerateReplenishmentSuggestions",
-        (lookback_days, forecast_days, safety_stock_factor)
+    cursor.execute(
+        "SELECT sku, quantity_in_stock FROM products WHERE is_active = TRUE"
+        + sku_filter.format(col="sku") + " ORDER BY sku",
+        sku_params
     )
-    conn.commit()
+    products = cursor.fetchall()
+    skus = [row[0] for row in products]
+    stock = np.fromiter((row[1] for row in products), dtype=np.int64, count=len(products))
+    history = np.zeros((len(skus), lookback_days), dtype=np.float64)
+
+    cursor.execute("""
+        SELECT sm.product_sku, DATEDIFF(CURDATE(), DATE(sm.created_at)) AS age, SUM(sm.quantity)
+        FROM stock_movements sm
+        JOIN movement_types mt ON sm.movement_type_id = mt.id
+        WHERE mt.name = 'sale'
+          AND sm.created_at >= CURDATE() - INTERVAL %s DAY
+          AND sm.created_at < CURDATE()
+    """ + sku_filter.format(col="sm.product_sku") + """
+        GROUP BY sm.product_sku, age
+    """, (lookback_days, *sku_params))
+    rows = cursor.fetchall()
     cursor.close()
 
+    if rows:
+        index = {sku: i for i, sku in enumerate(skus)}
+        positions = np.fromiter((index.get(r[0], -1) for r in rows), dtype=np.int64, count=len(rows))
+        ages = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        quantities = np.fromiter((float(r[2]) for r in rows), dtype=np.float64, count=len(rows))
+        known = (positions >= 0) & (ages >= 1) & (ages <= lookback_days)  # skip inactive SKUs
+        np.add.at(history, (positions[known], ages[known] - 1), quantities[known])
+    return skus, stock, history
+
+def compute_suggestions(
+    current_stock: np.ndarray,
+    daily_sales: np.ndarray,
+    forecast_days: int,
+    safety_stock_factor: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Forecast demand and order quantities for every SKU at once.
+
+    Forecast = mean daily demand x forecast_days. Safety stock is
+    `safety_stock_factor` standard deviations of demand over the forecast
+    horizon. Returns integer arrays (forecasted_demand, suggested_quantity).
+    """
+    mean = daily_sales.mean(axis=1)
+    std = daily_sales.std(axis=1)
+    forecast = mean * forecast_days
+    safety_stock = safety_stock_factor * std * np.sqrt(forecast_days)
+    suggested = np.maximum(0, np.ceil(forecast + safety_stock - current_stock))
+    return np.rint(forecast).astype(np.int64), suggested.astype(np.int64)
+
+def _suggestion_rows(skus: List[str], stock: np.ndarray, forecast: np.ndarray, suggested: np.ndarray) -> List[Tuple]:
+    return [
+        (skus[i], int(forecast[i]), int(stock[i]), int(suggested[i]))
+        for i in np.flatnonzero(suggested > 0)
+    ]
+
+def _write_suggestions(
+    conn: MySQLConnection,
+    rows: List[Tuple],
+    replace_skus: Optional[List[str]],
+    batch_size: int,
+    report: Callable[[float, str], None]
+) -> None:
+    """Replace today's pending suggestions (all, or only `replace_skus`) with `rows`."""
+    cursor = conn.cursor()
+    try:
+        begin_transaction(conn)  # the history reads above left one open
+        query = "DELETE FROM replenishment_suggestions WHERE date_generated = CURDATE() AND is_acted_upon = FALSE"
+        if replace_skus is None:
+            cursor.execute(query)
+        else:
+            for start in range(0, len(replace_skus), batch_size):
+                chunk = replace_skus[start:start + batch_size]
+                cursor.execute(query + f" AND product_sku IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+        query = """
+            INSERT INTO replenishment_suggestions
+                (product_sku, date_generated, forecasted_demand, current_stock, suggested_quantity, is_acted_upon)
+            VALUES (%s, CURDATE(), %s, %s, %s, FALSE)
+        """
+        report(0.5, "writing suggestions")
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(query, rows[start:start + batch_size])
+            report(0.5 + 0.5 * (start + batch_size) / len(rows), "writing suggestions")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
+def generate_suggestions_python(
+    conn: MySQLConnection,
+    lookback_days: int = 30,
+    forecast_days: int = 7,
+    safety_stock_factor: float = 1.5,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[float, str], None]] = None
+) -> int:
+    """In-app alternative to GenerateReplenishmentSuggestions.
+
+    Replaces today's pending suggestions with one row per SKU that needs
+    reordering. Returns the number of suggestions written. `progress`, if
+    given, is called with (fraction_done, stage).
+    """
+    report = progress or (lambda fraction, stage: None)
+    with _generation_lock(conn):
+        report(0.0, "loading sales history")
+        skus, stock, history = load_demand_history(conn, lookback_days)
+        report(0.4, "computing forecasts")
+        forecast, suggested = compute_suggestions(stock, history, forecast_days, safety_stock_factor)
+        rows = _suggestion_rows(skus, stock, forecast, suggested)
+        _write_suggestions(conn, rows, None, batch_size, report)
+    return len(rows)
+
+# -------------------- INCREMENTAL ENGINE --------------------
+# Changes are re-read with this much overlap so rows logged by transactions
+# that committed after the previous run started are not missed.
+CHANGE_LOG_OVERLAP_SECONDS = 5
+
+class DemandState:
+    """Per-SKU daily demand kept in memory between incremental runs.
+
+    History only covers full days, so it is valid for the whole of `as_of`;
+    within that day only stock levels (and new SKUs) need refreshing.
+    """
+
+    def __init__(self, as_of: date, lookback_days: int, skus: List[str],
+                 stock: np.ndarray, history: np.ndarray, watermark: datetime):
+        self.as_of = as_of
+        self.lookback_days = lookback_days
+        self.skus = skus
+        self.index = {sku: i for i, sku in enumerate(skus)}
+        self.stock = stock
+        self.history = history
+        self.watermark = watermark
+
+    def extend(self, skus: List[str], stock: np.ndarray, history: np.ndarray) -> None:
+        for sku in skus:
+            self.index[sku] = len(self.skus)
+            self.skus.append(sku)
+        self.stock = np.concatenate([self.stock, stock])
+        self.history = np.vstack([self.history, history])
+
+_demand_state: Optional[DemandState] = None
+_demand_lock = threading.Lock()
+
+def generate_suggestions_incremental(
+    conn: MySQLConnection,
+    lookback_days: int = 30,
+    forecast_days: int = 7,
+    safety_stock_factor: float = 1.5,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[float, str], None]] = None
+) -> Dict:
+    """Recompute suggestions only for SKUs in sku_change_log since the last run.
+
+    The first run in a process (or on a new day, or with a different
+    lookback) rebuilds the in-memory demand history from scratch; later runs
+    refresh stock for the changed SKUs and reuse the cached history, so their
+    cost follows activity rather than catalogue size.
+    """
+    global _demand_state
+    report = progress or (lambda fraction, stage: None)
+    with _demand_lock, _generation_lock(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT CURDATE(), NOW(6)")
+        today, started_at = cursor.fetchone()
+        state = _demand_state
+
+        if state is None or state.as_of != today or state.lookback_days != lookback_days:
+            report(0.0, "rebuilding demand history")
+            skus, stock, history = load_demand_history(conn, lookback_days)
+            report(0.4, "computing forecasts")
+            forecast, suggested = compute_suggestions(stock, history, forecast_days, safety_stock_factor)
+            rows = _suggestion_rows(skus, stock, forecast, suggested)
+            _write_suggestions(conn, rows, None, batch_size, report)
+            cursor.execute("DELETE FROM sku_change_log WHERE changed_at < %s - INTERVAL 2 DAY", (started_at,))
+            conn.commit()
+            cursor.close()
+            _demand_state = DemandState(today, lookback_days, skus, stock, history, started_at)
+            return {"mode": "full", "skus_recomputed": len(skus), "suggestions": len(rows)}
+
+        report(0.0, "reading change log")
+        cursor.execute(
+            "SELECT product_sku FROM sku_change_log WHERE changed_at >= %s - INTERVAL %s SECOND",
+            (state.watermark, CHANGE_LOG_OVERLAP_SECONDS)
+        )
+        changed = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        if not changed:
+            state.watermark = started_at
+            return {"mode": "incremental", "skus_recomputed": 0, "suggestions": 0}
+
+        report(0.2, "refreshing changed SKUs")
+        products = get_products_by_skus(conn, changed)
+        active = [sku for sku in changed if sku in products and products[sku]["is_active"]]
+        new_skus = [sku for sku in active if sku not in state.index]
+        if new_skus:
+            loaded, new_stock, new_history = load_demand_history(conn, lookback_days, only_skus=new_skus)
+            state.extend(loaded, new_stock, new_history)
+        active = [sku for sku in active if sku in state.index]
+        positions = np.fromiter((state.index[sku] for sku in active), dtype=np.int64, count=len(active))
+        state.stock[positions] = [products[sku]["quantity_in_stock"] for sku in active]
+
+        report(0.4, "computing forecasts")
+        forecast, suggested = compute_suggestions(
+            state.stock[positions], state.history[positions], forecast_days, safety_stock_factor
+        )
+        rows = _suggestion_rows(active, state.stock[positions], forecast, suggested)
+        # Every changed SKU loses its old pending row; inactive ones get none back
+        _write_suggestions(conn, rows, changed, batch_size, report)
+        state.watermark = started_at
+        return {"mode": "incremental", "skus_recomputed": len(active), "suggestions": len(rows)}
+
 def get_suggestions(
     conn: MySQLConnection,
     active_only: bool = True,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[List] = None
 ) -> List[Dict]:
-    """Fetch replenishment suggestions with product details."""
+    """Fetch replenishment suggestions with product details.
+
+    `after` holds the (date_generated, suggested_quantity, id) of the last row
+    already seen; when given, keyset pagination is used and `offset` is ignored.
+    """
     cursor = conn.cursor(dictionary=True)
     query = """
         SELECT 
@@ -37,7 +301,15 @@ def get_suggestions(
     params = []
     if active_only:
         query += " AND rs.is_acted_upon = FALSE"
-    query += " ORDER BY rs.date_generated DESC, rs.suggested_quantity DESC LIMIT %s OFFSET %s"
+    if after:
+        query += """
+            AND (rs.date_generated < %s
+                 OR (rs.date_generated = %s AND rs.suggested_quantity < %s)
+                 OR (rs.date_generated = %s AND rs.suggested_quantity = %s AND rs.id < %s))
+        """
+        params.extend([after[0], after[0], after[1], after[0], after[1], after[2]])
+        offset = 0
+    query += " ORDER BY rs.date_generated DESC, rs.suggested_quantity DESC, rs.id DESC LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     cursor.execute(query, tuple(params))
     results = cursor.fetchall()
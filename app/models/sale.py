@@ -1,7 +1,10 @@
-from mysql.connector import MySQLConnection
-from typing import List, Dict, Optional
-from datetime import datetime
+import mysql.connector
+from mysql.connector import MySQLConnection, errorcode
+from typing import List, Dict, Iterator, Optional
+from datetime import date, datetime
 import json
+from ..core.database import begin_transaction
+from .sales_rollup import get_daily_rollup
 
 def create_sale(
     conn: MySQLConnection,
@@ -30,6 +33,98 @@ def create_sale(
     cursor.close()
     return transaction_id
 
+# A deadlock rolls back the whole transaction (savepoints included); so does a
+# lock wait timeout under innodb_rollback_on_timeout. Either ends the group.
+GROUP_ABORT_ERRNOS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+GROUP_DEADLOCK_ATTEMPTS = 3
+
+def create_sales_batch(
+    conn: MySQLConnection,
+    user_id: int,
+    sales: List[Dict],
+    group_size: int = 50
+) -> Dict[str, Dict]:
+    """Insert many sales, committing every `group_size` sales.
+
+    Does what ProcessSale does (header row, then line items; the triggers
+    check stock, log movements and total the sale) but without the
+    procedure's own COMMIT, so sales can share a transaction. Each sale runs
+    under a savepoint: a failing sale is rolled back alone and the rest of
+    its group still commits. A deadlock rolls the group back and it is
+    retried from its start; a group that still deadlocks, or hits a lock
+    wait timeout, is reported as failed and the batch goes on. Returns
+    transaction_number -> result.
+    """
+    results: Dict[str, Dict] = {}
+    cursor = conn.cursor()
+    header_query = """
+        INSERT INTO sale_transactions (transaction_number, user_id, transaction_date, total_amount)
+        VALUES (%s, %s, %s, 0)
+    """
+    item_query = """
+        INSERT INTO sale_line_items (transaction_id, product_sku, quantity, unit_price, line_total)
+        VALUES (%s, %s, %s, %s, 0)
+    """
+    try:
+        for start in range(0, len(sales), group_size):
+            group = sales[start:start + group_size]
+            for attempt in range(1, GROUP_DEADLOCK_ATTEMPTS + 1):
+                group_results: Dict[str, Dict] = {}
+                try:
+                    begin_transaction(conn)
+                    for sale in group:
+                        number = sale["transaction_number"]
+                        cursor.execute("SAVEPOINT batch_sale")
+                        try:
+                            cursor.execute(header_query, (number, user_id, sale["transaction_date"]))
+                            transaction_id = cursor.lastrowid
+                            cursor.executemany(item_query, [
+                                (transaction_id, item["sku"], item["quantity"], item["unit_price"])
+                                for item in sale["items"]
+                            ])
+                            cursor.execute("RELEASE SAVEPOINT batch_sale")
+                            group_results[number] = {"status": "created", "transaction_id": transaction_id,
+                                                     "error": None}
+                        except mysql.connector.Error as e:
+                            if e.errno in GROUP_ABORT_ERRNOS:
+                                raise e  # the savepoint may be gone with the transaction
+                            cursor.execute("ROLLBACK TO SAVEPOINT batch_sale")
+                            status = "duplicate" if e.errno == errorcode.ER_DUP_ENTRY else "failed"
+                            group_results[number] = {"status": status, "transaction_id": None, "error": e.msg}
+                    conn.commit()
+                except mysql.connector.Error as e:
+                    if e.errno not in GROUP_ABORT_ERRNOS:
+                        raise e
+                    conn.rollback()
+                    if e.errno == errorcode.ER_LOCK_DEADLOCK and attempt < GROUP_DEADLOCK_ATTEMPTS:
+                        continue
+                    group_results = {
+                        sale["transaction_number"]: {"status": "failed", "transaction_id": None, "error": e.msg}
+                        for sale in group
+                    }
+                results.update(group_results)
+                break
+        return results
+    except Exception as e:
+        # Earlier groups stay committed; replaying the batch is safe because
+        # transaction numbers already stored are reported as duplicates.
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
+def get_transaction_ids_by_number(conn: MySQLConnection, transaction_numbers: List[str]) -> Dict[str, int]:
+    """Map already-recorded transaction numbers to their ids (one query)."""
+    if not transaction_numbers:
+        return {}
+    cursor = conn.cursor()
+    placeholders = ", ".join(["%s"] * len(transaction_numbers))
+    query = f"SELECT transaction_number, id FROM sale_transactions WHERE transaction_number IN ({placeholders})"
+    cursor.execute(query, tuple(transaction_numbers))
+    result = dict(cursor.fetchall())
+    cursor.close()
+    return result
+
 def get_transaction_by_id(conn: MySQLConnection, transaction_id: int) -> Optional[Dict]:
     cursor = conn.cursor(dictionary=True)
     query = """
@@ -60,13 +155,41 @@ def get_transaction_items(conn: MySQLConnection, transaction_id: int) -> List[Di
     cursor.close()
     return items
 
+def get_items_for_transactions(conn: MySQLConnection, transaction_ids: List[int]) -> Dict[int, List[Dict]]:
+    """Fetch line items for many transactions in one query, grouped by transaction id."""
+    grouped: Dict[int, List[Dict]] = {tid: [] for tid in transaction_ids}
+    if not transaction_ids:
+        return grouped
+    cursor = conn.cursor(dictionary=True)
+    placeholders = ", ".join(["%s"] * len(transaction_ids))
+    query = f"""
+        SELECT 
+            sli.*,
+            p.name as product_name
+        FROM sale_line_items sli
+        JOIN products p ON sli.product_sku = p.sku
+        WHERE sli.transaction_id IN ({placeholders})
+        ORDER BY sli.transaction_id, sli.id
+    """
+    cursor.execute(query, tuple(transaction_ids))
+    for item in cursor.fetchall():
+        grouped[item["transaction_id"]].append(item)
+    cursor.close()
+    return grouped
+
 def get_transactions(
     conn: MySQLConnection,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[List] = None
 ) -> List[Dict]:
+    """List transactions newest first.
+
+    `after` holds the (transaction_date, id) of the last row already seen; when
+    given, keyset pagination is used and `offset` is ignored.
+    """
     cursor = conn.cursor(dictionary=True)
     query = """
         SELECT 
@@ -88,28 +211,69 @@ def get_transactions(
     if to_date:
         query += " AND st.transaction_date <= %s"
         params.append(to_date)
-    query += " ORDER BY st.transaction_date DESC LIMIT %s OFFSET %s"
+    if after:
+        query += " AND (st.transaction_date < %s OR (st.transaction_date = %s AND st.id < %s))"
+        params.extend([after[0], after[0], after[1]])
+        offset = 0
+    query += " ORDER BY st.transaction_date DESC, st.id DESC LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     cursor.execute(query, tuple(params))
     transactions = cursor.fetchall()
     cursor.close()
     return transactions
 
-def get_daily_summary(conn: MySQLConnection, date: datetime) -> Optional[Dict]:
-    cursor = conn.cursor(dictionary=True)
+def iter_sale_lines(
+    conn: MySQLConnection,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict]:
+    """Stream one row per sold line item from an unbuffered (server-side) cursor."""
+    cursor = conn.cursor(dictionary=True, buffered=False)
     query = """
         SELECT 
-            COUNT(DISTINCT id) as total_transactions,
-            COALESCE(SUM(total_amount), 0) as total_revenue,
-            COALESCE(SUM((
-                SELECT SUM(quantity) 
-                FROM sale_line_items 
-                WHERE transaction_id = st.id
-            )), 0) as total_items_sold
+            st.id as transaction_id,
+            st.transaction_number,
+            st.transaction_date,
+            u.username,
+            sli.product_sku,
+            p.name as product_name,
+            sli.quantity,
+            sli.unit_price,
+            sli.line_total
         FROM sale_transactions st
-        WHERE DATE(st.transaction_date) = DATE(%s)
+        JOIN sale_line_items sli ON sli.transaction_id = st.id
+        JOIN products p ON sli.product_sku = p.sku
+        JOIN users u ON st.user_id = u.id
+        WHERE 1=1
     """
-    cursor.execute(query, (date,))
-    summary = cursor.fetchone()
-    cursor.close()
-    return summary
\ No newline at end of file
+    params = []
+    if from_date:
+        query += " AND st.transaction_date >= %s"
+        params.append(from_date)
+    if to_date:
+        query += " AND st.transaction_date <= %s"
+        params.append(to_date)
+    query += " ORDER BY st.id, sli.id"
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        # A client that disconnects mid-download closes this generator with
+        # rows still unread; read them off so the cursor closes cleanly and
+        # the connection goes back to the pool
+        conn.consume_results()
+        cursor.close()
+
+def get_daily_summary(conn: MySQLConnection, date: datetime) -> Optional[Dict]:
+    """Day totals from the sales rollups (constant cost, see models/sales_rollup.py)."""
+    day = get_daily_rollup(conn, date)
+    return {
+        "total_transactions": day["transaction_count"],
+        "total_revenue": day["total_revenue"],
+        "total_items_sold": day["total_items_sold"],
+    }
\ No newline at end of file
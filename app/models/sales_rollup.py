@@ -0,0 +1,246 @@
+from mysql.connector import MySQLConnection
+from typing import Dict, List, Optional
+from datetime import date, timedelta
+from ..core.database import begin_transaction
+
+# Sales rollup tables are kept current by triggers on sale_transactions and
+# sale_line_items (see schema 3.7 / 4.6-4.7). Reads touch at most a handful of
+# rows per day, independent of how much sales history exists.
+
+def get_daily_rollup(conn: MySQLConnection, target_date: date) -> Dict:
+    """Totals for one day: transactions, items, revenue and distinct products."""
+    cursor = conn.cursor(dictionary=True)
+    query = """
+        SELECT
+            COALESCE(SUM(transaction_count), 0) AS transaction_count,
+            COALESCE(SUM(items_sold), 0) AS total_items_sold,
+            COALESCE(SUM(revenue), 0) AS total_revenue,
+            (SELECT COUNT(*) FROM sales_product_daily_rollup WHERE sales_date = %s) AS unique_products_sold
+        FROM sales_daily_rollup
+        WHERE sales_date = %s
+    """
+    cursor.execute(query, (target_date, target_date))
+    row = cursor.fetchone()
+    cursor.close()
+    return {
+        "transaction_date": target_date,
+        "transaction_count": int(row["transaction_count"]),
+        "unique_products_sold": int(row["unique_products_sold"]),
+        "total_items_sold": int(row["total_items_sold"]),
+        "total_revenue": row["total_revenue"],
+    }
+
+def get_hourly_rollup(conn: MySQLConnection, target_date: date) -> List[Dict]:
+    """Per-hour totals for one day (hours without sales are omitted)."""
+    cursor = conn.cursor(dictionary=True)
+    query = """
+        SELECT
+            sales_hour AS hour,
+            CAST(SUM(transaction_count) AS UNSIGNED) AS transaction_count,
+            CAST(SUM(items_sold) AS UNSIGNED) AS total_items_sold,
+            SUM(revenue) AS total_revenue
+        FROM sales_hourly_rollup
+        WHERE sales_date = %s
+        GROUP BY sales_hour
+        ORDER BY sales_hour
+    """
+    cursor.execute(query, (target_date,))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+# Bucket start for each granularity (weeks start on Monday), over rollup alias r
+BUCKET_EXPRESSIONS = {
+    "hour": "TIMESTAMP(r.sales_date, MAKETIME(r.sales_hour, 0, 0))",
+    "day": "r.sales_date",
+    "week": "DATE_SUB(r.sales_date, INTERVAL WEEKDAY(r.sales_date) DAY)",
+    "month": "DATE_SUB(r.sales_date, INTERVAL DAYOFMONTH(r.sales_date) - 1 DAY)",
+}
+GROUP_BY_OPTIONS = ("sku", "category")
+
+def get_sales_series(
+    conn: MySQLConnection,
+    from_date: date,
+    to_date: date,
+    granularity: str = "day",
+    group_by: Optional[str] = None,
+    top: int = 20
+) -> List[Dict]:
+    """Revenue/units/transaction time series over a date range, in one grouped query.
+
+    Ungrouped series read the daily (or hourly) rollup. Series grouped by
+    SKU or category read the per-product daily rollup and are limited to the
+    `top` groups by revenue over the range; there `transaction_count` counts
+    sale lines. Categories are the products' current ones.
+    """
+    bucket = BUCKET_EXPRESSIONS[granularity]
+    cursor = conn.cursor(dictionary=True)
+    if group_by is None:
+        table = "sales_hourly_rollup" if granularity == "hour" else "sales_daily_rollup"
+        query = f"""
+            SELECT
+                {bucket} AS bucket,
+                NULL AS group_key,
+                NULL AS group_name,
+                CAST(SUM(r.transaction_count) AS UNSIGNED) AS transaction_count,
+                CAST(SUM(r.items_sold) AS UNSIGNED) AS units_sold,
+                SUM(r.revenue) AS revenue
+            FROM {table} r
+            WHERE r.sales_date BETWEEN %s AND %s
+            GROUP BY bucket
+            ORDER BY bucket
+        """
+        params = (from_date, to_date)
+    else:
+        if group_by == "sku":
+            key, name, joins = "r.product_sku", "MAX(p.name)", ""
+            top_query = """
+                SELECT product_sku AS group_key
+                FROM sales_product_daily_rollup
+                WHERE sales_date BETWEEN %s AND %s
+                GROUP BY product_sku
+                ORDER BY SUM(revenue) DESC
+                LIMIT %s
+            """
+        else:
+            key, name, joins = "p.category_id", "MAX(c.name)", "LEFT JOIN categories c ON c.id = p.category_id"
+            top_query = """
+                SELECT tp.category_id AS group_key
+                FROM sales_product_daily_rollup tr
+                JOIN products tp ON tp.sku = tr.product_sku
+                WHERE tr.sales_date BETWEEN %s AND %s
+                GROUP BY tp.category_id
+                ORDER BY SUM(tr.revenue) DESC
+                LIMIT %s
+            """
+        query = f"""
+            SELECT
+                {bucket} AS bucket,
+                {key} AS group_key,
+                {name} AS group_name,
+                CAST(SUM(r.line_count) AS UNSIGNED) AS transaction_count,
+                CAST(SUM(r.quantity_sold) AS UNSIGNED) AS units_sold,
+                SUM(r.revenue) AS revenue
+            FROM sales_product_daily_rollup r
+            JOIN products p ON p.sku = r.product_sku
+            {joins}
+            JOIN ({top_query}) top_groups ON top_groups.group_key <=> {key}
+            WHERE r.sales_date BETWEEN %s AND %s
+            GROUP BY bucket, {key}
+            ORDER BY bucket, revenue DESC
+        """
+        params = (from_date, to_date, top, from_date, to_date)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    for row in rows:
+        if row["group_key"] is not None:
+            row["group_key"] = str(row["group_key"])
+    return rows
+
+def rebuild_sales_rollups(conn: MySQLConnection, from_date: date, to_date: date) -> Dict:
+    """Recompute all rollups for the given days from sale_transactions/sale_line_items.
+
+    Each day is replaced in its own transaction. INSERT ... SELECT locks the
+    day's source rows, so sales arriving for that day wait for the rebuild
+    and are then counted by the triggers on top of it.
+    """
+    cursor = conn.cursor()
+    days = 0
+    transactions = 0
+    try:
+        day = from_date
+        while day <= to_date:
+            begin_transaction(conn)
+            for table in ("sales_daily_rollup", "sales_hourly_rollup", "sales_product_daily_rollup"):
+                cursor.execute(f"DELETE FROM {table} WHERE sales_date = %s", (day,))
+
+            cursor.execute("""
+                INSERT INTO sales_daily_rollup (sales_date, slot, transaction_count, items_sold, revenue)
+                SELECT st.transaction_date, st.id % 8, COUNT(DISTINCT st.id),
+                       COALESCE(SUM(sli.quantity), 0), COALESCE(SUM(sli.line_total), 0)
+                FROM sale_transactions st
+                LEFT JOIN sale_line_items sli ON sli.transaction_id = st.id
+                WHERE st.transaction_date = %s
+                GROUP BY st.transaction_date, st.id % 8
+            """, (day,))
+            cursor.execute("""
+                INSERT INTO sales_hourly_rollup
+                    (sales_date, sales_hour, slot, transaction_count, items_sold, revenue)
+                SELECT st.transaction_date, HOUR(st.created_at), st.id % 8, COUNT(DISTINCT st.id),
+                       COALESCE(SUM(sli.quantity), 0), COALESCE(SUM(sli.line_total), 0)
+                FROM sale_transactions st
+                LEFT JOIN sale_line_items sli ON sli.transaction_id = st.id
+                WHERE st.transaction_date = %s
+                GROUP BY st.transaction_date, HOUR(st.created_at), st.id % 8
+            """, (day,))
+            cursor.execute("""
+                INSERT INTO sales_product_daily_rollup
+                    (sales_date, product_sku, line_count, quantity_sold, revenue)
+                SELECT st.transaction_date, sli.product_sku, COUNT(*), SUM(sli.quantity), SUM(sli.line_total)
+                FROM sale_transactions st
+                JOIN sale_line_items sli ON sli.transaction_id = st.id
+                WHERE st.transaction_date = %s
+                GROUP BY st.transaction_date, sli.product_sku
+            """, (day,))
+            cursor.execute(
+                "SELECT COALESCE(SUM(transaction_count), 0) FROM sales_daily_rollup WHERE sales_date = %s",
+                (day,)
+            )
+            transactions += int(cursor.fetchone()[0])
+            conn.commit()
+            days += 1
+            day += timedelta(days=1)
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+    return {"days": days, "transactions": transactions}
+
+# -------------------- ROLLING PRODUCT SALES INDEX --------------------
+# Windows precomputed in product_sales_index (units_<n>d / revenue_<n>d)
+INDEXED_WINDOWS = (7, 30, 90, 365)
+
+def is_product_sales_index_stale(conn: MySQLConnection) -> bool:
+    """True when the index was last rebuilt before today (or never)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(as_of) IS NULL OR MIN(as_of) < CURDATE() FROM product_sales_index")
+    stale = bool(cursor.fetchone()[0])
+    cursor.close()
+    return stale
+
+def rebuild_product_sales_index(conn: MySQLConnection) -> int:
+    """Recompute every product's rolling windows, anchored at today.
+
+    Reads at most a year of sales_product_daily_rollup; sales after the
+    rebuild are added by trigger until the next one. Returns rows written.
+    """
+    windows = ", ".join(
+        f"COALESCE(SUM(IF(r.sales_date > CURDATE() - INTERVAL {n} DAY, r.{column}, 0)), 0)"
+        for column in ("quantity_sold", "revenue") for n in INDEXED_WINDOWS
+    )
+    columns = [f"{kind}_{n}d" for kind in ("units", "revenue") for n in INDEXED_WINDOWS]
+    query = f"""
+        INSERT INTO product_sales_index (product_sku, {", ".join(columns)}, as_of)
+        SELECT p.sku, {windows}, CURDATE()
+        FROM products p
+        LEFT JOIN sales_product_daily_rollup r
+            ON r.product_sku = p.sku
+            AND r.sales_date > CURDATE() - INTERVAL {max(INDEXED_WINDOWS)} DAY
+        GROUP BY p.sku
+        ON DUPLICATE KEY UPDATE
+            {", ".join(f"{c} = VALUES({c})" for c in columns)},
+            as_of = VALUES(as_of)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        rows = cursor.rowcount
+        conn.commit()
+        return rows
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
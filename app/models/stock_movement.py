@@ -1,14 +1,15 @@
-from mysql.connector import MySQLConnection
-from typing import List, Dict, Optional
+import mysql.connector
+from mysql.connector import MySQLConnection, errorcode
+from collections import deque
+from typing import List, Dict, Iterator, Optional, Tuple
+from datetime import date, timedelta
+from ..core.database import begin_transaction
+from .reference import reference_data
 
 def get_movement_type_id(conn: MySQLConnection, movement_name: str) -> Optional[int]:
     """Get movement_type_id by name (sale, receipt, adjustment, return, damage)."""
-    cursor = conn.cursor()
-    query = "SELECT id FROM movement_types WHERE name = %s"
-    cursor.execute(query, (movement_name,))
-    result = cursor.fetchone()
-    cursor.close()
-    return result[0] if result else None
+    movement_type = reference_data.movement_type(conn, movement_name)
+    return movement_type["id"] if movement_type else None
 
 def create_stock_receipt(
     conn: MySQLConnection,
@@ -31,36 +32,129 @@ def create_stock_adjustment(
     conn: MySQLConnection,
     sku: str,
     quantity: int,
-    movement_type: str,  # 'adjustment', 'damage', 'return'
+    movement_type_id: int,  # 'adjustment', 'damage' or 'return'
+    reference_id: Optional[str],
     reason: Optional[str],
     user_id: int
-) -> int:
-    """Manual stock adjustment – insert directly into stock_movements.
-       The trigger `before_stock_movement_insert` will handle stock update.
+) -> Dict:
+    """Record a manual movement and apply it to stock in one call (AdjustStock).
+
+    The movement triggers lock the product row, so concurrent adjustments of
+    a SKU serialise and a decrease below zero is refused (ValueError).
+    Returns movement_id, previous_quantity and new_quantity.
     """
-    movement_type_id = get_movement_type_id(conn, movement_type)
-    if not movement_type_id:
-        raise ValueError(f"Invalid movement type: {movement_type}")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.callproc("AdjustStock", (sku, movement_type_id, quantity, reference_id, reason, user_id))
+        result = None
+        for res in cursor.stored_results():
+            result = res.fetchone()
+    except mysql.connector.Error as e:
+        if e.errno == errorcode.ER_SIGNAL_EXCEPTION:
+            raise ValueError(e.msg)
+        raise e
+    finally:
+        cursor.close()
+    return result
 
-    cursor = conn.cursor()
-    query = """
-        INSERT INTO stock_movements
-            (product_sku, movement_type_id, quantity, reason, created_by)
-        VALUES (%s, %s, %s, %s, %s)
+def create_stock_receipts(
+    conn: MySQLConnection,
+    lines: List[Dict],  # {"sku", "quantity"} in manifest order
+    reference_id: Optional[str],
+    reason: Optional[str],
+    user_id: int
+) -> Tuple[List[Dict], List[Dict]]:
+    """Receive a whole delivery in one transaction: every line or none.
+
+    One locking query validates all SKUs (unknown or inactive products are
+    returned as errors and nothing is written); one multi-row INSERT records
+    the movements, the triggers applying each line to stock. Returns
+    (results, errors) with results in manifest order.
     """
-    cursor.execute(query, (sku, movement_type_id, quantity, reason, user_id))
-    conn.commit()
-    movement_id = cursor.lastrowid
-    cursor.close()
-    return movement_id
+    movement_type_id = get_movement_type_id(conn, "receipt")
+    skus = sorted({line["sku"] for line in lines})
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Ends the read the movement type lookup may just have made
+        begin_transaction(conn)
+        # Lock in key order so concurrent deliveries of the same SKUs cannot deadlock
+        placeholders = ", ".join(["%s"] * len(skus))
+        cursor.execute(
+            f"SELECT sku, is_active FROM products WHERE sku IN ({placeholders}) ORDER BY sku FOR UPDATE",
+            tuple(skus)
+        )
+        active = {row["sku"]: row["is_active"] for row in cursor.fetchall()}
+
+        errors = []
+        for number, line in enumerate(lines, start=1):
+            if line["sku"] not in active:
+                errors.append({"line": number, "product_sku": line["sku"], "error": "Product not found"})
+            elif not active[line["sku"]]:
+                errors.append({"line": number, "product_sku": line["sku"],
+                               "error": "Cannot receive stock for inactive product"})
+        if errors:
+            conn.rollback()
+            return [], errors
+
+        values = []
+        for line in lines:
+            values.extend((line["sku"], movement_type_id, line["quantity"], reference_id, reason, user_id))
+        cursor.execute(
+            f"""
+            INSERT INTO stock_movements
+                (product_sku, movement_type_id, quantity, reference_id, reason, created_by)
+            VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(lines))}
+            """,
+            tuple(values)
+        )
+        # Ids need not be consecutive (interleaved auto-increment), so read back
+        # by what this insert wrote. The SKUs stay locked until commit, so no
+        # other movement of them can appear; each SKU's rows come back in the
+        # order its lines were listed.
+        first_id = cursor.lastrowid
+        cursor.execute(
+            f"""
+            SELECT id AS movement_id, product_sku, quantity, previous_quantity, new_quantity
+            FROM stock_movements
+            WHERE id >= %s AND movement_type_id = %s AND created_by = %s
+              AND reference_id <=> %s AND product_sku IN ({placeholders})
+            ORDER BY id
+            """,
+            (first_id, movement_type_id, user_id, reference_id, *skus)
+        )
+        rows_by_sku = {}
+        for row in cursor.fetchall():
+            rows_by_sku.setdefault(row["product_sku"], deque()).append(row)
+        results = []
+        for number, line in enumerate(lines, start=1):
+            pending = rows_by_sku.get(line["sku"])
+            row = pending.popleft() if pending else None
+            if row is None or row["quantity"] != line["quantity"]:
+                break
+            row["line"] = number
+            results.append(row)
+        if len(results) != len(lines) or any(rows_by_sku.values()):
+            raise RuntimeError("Recorded movements do not match the delivery lines")
+        conn.commit()
+        return results, []
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
 
 def get_stock_movements(
     conn: MySQLConnection,
     product_sku: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[List] = None
 ) -> List[Dict]:
-    """Get stock movement history, optionally filtered by product."""
+    """Get stock movement history, optionally filtered by product.
+
+    `after` holds the (created_at, id) of the last row already seen; when
+    given, keyset pagination is used and `offset` is ignored.
+    """
     cursor = conn.cursor(dictionary=True)
     query = """
         SELECT 
@@ -85,13 +179,70 @@ def get_stock_movements(
     if product_sku:
         query += " AND sm.product_sku = %s"
         params.append(product_sku)
-    query += " ORDER BY sm.created_at DESC LIMIT %s OFFSET %s"
+    if after:
+        query += " AND (sm.created_at < %s OR (sm.created_at = %s AND sm.id < %s))"
+        params.extend([after[0], after[0], after[1]])
+        offset = 0
+    query += " ORDER BY sm.created_at DESC, sm.id DESC LIMIT %s OFFSET %s"
     params.extend([limit, offset])
     cursor.execute(query, tuple(params))
     results = cursor.fetchall()
     cursor.close()
     return results
 
+def iter_stock_movements(
+    conn: MySQLConnection,
+    product_sku: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict]:
+    """Stream movement history oldest first from an unbuffered (server-side) cursor."""
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    query = """
+        SELECT 
+            sm.id,
+            p.sku as product_sku,
+            p.name as product_name,
+            mt.name as movement_type,
+            sm.quantity,
+            sm.previous_quantity,
+            sm.new_quantity,
+            sm.reference_id,
+            sm.reason,
+            u.username as performed_by,
+            sm.created_at
+        FROM stock_movements sm
+        JOIN products p ON sm.product_sku = p.sku
+        JOIN movement_types mt ON sm.movement_type_id = mt.id
+        LEFT JOIN users u ON sm.created_by = u.id
+        WHERE 1=1
+    """
+    params = []
+    if product_sku:
+        query += " AND sm.product_sku = %s"
+        params.append(product_sku)
+    if from_date:
+        query += " AND sm.created_at >= %s"
+        params.append(from_date)
+    if to_date:
+        query += " AND sm.created_at < %s"
+        params.append(to_date + timedelta(days=1))
+    query += " ORDER BY sm.id"
+    try:
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        # A client that disconnects mid-download closes this generator with
+        # rows still unread; read them off so the cursor closes cleanly and
+        # the connection goes back to the pool
+        conn.consume_results()
+        cursor.close()
+
 def get_product_stock_level(conn: MySQLConnection, sku: str) -> Optional[int]:
     """Get current quantity in stock for a product."""
     cursor = conn.cursor()
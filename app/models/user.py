@@ -1,6 +1,24 @@
 from mysql.connector import MySQLConnection
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from ..core.cache import TTLCache
+from ..core.config import settings
 from ..core.security import hash_password
+from .cache_version import get_cache_version, bump_cache_version
+from .reference import reference_data
+
+PRINCIPALS_VERSION_KEY = "principals"
+
+# Authenticated principals keyed by user id (see api/dependencies.get_current_user).
+# Writes that change a user's access bump the shared "principals" version so
+# every worker drops its copies.
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def sync_principal_cache(conn: MySQLConnection) -> None:
+    """Drop every cached principal if any worker changed a user's access."""
+    principal_cache.sync_version(get_cache_version(conn, PRINCIPALS_VERSION_KEY))
 
 def create_user(conn: MySQLConnection, user_data: Dict[str, Any]) -> int:
     cursor = conn.cursor()
@@ -10,7 +28,8 @@ def create_user(conn: MySQLConnection, user_data: Dict[str, Any]) -> int:
             INSERT INTO users (username, email, password_hash, is_active)
             VALUES (%s, %s, %s, %s)
         """
-        password_hash = hash_password(user_data["password"])
+        # Callers on the event loop hash on the password hasher pool first
+        password_hash = user_data.get("password_hash") or hash_password(user_data["password"])
         cursor.execute(query, (
             user_data["username"],
             user_data["email"],
@@ -22,22 +41,11 @@ def create_user(conn: MySQLConnection, user_data: Dict[str, Any]) -> int:
         # --- FIXED: Case-insensitive role lookup + fallback ---
         role_name = user_data.get("role", "clerk").strip().lower()
         
-        # Lookup role ID (case-insensitive)
-        role_query = "SELECT id FROM roles WHERE LOWER(name) = %s"
-        cursor.execute(role_query, (role_name,))
-        role_row = cursor.fetchone()
-        
-        if role_row:
-            role_id = role_row[0]
+        # Lookup role (case-insensitive); fall back to 'clerk' if not found
+        role = reference_data.role(conn, role_name) or reference_data.role(conn, "clerk")
+        if role:
             assign_query = "INSERT INTO user_roles (user_id, role_id) VALUES (%s, %s)"
-            cursor.execute(assign_query, (user_id, role_id))
-        else:
-            # Fallback: assign 'clerk' if role not found
-            cursor.execute("SELECT id FROM roles WHERE LOWER(name) = 'clerk'")
-            clerk_row = cursor.fetchone()
-            if clerk_row:
-                assign_query = "INSERT INTO user_roles (user_id, role_id) VALUES (%s, %s)"
-                cursor.execute(assign_query, (user_id, clerk_row[0]))
+            cursor.execute(assign_query, (user_id, role["id"]))
         # -------------------------------------------------------
 
         conn.commit()
@@ -78,4 +86,54 @@ def get_user_by_id(conn: MySQLConnection, user_id: int) -> Optional[Dict]:
     cursor.execute(query, (user_id,))
     user = cursor.fetchone()
     cursor.close()
-    return user
\ No newline at end of file
+    return user
+
+def update_password_hash(conn: MySQLConnection, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Replace a stored hash (rehash on login); a no-op if the password changed meanwhile."""
+    cursor = conn.cursor()
+    query = "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s"
+    cursor.execute(query, (new_hash, user_id, old_hash))
+    conn.commit()
+    affected = cursor.rowcount
+    cursor.close()
+    return affected > 0
+
+def set_user_active(conn: MySQLConnection, user_id: int, is_active: bool) -> bool:
+    """Activate or deactivate a user; every worker drops its cached principals."""
+    cursor = conn.cursor()
+    try:
+        query = "UPDATE users SET is_active = %s WHERE id = %s"
+        cursor.execute(query, (is_active, user_id))
+        affected = cursor.rowcount
+        version = bump_cache_version(cursor, PRINCIPALS_VERSION_KEY) if affected else None
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+    if version is not None:
+        principal_cache.sync_version(version)
+    return affected > 0
+
+def set_user_roles(conn: MySQLConnection, user_id: int, role_names: List[str]) -> None:
+    """Replace a user's roles; every worker drops its cached principals."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM user_roles WHERE user_id = %s", (user_id,))
+        names = [name.strip().lower() for name in role_names if name.strip()]
+        if names:
+            placeholders = ", ".join(["%s"] * len(names))
+            query = f"""
+                INSERT INTO user_roles (user_id, role_id)
+                SELECT %s, id FROM roles WHERE LOWER(name) IN ({placeholders})
+            """
+            cursor.execute(query, (user_id, *names))
+        version = bump_cache_version(cursor, PRINCIPALS_VERSION_KEY)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+    principal_cache.sync_version(version)
@@ -32,7 +32,9 @@ class ProductPerformance(BaseModel):
     name: str
     category_name: Optional[str]
     quantity_in_stock: int
-    total_sold_30d: int
+    days: int
+    total_sold: int
+    revenue: Decimal
     avg_daily_sales: float
     status: str
 
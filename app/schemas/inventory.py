@@ -20,6 +20,29 @@ class StockReceiptCreate(StockMovementBase):
 class StockAdjustmentCreate(StockMovementBase):
     movement_type: str = "adjustment"  # or "damage", "return"
 
+class StockReceiptLine(BaseModel):
+    product_sku: str
+    quantity: int = Field(..., gt=0)
+
+class StockReceiptBulkCreate(BaseModel):
+    reference_id: Optional[str] = None  # e.g. delivery note / purchase order number
+    reason: Optional[str] = None
+    lines: List[StockReceiptLine] = Field(..., min_length=1)
+
+class StockReceiptLineResult(BaseModel):
+    line: int
+    product_sku: str
+    quantity: int
+    movement_id: int
+    previous_quantity: int
+    new_quantity: int
+
+class StockReceiptBulkResponse(BaseModel):
+    reference_id: Optional[str] = None
+    lines_received: int
+    units_received: int
+    lines: List[StockReceiptLineResult]
+
 class StockMovementResponse(BaseModel):
     id: int
     product_name: Optional[str]
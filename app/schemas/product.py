@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
 
@@ -57,4 +57,21 @@ class ProductResponse(ProductBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     category_name: Optional[str] = None
-    supplier_name: Optional[str] = None
\ No newline at end of file
+    supplier_name: Optional[str] = None
+
+class ProductSearchResult(ProductResponse):
+    score: float
+
+class BulkImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    rows_received: int
+    inserted: int
+    updated: int
+    failed: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: List[BulkImportError]
\ No newline at end of file
@@ -12,6 +12,7 @@ class ReplenishmentSuggestionCreate(BaseModel):
     lookback_days: int = 30
     forecast_days: int = 7
     safety_stock_factor: float = 1.5
+    engine: str = "procedure"  # 'procedure' (stored procedure), 'python' or 'incremental'
 
 class ReplenishmentSuggestionResponse(ReplenishmentSuggestionBase):
     id: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Union
+from datetime import date, datetime
 from decimal import Decimal
 
 class SaleItemCreate(BaseModel):
@@ -35,4 +35,40 @@ class SaleTransactionResponse(BaseModel):
 class SaleSummaryResponse(BaseModel):
     total_transactions: int
     total_revenue: Decimal
-    total_items_sold: int
\ No newline at end of file
+    total_items_sold: int
+
+class SaleHourlySummaryResponse(BaseModel):
+    hour: int
+    transaction_count: int
+    total_items_sold: int
+    total_revenue: Decimal
+
+class SalesAnalyticsPoint(BaseModel):
+    bucket: Union[datetime, date]
+    group_key: Optional[str] = None
+    group_name: Optional[str] = None
+    transaction_count: int
+    units_sold: int
+    revenue: Decimal
+
+class SalesAnalyticsResponse(BaseModel):
+    from_date: date
+    to_date: date
+    granularity: str
+    group_by: Optional[str] = None
+    series: List[SalesAnalyticsPoint]
+
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleCreate]
+
+class SaleBatchResult(BaseModel):
+    transaction_number: str
+    status: str  # 'created', 'duplicate' or 'failed'
+    transaction_id: Optional[int] = None
+    error: Optional[str] = None
+
+class SaleBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    results: List[SaleBatchResult]
\ No newline at end of file
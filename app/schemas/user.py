@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=80)
@@ -18,6 +18,12 @@ class UserResponse(BaseModel):
     is_active: bool
     roles: Optional[str] = None
 
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+
+class UserRolesUpdate(BaseModel):
+    roles: List[str] = Field(..., min_length=1)
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
\ No newline at end of file
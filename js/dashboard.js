@@ -34,11 +34,12 @@ let topProductsChart = null;
         inventoryLink.style.display = isManager ? 'block' : 'none';
     }
 
-    // Load all dashboard data
+    // Load all dashboard data, then follow live updates
     await loadDashboardSummary();
     await loadLowStockAlerts();
     await loadDailySales();
     await loadTopProducts();
+    startLiveUpdates();
 })();
 
 // ---------- LOGOUT ----------
@@ -56,18 +57,22 @@ async function loadDashboardSummary() {
         });
         if (!response.ok) throw new Error('Failed to load summary');
         
-        const data = await response.json();
-        
-        document.getElementById('totalProducts').textContent = data.total_products;
-        document.getElementById('stockValue').textContent = Number(data.total_stock_value).toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2});
-        document.getElementById('lowStockCount').textContent = data.low_stock_count;
-        document.getElementById('outOfStockCount').textContent = data.out_of_stock_count;
+        renderSummary(await response.json());
     } catch (error) {
         console.error('Summary error:', error);
     }
 }
 
+function renderSummary(data) {
+    document.getElementById('totalProducts').textContent = data.total_products;
+    document.getElementById('stockValue').textContent = Number(data.total_stock_value).toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    document.getElementById('lowStockCount').textContent = data.low_stock_count;
+    document.getElementById('outOfStockCount').textContent = data.out_of_stock_count;
+}
+
 // ---------- LOAD LOW STOCK ALERTS ----------
+let lowStockAlerts = new Map();  // sku -> alert, kept current by live updates
+
 async function loadLowStockAlerts() {
     const token = localStorage.getItem('access_token');
     const lowStockList = document.getElementById('lowStockList');
@@ -79,32 +84,39 @@ async function loadLowStockAlerts() {
         if (!response.ok) throw new Error('Failed to load low stock alerts');
         
         const alerts = await response.json();
-        
-        if (alerts.length === 0) {
-            lowStockList.innerHTML = '<p style="color: #28a745;">✅ All stock levels are healthy.</p>';
-            return;
-        }
-
-        let html = '<table class="low-stock-table">';
-        alerts.forEach(item => {
-            const badgeClass = item.quantity_in_stock === 0 ? 'badge-danger' : 'badge-warning';
-            const status = item.quantity_in_stock === 0 ? 'Out of Stock' : 'Low Stock';
-            html += `<tr>
-                <td><strong>${item.name}</strong><br><small>SKU: ${item.sku}</small></td>
-                <td style="text-align: right;">
-                    <span class="badge ${badgeClass}">${item.quantity_in_stock} / ${item.reorder_threshold}</span><br>
-                    <small>${status}</small>
-                </td>
-            </tr>`;
-        });
-        html += '</table>';
-        lowStockList.innerHTML = html;
+        lowStockAlerts = new Map(alerts.map(item => [item.sku, item]));
+        renderLowStockAlerts();
     } catch (error) {
         console.error('Low stock error:', error);
         lowStockList.innerHTML = '<p style="color: #dc3545;">Error loading alerts.</p>';
     }
 }
 
+function renderLowStockAlerts() {
+    const lowStockList = document.getElementById('lowStockList');
+    const alerts = [...lowStockAlerts.values()].sort((a, b) => a.quantity_in_stock - b.quantity_in_stock);
+
+    if (alerts.length === 0) {
+        lowStockList.innerHTML = '<p style="color: #28a745;">✅ All stock levels are healthy.</p>';
+        return;
+    }
+
+    let html = '<table class="low-stock-table">';
+    alerts.forEach(item => {
+        const badgeClass = item.quantity_in_stock === 0 ? 'badge-danger' : 'badge-warning';
+        const status = item.quantity_in_stock === 0 ? 'Out of Stock' : 'Low Stock';
+        html += `<tr>
+            <td><strong>${item.name}</strong><br><small>SKU: ${item.sku}</small></td>
+            <td style="text-align: right;">
+                <span class="badge ${badgeClass}">${item.quantity_in_stock} / ${item.reorder_threshold}</span><br>
+                <small>${status}</small>
+            </td>
+        </tr>`;
+    });
+    html += '</table>';
+    lowStockList.innerHTML = html;
+}
+
 // ---------- LOAD TODAY'S SALES ----------
 async function loadDailySales() {
     const token = localStorage.getItem('access_token');
@@ -114,37 +126,39 @@ async function loadDailySales() {
         });
         if (!response.ok) throw new Error('Failed to load daily sales');
         
-        const data = await response.json();
-        
-        if (data) {
-            document.getElementById('todayTransactions').textContent = data.transaction_count || 0;
-            document.getElementById('todayItems').textContent = data.total_items_sold || 0;
-            document.getElementById('todayRevenue').textContent = Number(data.total_revenue || 0).toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2});
-        } else {
-            document.getElementById('todayTransactions').textContent = '0';
-            document.getElementById('todayItems').textContent = '0';
-            document.getElementById('todayRevenue').textContent = '0.00';
-        }
+        renderDailySales(await response.json());
     } catch (error) {
         console.error('Daily sales error:', error);
     }
 }
 
+function renderDailySales(data) {
+    if (data) {
+        document.getElementById('todayTransactions').textContent = data.transaction_count || 0;
+        document.getElementById('todayItems').textContent = data.total_items_sold || 0;
+        document.getElementById('todayRevenue').textContent = Number(data.total_revenue || 0).toLocaleString(undefined, {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    } else {
+        document.getElementById('todayTransactions').textContent = '0';
+        document.getElementById('todayItems').textContent = '0';
+        document.getElementById('todayRevenue').textContent = '0.00';
+    }
+}
+
 // ---------- LOAD TOP PRODUCTS CHART ----------
 async function loadTopProducts() {
     const token = localStorage.getItem('access_token');
     try {
-        const response = await fetch('/dashboard/product-performance', {
+        const response = await fetch('/dashboard/product-performance?days=30&limit=5', {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         if (!response.ok) throw new Error('Failed to load product performance');
         
         const products = await response.json();
         
-        // Take top 5 best sellers
-        const top5 = products.slice(0, 5);
+        // Top 5 best sellers (ranked server-side)
+        const top5 = products;
         const labels = top5.map(p => p.name.length > 20 ? p.name.substring(0, 18) + '...' : p.name);
-        const data = top5.map(p => p.total_sold_30d);
+        const data = top5.map(p => p.total_sold);
         
         const ctx = document.getElementById('topProductsChart').getContext('2d');
         
@@ -180,10 +194,67 @@ async function loadTopProducts() {
     }
 }
 
-// ---------- AUTO-REFRESH EVERY 60 SECONDS ----------
-setInterval(async () => {
+// ---------- LIVE UPDATES (server-sent events) ----------
+// The server pushes `stock` deltas and fresh `summary` totals when sales,
+// receipts or adjustments land; a `resync` means events were dropped.
+// fetch() is used instead of EventSource so the bearer token can be sent.
+async function startLiveUpdates() {
+    const token = localStorage.getItem('access_token');
+    try {
+        const response = await fetch('/dashboard/stream', {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!response.ok || !response.body) throw new Error('Live updates unavailable');
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                handleStreamEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+        }
+    } catch (error) {
+        console.error('Live updates error:', error);
+    }
+    // Reconnect after a pause, reloading in case updates were missed meanwhile
+    setTimeout(async () => {
+        await refreshDashboard();
+        startLiveUpdates();
+    }, 5000);
+}
+
+function handleStreamEvent(block) {
+    let event = 'message';
+    let data = '';
+    block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+    });
+
+    if (event === 'stock') {
+        const item = JSON.parse(data);
+        if (item.low_stock) {
+            lowStockAlerts.set(item.sku, item);
+        } else {
+            lowStockAlerts.delete(item.sku);
+        }
+        renderLowStockAlerts();
+    } else if (event === 'summary') {
+        const summary = JSON.parse(data);
+        renderSummary(summary);
+        renderDailySales(summary.today_sales);
+    } else if (event === 'resync') {
+        refreshDashboard();
+    }
+}
+
+async function refreshDashboard() {
     await loadDashboardSummary();
     await loadLowStockAlerts();
     await loadDailySales();
-    // Chart will reload on next full refresh, but we can optionally refresh data
-}, 60000);
\ No newline at end of file
+}
@@ -28,6 +28,8 @@ function showAlert(message, type = 'success') {
 }
 
 // ---------- GENERATE SUGGESTIONS ----------
+const generateBtnLabel = document.getElementById('generateBtn').textContent;
+
 document.getElementById('generateBtn').addEventListener('click', async function() {
     const lookback = document.getElementById('lookbackDays').value || 30;
     const forecast = document.getElementById('forecastDays').value || 7;
@@ -46,8 +48,8 @@ document.getElementById('generateBtn').addEventListener('click', async function(
         const data = await response.json();
         
         if (response.ok) {
-            showAlert('✅ Suggestions generated successfully!', 'success');
-            loadSuggestions(true);  // reload active suggestions
+            showAlert('⏳ Generating suggestions...', 'success');
+            pollGenerationJob(data.job_id);
         } else {
             showAlert(data.detail || 'Generation failed', 'error');
         }
@@ -57,6 +59,41 @@ document.getElementById('generateBtn').addEventListener('click', async function(
     }
 });
 
+// ---------- POLL BACKGROUND GENERATION JOB ----------
+async function pollGenerationJob(jobId) {
+    const token = localStorage.getItem('access_token');
+    const generateBtn = document.getElementById('generateBtn');
+    generateBtn.disabled = true;
+    
+    try {
+        while (true) {
+            const response = await fetch(`/replenishment/jobs/${jobId}`, {
+                headers: { 'Authorization': `Bearer ${token}` }
+            });
+            if (!response.ok) throw new Error('Failed to load job status');
+            
+            const job = await response.json();
+            if (job.status === 'succeeded') {
+                showAlert('✅ Suggestions generated successfully!', 'success');
+                loadSuggestions(true);  // reload active suggestions
+                return;
+            }
+            if (job.status === 'failed') {
+                showAlert(`Generation failed: ${job.error}`, 'error');
+                return;
+            }
+            generateBtn.textContent = `Generating... ${Math.round(job.progress * 100)}%`;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    } catch (error) {
+        console.error(error);
+        showAlert('Lost track of the generation job. Refresh to see results.', 'error');
+    } finally {
+        generateBtn.disabled = false;
+        generateBtn.textContent = generateBtnLabel;
+    }
+}
+
 // ---------- LOAD SUGGESTIONS ----------
 let activeOnly = true;
 
@@ -0,0 +1,58 @@
+"""Rebuild the sales rollup tables (and the rolling product sales index)
+from sale_transactions/sale_line_items.
+
+Run once after adding the rollup tables, or to repair a date range:
+    python -m scripts.backfill_sales_rollups
+    python -m scripts.backfill_sales_rollups --from 2024-01-01 --to 2024-01-31
+Without --from/--to the whole sales history is rebuilt.
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from app.models.sales_rollup import rebuild_product_sales_index, rebuild_sales_rollups
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat)
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+    from_date, to_date = args.from_date, args.to_date
+    if from_date is None or to_date is None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(transaction_date), MAX(transaction_date) FROM sale_transactions")
+        first, last = cursor.fetchone()
+        cursor.close()
+        if first is None:
+            print("No sales to roll up.")
+            conn.close()
+            return
+        from_date = from_date or first
+        to_date = to_date or last
+
+    start = time.perf_counter()
+    result = rebuild_sales_rollups(conn, from_date, to_date)
+    print(f"✅ Rebuilt {result['days']} day(s), {result['transactions']} transaction(s) "
+          f"from {from_date} to {to_date} in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    rebuild_product_sales_index(conn)
+    conn.close()
+    print(f"✅ Rebuilt the rolling product sales index in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""Load test the API's hot paths against a seeded benchmark database.
+
+Seed first with scripts.seed_benchmark, then drive the real app either
+in-process (ASGI calls, no sockets: measures the app and the database)
+or through uvicorn (real HTTP, optionally several workers):
+    python -m scripts.bench_api --mode inprocess --concurrency 16 --duration 20
+    python -m scripts.bench_api --mode uvicorn --workers 4 --concurrency 64
+    python -m scripts.bench_api --url http://127.0.0.1:8000 --scenarios me,transactions
+Each scenario runs closed-loop (every client sends its next request when
+the previous one returns) after a warm-up. Results, server-side route
+stats and run metadata are written as JSON under bench_results/;
+--compare prints the change against an earlier result file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCENARIOS = ("login", "me", "create_sale", "transactions", "dashboard_summary", "movements", "replenishment")
+JOB_POLL_SECONDS = 0.05
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+# -------------------- CLIENTS --------------------
+class InProcessClient:
+    """Calls the ASGI app directly; one instance is shared by all workers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, body=None, token=None):
+        path, _, query = path.partition("?")
+        headers = [(b"host", b"bench")]
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "", "headers": headers,
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        sent, done = False, asyncio.Event()
+        status, chunks = 0, []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Like a real server: nothing more until the response is complete
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        done.set()
+        return status, b"".join(chunks)
+
+    async def close(self):
+        pass
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 keep-alive client; one connection per worker."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, token=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            data = b"".join(chunks)
+        else:
+            data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+# -------------------- SCENARIOS --------------------
+# Each takes (client, ctx, worker, n) and returns the response status
+
+async def login(client, ctx, worker, n):
+    status, _ = await client.request("POST", "/auth/login", {"username": ctx["username"], "password": ctx["password"]})
+    return status
+
+async def me(client, ctx, worker, n):
+    return (await client.request("GET", "/auth/me", token=ctx["token"]))[0]
+
+async def create_sale(client, ctx, worker, n):
+    rng = ctx["rng"]
+    items = [
+        {"sku": p["sku"], "quantity": rng.randint(1, 3), "unit_price": p["selling_price"]}
+        for p in rng.sample(ctx["products"], rng.randint(1, 5))
+    ]
+    body = {
+        "transaction_number": f"BENCH-{ctx['run']}-{worker}-{n}",
+        "transaction_date": datetime.now().isoformat(),
+        "items": items,
+    }
+    return (await client.request("POST", "/sales", body, token=ctx["token"]))[0]
+
+async def transactions(client, ctx, worker, n):
+    return (await client.request("GET", "/sales/transactions?limit=50", token=ctx["token"]))[0]
+
+async def dashboard_summary(client, ctx, worker, n):
+    return (await client.request("GET", "/dashboard/summary", token=ctx["token"]))[0]
+
+async def movements(client, ctx, worker, n):
+    return (await client.request("GET", "/inventory/movements?limit=100", token=ctx["token"]))[0]
+
+async def replenishment(client, ctx, worker, n):
+    """Time a whole generation job: submit, then poll until it finishes."""
+    status, data = await client.request(
+        "POST", f"/replenishment/generate?engine={ctx['engine']}", token=ctx["token"]
+    )
+    if status != 202:
+        return status
+    job_id = json.loads(data)["job_id"]
+    while True:
+        await asyncio.sleep(JOB_POLL_SECONDS)
+        status, data = await client.request("GET", f"/replenishment/jobs/{job_id}", token=ctx["token"])
+        job = json.loads(data)
+        if status != 200 or job["status"] == "failed":
+            return 500 if status == 200 else status
+        if job["status"] == "succeeded":
+            return 200
+
+# -------------------- RUNNER --------------------
+async def run_closed_loop(make_client, scenario, ctx, concurrency, duration, warmup, on_measure):
+    """Returns (latencies, statuses, elapsed, what on_measure() returned when measuring began)."""
+    latencies, statuses = [], {}
+    measuring, stop_at = False, time.perf_counter() + warmup + duration
+
+    async def worker(index):
+        client = make_client()
+        n = 0
+        try:
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    status = await scenario(client, ctx, index, n)
+                except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                    status = type(e).__name__
+                    await client.close()
+                elapsed = time.perf_counter() - start
+                n += 1
+                if measuring:
+                    latencies.append(elapsed)
+                    statuses[str(status)] = statuses.get(str(status), 0) + 1
+        finally:
+            await client.close()
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+    await asyncio.sleep(warmup)
+    baseline = await on_measure()
+    measuring, started = True, time.perf_counter()
+    await asyncio.gather(*tasks)
+    return latencies, statuses, time.perf_counter() - started, baseline
+
+async def run_sequential(client, scenario, ctx, repeat):
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    for n in range(repeat):
+        start = time.perf_counter()
+        status = await scenario(client, ctx, 0, n)
+        latencies.append(time.perf_counter() - start)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return latencies, statuses, time.perf_counter() - started
+
+def summarise(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"requests": 0, "statuses": statuses}
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "mean_ms": ms(statistics.fmean(ordered)),
+        "max_ms": ms(ordered[-1]),
+        "statuses": statuses,
+    }
+
+def route_deltas(before, after):
+    """Per-route server-side averages for the measured window only."""
+    deltas = {}
+    for route, stats in after.items():
+        prev = before.get(route)
+        count = stats["latency_seconds"]["count"] - (prev["latency_seconds"]["count"] if prev else 0)
+        if count <= 0:
+            continue
+        total = lambda key: stats[key]["sum"] - (prev[key]["sum"] if prev else 0)
+        deltas[route] = {
+            "requests": count,
+            "mean_latency_ms": round(total("latency_seconds") / count * 1000, 3),
+            "mean_db_time_ms": round(total("db_time_seconds") / count * 1000, 3),
+            "mean_queries": round(total("queries") / count, 2),
+            "slowest_statement": stats.get("slowest_statement"),  # admins only over HTTP
+        }
+    return deltas
+
+# -------------------- TARGETS --------------------
+def start_uvicorn(args, env):
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+           "--port", str(args.port), "--workers", str(args.workers), "--no-access-log"]
+    return subprocess.Popen(cmd, env=env)
+
+async def wait_until_up(client, timeout):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            status, _ = await client.request("GET", "/api/health")
+            if status == 200:
+                return
+        except OSError:
+            await client.close()
+        if time.perf_counter() > deadline:
+            raise SystemExit("server did not come up")
+        await asyncio.sleep(0.25)
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return {"commit": commit or None, "dirty": dirty}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+async def bench(args):
+    env = dict(os.environ, DB_NAME=args.database)
+    if args.mode == "uvicorn" and not args.url and not args.metrics_token:
+        args.metrics_token = env["METRICS_TOKEN"] = secrets.token_hex(16)  # for our own server
+    server, app = None, None
+    if args.mode == "inprocess":
+        os.environ["DB_NAME"] = args.database  # read by app.core.config at import
+        from app.main import app
+        from app.core.metrics import route_metrics
+        from app.core.pool import connection_pool
+        await app.router.startup()
+        shared = InProcessClient(app)
+        make_client = lambda: shared
+
+        async def server_routes():
+            return route_metrics.snapshot()
+
+        async def server_pool():
+            return connection_pool.stats()
+    else:
+        base_url = args.url or f"http://127.0.0.1:{args.port}"
+        if args.mode == "uvicorn" and not args.url:
+            server = start_uvicorn(args, env)
+        make_client = lambda: HttpClient(base_url)
+        await wait_until_up(make_client(), args.startup_timeout)
+
+        async def fetch(path):
+            client = make_client()
+            try:
+                status, data = await client.request("GET", path, token=args.metrics_token)
+                if status != 200:
+                    raise SystemExit(f"GET {path} failed ({status}); pass the server's --metrics-token")
+                return json.loads(data)
+            finally:
+                await client.close()
+
+        server_routes = lambda: fetch("/api/health/routes")
+        server_pool = lambda: fetch("/api/health/pool")
+
+    results = {}
+    try:
+        control = make_client()
+        status, data = await control.request("POST", "/auth/login", {"username": args.username, "password": args.password})
+        if status != 200:
+            raise SystemExit(f"login as {args.username} failed ({status}); seed with scripts.seed_benchmark first")
+        token = json.loads(data)["access_token"]
+        status, data = await control.request("GET", "/products?limit=500", token=token)
+        products = [p for p in json.loads(data) if p["quantity_in_stock"] > 100]
+        ctx = {
+            "username": args.username, "password": args.password, "token": token, "products": products,
+            "rng": random.Random(args.seed), "run": int(time.time()), "engine": args.engine,
+        }
+        for name in args.scenarios:
+            scenario = globals()[name]
+            if name == "create_sale" and not products:
+                print(f"{name:<18} skipped: no stocked products")
+                continue
+            if name == "replenishment":
+                before = await server_routes()
+                outcome = await run_sequential(control, scenario, ctx, args.job_repeat)
+            else:
+                *outcome, before = await run_closed_loop(
+                    make_client, scenario, ctx, args.concurrency, args.duration, args.warmup, server_routes
+                )
+            results[name] = summarise(*outcome)
+            results[name]["server"] = route_deltas(before, await server_routes())
+            r = results[name]
+            if r["requests"]:
+                print(f"{name:<18} {r['requests']:>8} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} "
+                      f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}  {r['statuses']}")
+        await control.close()
+        pool = await server_pool()
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mode": args.mode if not args.url else "url",
+            "url": args.url,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "database": args.database,
+            "dataset": await dataset_counts(args.database) if not args.url else None,
+            "python": platform.python_version(),
+            "pool": {k: pool.get(k) for k in ("pool_size", "max_overflow", "timeout_seconds")},
+            "pool_after": {k: pool.get(k) for k in ("exhausted_events", "timeouts")},
+        },
+        "results": results,
+    }
+
+async def dataset_counts(database):
+    import mysql.connector
+
+    def count():
+        conn = mysql.connector.connect(
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+            database=database,
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD")
+        )
+        cursor = conn.cursor()
+        counts = {}
+        for table in ("products", "sale_transactions", "sale_line_items", "stock_movements"):
+            # Estimates from the data dictionary; exact COUNT(*) takes seconds at millions of rows
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                (database, table)
+            )
+            row = cursor.fetchone()
+            counts[table] = row[0] if row else None
+        cursor.close()
+        conn.close()
+        return counts
+
+    return await asyncio.get_running_loop().run_in_executor(None, count)
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({(baseline['meta'].get('commit') or '')[:10]})")
+    print(f"{'scenario':<18} {'rps':>9} {'Δ rps':>8} {'p99 ms':>9} {'Δ p99':>8}")
+    for name, r in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or not old.get("requests") or not r.get("requests"):
+            continue
+        change = lambda new, prev: f"{(new - prev) / prev * 100:+.1f}%" if prev else "n/a"
+        print(f"{name:<18} {r['rps']:>9.1f} {change(r['rps'], old['rps']):>8} "
+              f"{r['p99_ms']:>9.2f} {change(r['p99_ms'], old['p99_ms']):>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--url", help="Benchmark an already running server instead")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--metrics-token", default=os.getenv("METRICS_TOKEN"),
+                        help="The server's METRICS_TOKEN, for its route and pool stats (--url)")
+    parser.add_argument("--startup-timeout", type=float, default=120, help="Seconds to wait for the server")
+    parser.add_argument("--database", default="smart_inventory_bench")
+    parser.add_argument("--username", default="bench_manager")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds per scenario")
+    parser.add_argument("--job-repeat", type=int, default=3, help="Replenishment runs (sequential)")
+    parser.add_argument("--engine", default="incremental", help="Replenishment engine")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default bench_results/<timestamp>_<mode>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    print(f"{'scenario':<18} {'requests':>8} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    report = asyncio.run(bench(args))
+
+    output = args.output or os.path.join(
+        "bench_results", f"{datetime.now():%Y%m%d-%H%M%S}_{report['meta']['mode']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n📄 Results written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark login password checks: shared threadpool vs the password hasher pool.
+
+Compute-only (no database). Simulates a burst of concurrent logins and,
+alongside, a probe standing in for sale requests that needs a threadpool
+thread every few milliseconds. Reports login throughput/latency and how
+long the probe waited for a thread, per bcrypt cost:
+    python -m scripts.bench_login
+    python -m scripts.bench_login --rounds 10,12 --logins 200 --concurrency 100
+End-to-end login throughput against a seeded database:
+    python -m scripts.bench_api --scenarios login
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.security import PasswordHasher, PasswordHasherBusyError, verify_password
+
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+def percentile(timings, p):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+async def run_burst(check, password, hashed, logins, concurrency):
+    """Fire `logins` checks, at most `concurrency` at once; probe the threadpool meanwhile."""
+    login_times, probe_times, rejected = [], [], 0
+    gate = asyncio.Semaphore(concurrency)
+    finished = asyncio.Event()
+
+    async def one_login():
+        nonlocal rejected
+        async with gate:
+            start = time.perf_counter()
+            try:
+                await check(password, hashed)
+                login_times.append(time.perf_counter() - start)
+            except PasswordHasherBusyError:
+                rejected += 1
+
+    async def probe():
+        while not finished.is_set():
+            start = time.perf_counter()
+            await run_in_threadpool(lambda: None)
+            probe_times.append(time.perf_counter() - start)
+            await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    finished.set()
+    await probe_task
+    return login_times, probe_times, rejected, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", default="10,12", help="bcrypt cost factors to compare")
+    parser.add_argument("--logins", type=int, default=100, help="Logins per burst")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2, help="Password hasher pool threads")
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    print(f"{args.logins} logins, {args.concurrency} concurrent; hasher pool: {args.workers} workers")
+    print(f"{'rounds':>6} {'mode':<11} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'rejected':>9} {'probe p50':>10} {'probe p99':>10}")
+    for rounds in [int(r) for r in args.rounds.split(",")]:
+        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+        hasher = PasswordHasher(workers=args.workers, queue_timeout=args.queue_timeout)
+        modes = (
+            ("threadpool", lambda p, h: run_in_threadpool(verify_password, p, h)),
+            ("hasher", hasher.verify),
+        )
+        for name, check in modes:
+            login_times, probe_times, rejected, elapsed = asyncio.run(
+                run_burst(check, password, hashed, args.logins, args.concurrency)
+            )
+            ms = lambda seconds: seconds * 1000
+            print(f"{rounds:>6} {name:<11} {len(login_times) / elapsed:>9.1f} "
+                  f"{ms(statistics.median(login_times)) if login_times else 0:>9.1f} "
+                  f"{ms(percentile(login_times, 0.99)):>9.1f} {rejected:>9} "
+                  f"{ms(statistics.median(probe_times)) if probe_times else 0:>10.2f} "
+                  f"{ms(percentile(probe_times, 0.99)):>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark replenishment generation: stored procedure vs in-app NumPy engine.
+
+Compute-only (no database), synthetic catalogues of 10k and 100k SKUs:
+    python -m scripts.bench_replenishment
+End-to-end against the configured database (all engines, same data; the
+incremental engine's first run is a full rebuild, later ones follow the
+change log):
+    python -m scripts.bench_replenishment --db --repeat 3
+"""
+import argparse
+import os
+import statistics
+import time
+
+import mysql.connector
+import numpy as np
+from dotenv import load_dotenv
+
+from app.models import replenishment as replenishment_model
+
+load_dotenv()
+
+def bench_compute(sizes, lookback_days, forecast_days, safety_stock_factor, repeat):
+    rng = np.random.default_rng(42)
+    print(f"{'skus':>8} {'p50 ms':>9} {'max ms':>9}")
+    for n in sizes:
+        stock = rng.integers(0, 200, size=n)
+        history = rng.poisson(3.0, size=(n, lookback_days)).astype(np.float64)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            replenishment_model.compute_suggestions(stock, history, forecast_days, safety_stock_factor)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{n:>8} {statistics.median(timings):>9.2f} {max(timings):>9.2f}")
+
+def bench_db(lookback_days, forecast_days, safety_stock_factor, repeat):
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = TRUE")
+    skus = cursor.fetchone()[0]
+    cursor.close()
+
+    engines = (
+        ("procedure", replenishment_model.generate_suggestions),
+        ("python", replenishment_model.generate_suggestions_python),
+        ("incremental", replenishment_model.generate_suggestions_incremental),
+    )
+    print(f"active skus: {skus}")
+    print(f"{'engine':<12} {'p50 s':>9} {'max s':>9} {'suggestions':>12}")
+    for name, generate in engines:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            generate(conn, lookback_days, forecast_days, safety_stock_factor)
+            timings.append(time.perf_counter() - start)
+        # What the run left behind, so an engine that silently writes nothing shows up
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM replenishment_suggestions "
+            "WHERE date_generated = CURDATE() AND is_acted_upon = FALSE"
+        )
+        written = cursor.fetchone()[0]
+        conn.commit()
+        cursor.close()
+        print(f"{name:<12} {statistics.median(timings):>9.3f} {max(timings):>9.3f} {written:>12}")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", action="store_true", help="Run every engine against the configured database")
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--lookback-days", type=int, default=30)
+    parser.add_argument("--forecast-days", type=int, default=7)
+    parser.add_argument("--safety-stock-factor", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.db:
+        bench_db(args.lookback_days, args.forecast_days, args.safety_stock_factor, args.repeat)
+    else:
+        sizes = [int(s) for s in args.sizes.split(",")]
+        bench_compute(sizes, args.lookback_days, args.forecast_days, args.safety_stock_factor, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark the in-memory product search index on a synthetic catalogue.
+
+Compute-only (no database); builds the index and times typical queries:
+    python -m scripts.bench_search
+    python -m scripts.bench_search --sizes 100000,250000 --queries 2000
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from app.core.search import SearchIndex
+
+BRANDS = ["Brookside", "Fresha", "Kabras", "Mumias", "Kensalt", "Elianto", "Tuskys", "Daima", "Menengai", "Ketepa"]
+ITEMS = ["Milk", "Sugar", "Salt", "Cooking Oil", "Tea Leaves", "Maize Flour", "Wheat Flour", "Rice",
+         "Yoghurt", "Butter", "Bread", "Soap", "Toothpaste", "Chocolate", "Biscuits", "Juice"]
+SIZES = ["250g", "500g", "1kg", "2kg", "500ml", "1L", "2L", "5L"]
+
+def make_catalogue(n, rng):
+    records = []
+    for i in range(n):
+        item = rng.choice(ITEMS)
+        records.append({
+            "sku": f"{item[:3].upper()}-{i:06d}",
+            "barcode": f"{rng.randrange(10**12, 10**13)}",
+            "name": f"{rng.choice(BRANDS)} {item} {rng.choice(SIZES)}",
+            "category_id": rng.randint(1, 20),
+            "supplier_id": rng.randint(1, 50),
+            "selling_price": Decimal(rng.randint(20, 2000)),
+            "is_active": rng.random() > 0.05,
+        })
+    return records
+
+def make_queries(records, count, rng):
+    def typo(word):
+        i = rng.randrange(1, len(word) - 1)
+        return word[:i] + word[i + 1:]
+
+    kinds = {
+        "exact": lambda r: r["sku"],
+        "barcode": lambda r: r["barcode"],
+        "prefix": lambda r: r["name"].split()[1][:3],
+        "substring": lambda r: r["name"].split()[1][1:5],
+        "words": lambda r: " ".join(r["name"].split()[:2]),
+        "typo": lambda r: typo(r["name"].split()[1]),
+    }
+    return {kind: [make(rng.choice(records)) for _ in range(count)] for kind, make in kinds.items()}
+
+def percentile(timings, p):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per kind")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    predicate = lambda r: r["is_active"] and r["selling_price"] <= 1500
+    for n in [int(s) for s in args.sizes.split(",")]:
+        records = make_catalogue(n, rng)
+        index = SearchIndex(key="sku", fields=("sku", "barcode", "name"), exact_fields=("sku", "barcode"))
+        start = time.perf_counter()
+        index.rebuild(records, 0)
+        print(f"\n{n} products, index built in {time.perf_counter() - start:.2f}s")
+        gc.collect()
+        gc.freeze()  # as the app does after its startup build
+
+        start = time.perf_counter()
+        for version, record in enumerate(rng.sample(records, 1000), start=1):
+            index.apply([dict(record, name=record["name"] + " Promo")], [], version)
+        print(f"1000 incremental updates in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        print(f"{'query':<10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for kind, queries in make_queries(records, args.queries, rng).items():
+            timings = []
+            for q in queries:
+                start = time.perf_counter()
+                index.search(q, predicate, limit=args.limit)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{kind:<10} {statistics.median(timings):>9.2f} "
+                  f"{percentile(timings, 0.99):>9.2f} {max(timings):>9.2f}")
+
+if __name__ == "__main__":
+    main()
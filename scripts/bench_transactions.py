@@ -0,0 +1,70 @@
+"""Compare per-row vs batched line-item loading for GET /sales/transactions.
+
+Run from the project root against a database that already has sales:
+    python -m scripts.bench_transactions --limit 500 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from app.models import sale as sale_model
+
+load_dotenv()
+
+def questions(conn) -> int:
+    """Statements executed so far on this session (MySQL 'Questions' counter)."""
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS LIKE 'Questions'")
+    value = int(cursor.fetchone()[1])
+    cursor.close()
+    return value
+
+def load_per_row(conn, limit):
+    transactions = sale_model.get_transactions(conn, limit=limit)
+    for t in transactions:
+        t["items"] = sale_model.get_transaction_items(conn, t["id"])
+    return transactions
+
+def load_batched(conn, limit):
+    transactions = sale_model.get_transactions(conn, limit=limit)
+    items_by_id = sale_model.get_items_for_transactions(conn, [t["id"] for t in transactions])
+    for t in transactions:
+        t["items"] = items_by_id[t["id"]]
+    return transactions
+
+def run(conn, loader, limit, repeat):
+    timings = []
+    before = questions(conn)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = loader(conn, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    # Each questions() call itself counts as one statement
+    per_call = (questions(conn) - before - 1) / repeat
+    return len(rows), per_call, statistics.median(timings), max(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+    print(f"{'loader':<10} {'rows':>6} {'queries':>8} {'p50 ms':>9} {'max ms':>9}")
+    for name, loader in (("per-row", load_per_row), ("batched", load_batched)):
+        rows, queries, p50, worst = run(conn, loader, args.limit, args.repeat)
+        print(f"{name:<10} {rows:>6} {queries:>8.0f} {p50:>9.2f} {worst:>9.2f}")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Closed-loop HTTP load test against a running API (e.g. `uvicorn app.main:app`).
+
+Each of N concurrent clients keeps one keep-alive connection open and issues
+requests back-to-back for the given duration:
+    python -m scripts.load_test --token <jwt> --path /auth/me --clients 50,200,500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    """Read one HTTP/1.1 response and return its status code."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+async def _client(host, port, request: bytes, deadline: float, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def run_level(url: str, path: str, token: str, clients: int, duration: float) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode("latin-1")
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(_client(host, port, request, deadline, latencies, errors) for _ in range(clients)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    failed_clients = sum(1 for r in results if isinstance(r, Exception))
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "http_errors": len(errors),
+        "failed_clients": failed_clients,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/auth/me")
+    parser.add_argument("--token", required=True, help="Bearer token from POST /auth/login")
+    parser.add_argument("--clients", default="50,200,500", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per level")
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for level in (int(c) for c in args.clients.split(",")):
+        r = asyncio.run(run_level(args.url, args.path, args.token, level, args.duration))
+        print(
+            f"{r['clients']:>7} {r['requests']:>9} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['http_errors'] + r['failed_clients']:>7}"
+        )
+
+if __name__ == "__main__":
+    main()
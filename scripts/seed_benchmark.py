@@ -0,0 +1,242 @@
+"""Seed a synthetic store into a dedicated benchmark database.
+
+Uses its own database (default smart_inventory_bench) so a development
+database is never touched. Any local MySQL 8 compatible server works, e.g.
+    docker run -d --name si-bench -p 3307:3306 -e MYSQL_ROOT_PASSWORD=bench mysql:8.0
+    DB_HOST=127.0.0.1 DB_PORT=3307 DB_USER=root DB_PASSWORD=bench \\
+        python -m scripts.seed_benchmark --reset --products 100000 --sales 1000000
+--reset (re)creates the database from scripts/smart_inventory_shema.sql.
+Sales go through the real triggers, so stock, the movement ledger and the
+sales rollups are consistent; history is spread over --days days.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from app.core.security import hash_password
+from app.models.sales_rollup import rebuild_product_sales_index
+from scripts.bench_search import BRANDS, ITEMS, SIZES
+
+load_dotenv()
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "smart_inventory_shema.sql")
+SCHEMA_DATABASE = "smart_inventory_db"
+BENCH_USERS = (("bench_manager", "manager"), ("bench_clerk", "clerk"))
+INITIAL_STOCK = 10_000_000  # sales never run out during seeding or benchmarks
+
+def connect(database=None):
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=database,
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+
+def iter_statements(sql):
+    """Split a mysql-client script into statements, honouring DELIMITER blocks."""
+    delimiter, buffer = ";", []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--") or set(stripped) == {"="}):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split()[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).rstrip()[:-len(delimiter)]
+            buffer = []
+            if statement.strip():
+                yield statement
+
+def create_schema(database):
+    with open(SCHEMA_PATH, encoding="utf-8") as f:
+        sql = f.read().replace(SCHEMA_DATABASE, database)
+    conn = connect()
+    cursor = conn.cursor()
+    for statement in iter_statements(sql):
+        cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def insert_many(cursor, table, columns, rows, ignore=False):
+    if not rows:
+        return
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    cursor.execute(
+        f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) "
+        f"VALUES {', '.join([placeholders] * len(rows))}",
+        tuple(value for row in rows for value in row)
+    )
+
+def seed_reference(cursor, password):
+    insert_many(cursor, "roles", ("name", "description"), [
+        ("admin", "Full system access"),
+        ("manager", "Can manage inventory and view reports"),
+        ("clerk", "Can process sales and view stock"),
+    ], ignore=True)
+    insert_many(cursor, "movement_types", ("name", "description", "sign"), [
+        ("sale", "Stock sold to customer", -1),
+        ("receipt", "Stock received from supplier", 1),
+        ("adjustment", "Manual stock adjustment", 1),
+        ("return", "Customer return", 1),
+        ("damage", "Damaged or expired stock", -1),
+    ], ignore=True)
+    password_hash = hash_password(password)
+    user_ids = {}
+    for username, role in BENCH_USERS:
+        cursor.execute(
+            "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE password_hash = VALUES(password_hash), is_active = TRUE",
+            (username, f"{username}@bench.local", password_hash)
+        )
+        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+        user_ids[username] = cursor.fetchone()[0]
+        cursor.execute(
+            "INSERT IGNORE INTO user_roles (user_id, role_id) SELECT %s, id FROM roles WHERE name = %s",
+            (user_ids[username], role)
+        )
+    insert_many(cursor, "categories", ("name",), [(f"Category {i}",) for i in range(1, 21)], ignore=True)
+    cursor.execute("SELECT COUNT(*) FROM suppliers")
+    if cursor.fetchone()[0] == 0:
+        insert_many(cursor, "suppliers", ("name",), [(f"Supplier {i}",) for i in range(1, 51)])
+    return user_ids
+
+def seed_products(conn, cursor, count, rng, batch):
+    cursor.execute("SELECT id FROM categories")
+    categories = [r[0] for r in cursor.fetchall()]
+    cursor.execute("SELECT id FROM suppliers")
+    suppliers = [r[0] for r in cursor.fetchall()]
+    prices = []
+    for start in range(0, count, batch):
+        rows = []
+        for i in range(start, min(count, start + batch)):
+            item = rng.choice(ITEMS)
+            cost = rng.randint(20, 2000)
+            price = round(cost * rng.uniform(1.1, 1.6), 2)
+            prices.append(price)
+            rows.append((
+                f"BENCH-{i:07d}", f"{2_000_000_000_000 + i}",
+                f"{rng.choice(BRANDS)} {item} {rng.choice(SIZES)}",
+                rng.choice(categories), rng.choice(suppliers), cost, price,
+                INITIAL_STOCK, rng.randint(5, 50), True
+            ))
+        insert_many(cursor, "products", (
+            "sku", "barcode", "name", "category_id", "supplier_id", "cost_price",
+            "selling_price", "quantity_in_stock", "reorder_threshold", "is_active"
+        ), rows, ignore=True)
+        conn.commit()
+    return prices
+
+def random_moment(rng, days):
+    day = date.today() - timedelta(days=rng.randrange(days))
+    return datetime.combine(day, datetime.min.time()) + timedelta(seconds=rng.randrange(8 * 3600, 21 * 3600))
+
+def seed_receipts(conn, cursor, count, products, days, user_id, rng, batch):
+    cursor.execute("SELECT id FROM movement_types WHERE name = 'receipt'")
+    receipt_type = cursor.fetchone()[0]
+    for start in range(0, count, batch):
+        rows = []
+        for i in range(start, min(count, start + batch)):
+            rows.append((f"BENCH-{rng.randrange(products):07d}", receipt_type, rng.randint(10, 500),
+                         f"GRN-{i // 50:06d}", user_id, random_moment(rng, days)))
+        insert_many(cursor, "stock_movements", (
+            "product_sku", "movement_type_id", "quantity", "reference_id", "created_by", "created_at"
+        ), rows)
+        conn.commit()
+
+def seed_sales(conn, cursor, count, prices, lines_per_sale, days, user_id, rng, batch, report):
+    # Skewed popularity: a few products sell a lot, most rarely
+    order = list(range(len(prices)))
+    rng.shuffle(order)
+    run = int(time.time())
+    for start in range(0, count, batch):
+        size = min(count, start + batch) - start
+        moments = [random_moment(rng, days) for _ in range(size)]
+        insert_many(cursor, "sale_transactions", ("transaction_number", "user_id", "transaction_date", "created_at"), [
+            (f"BENCH-{run}-{start + k:08d}", user_id, moments[k].date(), moments[k]) for k in range(size)
+        ])
+        first_id = cursor.lastrowid  # consecutive ids for a multi-row INSERT
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM stock_movements")
+        last_movement = cursor.fetchone()[0]
+        lines = []
+        for k in range(size):
+            for _ in range(rng.randint(1, 2 * lines_per_sale - 1)):
+                p = order[min(len(order) - 1, int(rng.paretovariate(1.1)) - 1)]
+                lines.append((first_id + k, f"BENCH-{p:07d}", rng.randint(1, 5), prices[p], 0))
+        insert_many(cursor, "sale_line_items", (
+            "transaction_id", "product_sku", "quantity", "unit_price", "line_total"
+        ), lines)
+        # The sale trigger stamps movements with NOW(); move them to the sale's time
+        cursor.execute(
+            """
+            UPDATE stock_movements sm
+            JOIN sale_transactions st ON st.id = CAST(sm.reference_id AS UNSIGNED)
+            SET sm.created_at = st.created_at
+            WHERE sm.id > %s
+            """,
+            (last_movement,)
+        )
+        conn.commit()
+        report(start + size)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="smart_inventory_bench")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the database from the schema")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--lines-per-sale", type=int, default=3, help="Average line items per sale")
+    parser.add_argument("--receipts", type=int, default=50000, help="Receipt movements")
+    parser.add_argument("--days", type=int, default=365, help="Days of history")
+    parser.add_argument("--password", default="bench-password", help="Password for the bench_* users")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database == SCHEMA_DATABASE or args.database == os.getenv("DB_NAME"):
+        parser.error("refusing to seed the application database; pick a dedicated --database")
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    def step(message):
+        print(f"[{time.perf_counter() - started:7.1f}s] {message}", flush=True)
+
+    if args.reset:
+        create_schema(args.database)
+        step(f"created schema in {args.database}")
+    conn = connect(args.database)
+    cursor = conn.cursor()
+    user_ids = seed_reference(cursor, args.password)
+    conn.commit()
+    manager_id = user_ids["bench_manager"]
+
+    prices = seed_products(conn, cursor, args.products, rng, args.batch)
+    step(f"{args.products} products")
+    seed_receipts(conn, cursor, args.receipts, args.products, args.days, manager_id, rng, args.batch)
+    step(f"{args.receipts} receipt movements")
+    sale_batch = max(1, args.batch // args.lines_per_sale)
+    seed_sales(
+        conn, cursor, args.sales, prices, args.lines_per_sale, args.days, user_ids["bench_clerk"], rng, sale_batch,
+        lambda done: done % (sale_batch * 100) < sale_batch and step(f"{done} sales")
+    )
+    step(f"{args.sales} sales")
+    rebuild_product_sales_index(conn)
+    step("rebuilt the rolling product sales index")
+
+    for table in ("products", "sale_transactions", "sale_line_items", "stock_movements"):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        print(f"{table:<18} {cursor.fetchone()[0]:>12}")
+    cursor.close()
+    conn.close()
+    print(f"✅ Seeded {args.database}; log in as bench_manager / bench_clerk with --password")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-=============================================================================
+-- =============================================================================
 -- Smart Inventory System – Complete MySQL Schema
 -- Version 3.0 – Dynamic, Extensible, No Sample Data
 -- =============================================================================
@@ -168,7 +168,83 @@ CREATE TABLE replenishment_suggestions (
     INDEX idx_acted (is_acted_upon)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
--- 3.5 Audit Log (optional – for full traceability)
+-- 3.5 SKU change log (drives incremental replenishment)
+-- One row per SKU, stamped whenever a stock movement (sale, receipt,
+-- adjustment, return, damage) touches it, or the product is created or its
+-- catalogue fields change.
+CREATE TABLE sku_change_log (
+    product_sku VARCHAR(50) NOT NULL,
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (product_sku),
+    INDEX idx_changed_at (changed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 3.6 Cache versions (cross-worker invalidation of in-process caches)
+-- Writers bump a named version in the same transaction as their change;
+-- each worker drops its cached copy when it sees the version move.
+CREATE TABLE cache_versions (
+    name VARCHAR(50) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 3.7 Sales rollups (maintained by the triggers in 4.6/4.7 in the same
+-- transaction as the sale; rebuilt by scripts/backfill_sales_rollups.py).
+-- Daily and hourly totals are split over 8 slots (transaction id % 8) so
+-- concurrent sales do not all queue on one row lock; readers sum the slots.
+CREATE TABLE sales_daily_rollup (
+    sales_date DATE NOT NULL,
+    slot TINYINT UNSIGNED NOT NULL,
+    transaction_count INT UNSIGNED NOT NULL DEFAULT 0,
+    items_sold INT UNSIGNED NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (sales_date, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Hour is taken from the header's created_at (transaction_date has no time)
+CREATE TABLE sales_hourly_rollup (
+    sales_date DATE NOT NULL,
+    sales_hour TINYINT UNSIGNED NOT NULL,
+    slot TINYINT UNSIGNED NOT NULL,
+    transaction_count INT UNSIGNED NOT NULL DEFAULT 0,
+    items_sold INT UNSIGNED NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (sales_date, sales_hour, slot)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE sales_product_daily_rollup (
+    sales_date DATE NOT NULL,
+    product_sku VARCHAR(50) NOT NULL,
+    line_count INT UNSIGNED NOT NULL DEFAULT 0,   -- sale lines (≈ transactions containing the SKU)
+    quantity_sold INT UNSIGNED NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (sales_date, product_sku),
+    INDEX idx_product_date (product_sku, sales_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Rolling per-SKU sales for the common performance windows (days including
+-- the anchor date `as_of`). Rebuilt from sales_product_daily_rollup once a
+-- day; sales in between are added by trigger 4.7. The (units, sku) indexes
+-- let top-N rankings read only the rows they return.
+CREATE TABLE product_sales_index (
+    product_sku VARCHAR(50) NOT NULL,
+    units_7d INT UNSIGNED NOT NULL DEFAULT 0,
+    units_30d INT UNSIGNED NOT NULL DEFAULT 0,
+    units_90d INT UNSIGNED NOT NULL DEFAULT 0,
+    units_365d INT UNSIGNED NOT NULL DEFAULT 0,
+    revenue_7d DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    revenue_30d DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    revenue_90d DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    revenue_365d DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    as_of DATE NOT NULL,
+    PRIMARY KEY (product_sku),
+    INDEX idx_units_7d (units_7d, product_sku),
+    INDEX idx_units_30d (units_30d, product_sku),
+    INDEX idx_units_90d (units_90d, product_sku),
+    INDEX idx_units_365d (units_365d, product_sku)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 3.8 Audit Log (optional – for full traceability)
 CREATE TABLE audit_log (
     id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
     table_name VARCHAR(50) NOT NULL,
@@ -184,6 +260,31 @@ CREATE TABLE audit_log (
     INDEX idx_changed_at (changed_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 3.9 Background jobs (replenishment generation), shared by every worker so
+-- any of them can report a job's status. active_key is the job's coalescing
+-- key while it is queued or running and NULL afterwards, so the unique index
+-- allows one active run per key. The worker running a job refreshes
+-- heartbeat_at; an active job whose heartbeat stops is marked failed.
+CREATE TABLE background_jobs (
+    id CHAR(32) NOT NULL,
+    kind VARCHAR(50) NOT NULL,
+    job_key CHAR(40) NOT NULL,
+    params JSON,
+    status VARCHAR(20) NOT NULL,
+    progress DECIMAL(4,3) NOT NULL DEFAULT 0.000,
+    message VARCHAR(255),
+    result JSON,
+    error TEXT,
+    created_at DATETIME(6) NOT NULL,
+    started_at DATETIME(6) NULL,
+    finished_at DATETIME(6) NULL,
+    heartbeat_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    active_key CHAR(40) AS (IF(status IN ('queued', 'running'), job_key, NULL)) STORED,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_active_key (active_key),
+    INDEX idx_finished_at (finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- -----------------------------------------------------------------------------
 -- 4. TRIGGERS
 -- -----------------------------------------------------------------------------
@@ -275,28 +376,41 @@ BEGIN
 END$$
 DELIMITER ;
 
--- 4.3 After inserting a stock movement of type 'receipt' or 'return': increase stock
+-- 4.3 After inserting any non-sale stock movement (receipt, adjustment, return,
+--     damage): apply it to stock. Sales update stock in after_sale_line_item_insert.
 DELIMITER $$
-CREATE TRIGGER after_stock_movement_receipt
+CREATE TRIGGER after_stock_movement_apply
 AFTER INSERT ON stock_movements
 FOR EACH ROW
 BEGIN
-    DECLARE receipt_movement_type_id INT;
-    DECLARE return_movement_type_id INT;
+    DECLARE sale_movement_type_id INT;
 
-    -- Get movement type IDs
-    SELECT id INTO receipt_movement_type_id FROM movement_types WHERE name = 'receipt' LIMIT 1;
-    SELECT id INTO return_movement_type_id FROM movement_types WHERE name = 'return' LIMIT 1;
+    SELECT id INTO sale_movement_type_id FROM movement_types WHERE name = 'sale' LIMIT 1;
 
-    IF NEW.movement_type_id IN (receipt_movement_type_id, return_movement_type_id) THEN
+    -- The row is still locked by before_stock_movement_insert
+    IF NEW.movement_type_id <> sale_movement_type_id THEN
         UPDATE products
-        SET quantity_in_stock = quantity_in_stock + NEW.quantity
+        SET quantity_in_stock = NEW.new_quantity
         WHERE sku = NEW.product_sku;
     END IF;
 END$$
 DELIMITER ;
 
--- 4.4 Before stock movement: validate and set previous/new quantities
+-- 4.4 After inserting any stock movement: record the SKU in the change log
+DELIMITER $$
+CREATE TRIGGER after_stock_movement_changelog
+AFTER INSERT ON stock_movements
+FOR EACH ROW
+FOLLOWS after_stock_movement_apply
+BEGIN
+    INSERT INTO sku_change_log (product_sku, changed_at)
+    VALUES (NEW.product_sku, NOW(6))
+    ON DUPLICATE KEY UPDATE changed_at = NOW(6);
+END$$
+DELIMITER ;
+
+-- 4.5 Before stock movement: lock the product, set previous/new quantities
+--     and refuse to take stock below zero
 DELIMITER $$
 CREATE TRIGGER before_stock_movement_insert
 BEFORE INSERT ON stock_movements
@@ -304,21 +418,148 @@ FOR EACH ROW
 BEGIN
     DECLARE current_qty INT;
     DECLARE movement_sign INT;
+    DECLARE sale_movement_type_id INT;
+    DECLARE error_message VARCHAR(128);
+
+    SELECT id INTO sale_movement_type_id FROM movement_types WHERE name = 'sale' LIMIT 1;
+
+    -- Sale movements carry their own snapshots: after_sale_line_item_insert
+    -- has already locked and updated the product
+    IF NEW.movement_type_id <> sale_movement_type_id THEN
+        -- Get current stock (the lock serialises concurrent movements on this SKU)
+        SELECT quantity_in_stock INTO current_qty
+        FROM products
+        WHERE sku = NEW.product_sku
+        FOR UPDATE;
+
+        -- Get sign of this movement type
+        SELECT sign INTO movement_sign
+        FROM movement_types
+        WHERE id = NEW.movement_type_id;
+
+        -- Set snapshots
+        SET NEW.previous_quantity = current_qty;
+        SET NEW.new_quantity = current_qty + (NEW.quantity * movement_sign);
+
+        -- Prevent negative stock
+        IF NEW.new_quantity < 0 THEN
+            SET error_message = CONCAT('Insufficient stock. Available: ', current_qty,
+                                       ', tried to remove: ', NEW.quantity);
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = error_message;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
 
-    -- Get current stock
-    SELECT quantity_in_stock INTO current_qty
-    FROM products
-    WHERE sku = NEW.product_sku
-    FOR UPDATE;
+-- 4.6 After inserting a sale header: count the transaction in the rollups
+DELIMITER $$
+CREATE TRIGGER after_sale_transaction_rollup
+AFTER INSERT ON sale_transactions
+FOR EACH ROW
+BEGIN
+    INSERT INTO sales_daily_rollup (sales_date, slot, transaction_count)
+    VALUES (NEW.transaction_date, NEW.id % 8, 1)
+    ON DUPLICATE KEY UPDATE transaction_count = transaction_count + 1;
 
-    -- Get sign of this movement type
-    SELECT sign INTO movement_sign
-    FROM movement_types
-    WHERE id = NEW.movement_type_id;
+    INSERT INTO sales_hourly_rollup (sales_date, sales_hour, slot, transaction_count)
+    VALUES (NEW.transaction_date, HOUR(NEW.created_at), NEW.id % 8, 1)
+    ON DUPLICATE KEY UPDATE transaction_count = transaction_count + 1;
+END$$
+DELIMITER ;
+
+-- 4.7 After inserting a sale line item: add quantity and revenue to the rollups
+--     and the rolling product sales index
+DELIMITER $$
+CREATE TRIGGER after_sale_line_item_rollup
+AFTER INSERT ON sale_line_items
+FOR EACH ROW
+FOLLOWS after_sale_line_item_insert
+BEGIN
+    DECLARE v_date DATE;
+    DECLARE v_hour TINYINT UNSIGNED;
+    DECLARE v_units_7d INT UNSIGNED;
+    DECLARE v_units_30d INT UNSIGNED;
+    DECLARE v_units_90d INT UNSIGNED;
+    DECLARE v_units_365d INT UNSIGNED;
+
+    SELECT transaction_date, HOUR(created_at) INTO v_date, v_hour
+    FROM sale_transactions
+    WHERE id = NEW.transaction_id;
 
-    -- Set snapshots
-    SET NEW.previous_quantity = current_qty;
-    SET NEW.new_quantity = current_qty + (NEW.quantity * movement_sign);
+    INSERT INTO sales_daily_rollup (sales_date, slot, items_sold, revenue)
+    VALUES (v_date, NEW.transaction_id % 8, NEW.quantity, NEW.line_total)
+    ON DUPLICATE KEY UPDATE items_sold = items_sold + NEW.quantity,
+                            revenue = revenue + NEW.line_total;
+
+    INSERT INTO sales_hourly_rollup (sales_date, sales_hour, slot, items_sold, revenue)
+    VALUES (v_date, v_hour, NEW.transaction_id % 8, NEW.quantity, NEW.line_total)
+    ON DUPLICATE KEY UPDATE items_sold = items_sold + NEW.quantity,
+                            revenue = revenue + NEW.line_total;
+
+    INSERT INTO sales_product_daily_rollup (sales_date, product_sku, line_count, quantity_sold, revenue)
+    VALUES (v_date, NEW.product_sku, 1, NEW.quantity, NEW.line_total)
+    ON DUPLICATE KEY UPDATE line_count = line_count + 1,
+                            quantity_sold = quantity_sold + NEW.quantity,
+                            revenue = revenue + NEW.line_total;
+
+    -- Rolling windows; back-dated sales only count towards windows they fall in
+    SET v_units_7d = IF(v_date > CURDATE() - INTERVAL 7 DAY, NEW.quantity, 0);
+    SET v_units_30d = IF(v_date > CURDATE() - INTERVAL 30 DAY, NEW.quantity, 0);
+    SET v_units_90d = IF(v_date > CURDATE() - INTERVAL 90 DAY, NEW.quantity, 0);
+    SET v_units_365d = IF(v_date > CURDATE() - INTERVAL 365 DAY, NEW.quantity, 0);
+    INSERT INTO product_sales_index (
+        product_sku, units_7d, units_30d, units_90d, units_365d,
+        revenue_7d, revenue_30d, revenue_90d, revenue_365d, as_of
+    ) VALUES (
+        NEW.product_sku, v_units_7d, v_units_30d, v_units_90d, v_units_365d,
+        IF(v_units_7d > 0, NEW.line_total, 0), IF(v_units_30d > 0, NEW.line_total, 0),
+        IF(v_units_90d > 0, NEW.line_total, 0), IF(v_units_365d > 0, NEW.line_total, 0),
+        CURDATE()
+    )
+    ON DUPLICATE KEY UPDATE units_7d = units_7d + v_units_7d,
+                            units_30d = units_30d + v_units_30d,
+                            units_90d = units_90d + v_units_90d,
+                            units_365d = units_365d + v_units_365d,
+                            revenue_7d = revenue_7d + IF(v_units_7d > 0, NEW.line_total, 0),
+                            revenue_30d = revenue_30d + IF(v_units_30d > 0, NEW.line_total, 0),
+                            revenue_90d = revenue_90d + IF(v_units_90d > 0, NEW.line_total, 0),
+                            revenue_365d = revenue_365d + IF(v_units_365d > 0, NEW.line_total, 0);
+END$$
+DELIMITER ;
+
+-- 4.8 After updating a product: record the SKU in the change log when any
+--     catalogue field changes (stock changes are logged by 4.4), so live
+--     dashboards, incremental replenishment and other workers' search
+--     indexes see it
+DELIMITER $$
+CREATE TRIGGER after_product_update_changelog
+AFTER UPDATE ON products
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.name <=> OLD.name)
+       OR NOT (NEW.barcode <=> OLD.barcode)
+       OR NOT (NEW.category_id <=> OLD.category_id)
+       OR NOT (NEW.supplier_id <=> OLD.supplier_id)
+       OR NOT (NEW.selling_price <=> OLD.selling_price)
+       OR NOT (NEW.reorder_threshold <=> OLD.reorder_threshold)
+       OR NOT (NEW.is_active <=> OLD.is_active) THEN
+        INSERT INTO sku_change_log (product_sku, changed_at)
+        VALUES (NEW.sku, NOW(6))
+        ON DUPLICATE KEY UPDATE changed_at = NOW(6);
+    END IF;
+END$$
+DELIMITER ;
+
+-- 4.9 After inserting a product: record it in the change log
+DELIMITER $$
+CREATE TRIGGER after_product_insert_changelog
+AFTER INSERT ON products
+FOR EACH ROW
+BEGIN
+    INSERT INTO sku_change_log (product_sku, changed_at)
+    VALUES (NEW.sku, NOW(6))
+    ON DUPLICATE KEY UPDATE changed_at = NOW(6);
 END$$
 DELIMITER ;
 
@@ -449,6 +690,54 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- 5.4 Record a manual movement (adjustment, return, damage) atomically and
+--     return the resulting quantities in the same call. The movement triggers
+--     lock the product row, refuse negative stock and apply the change.
+DELIMITER $$
+CREATE PROCEDURE AdjustStock(
+    IN p_sku VARCHAR(50),
+    IN p_movement_type_id INT UNSIGNED,
+    IN p_quantity INT,
+    IN p_reference VARCHAR(100),
+    IN p_reason VARCHAR(255),
+    IN p_user_id INT UNSIGNED
+)
+BEGIN
+    DECLARE v_movement_id INT UNSIGNED;
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    INSERT INTO stock_movements (
+        product_sku,
+        movement_type_id,
+        quantity,
+        reference_id,
+        reason,
+        created_by
+    ) VALUES (
+        p_sku,
+        p_movement_type_id,
+        p_quantity,
+        p_reference,
+        p_reason,
+        p_user_id
+    );
+
+    SET v_movement_id = LAST_INSERT_ID();
+
+    COMMIT;
+
+    SELECT id AS movement_id, previous_quantity, new_quantity
+    FROM stock_movements
+    WHERE id = v_movement_id;
+END$$
+DELIMITER ;
+
 -- -----------------------------------------------------------------------------
 -- 6. VIEWS (for reporting and dashboards)
 -- -----------------------------------------------------------------------------
@@ -543,6 +832,10 @@ CREATE INDEX idx_stock_movements_composite ON stock_movements(product_sku, creat
 CREATE INDEX idx_sale_line_items_product ON sale_line_items(product_sku);
 CREATE INDEX idx_products_category ON products(category_id);
 CREATE INDEX idx_products_supplier ON products(supplier_id);
+-- Keyset pagination sort keys
+CREATE INDEX idx_products_name_sku ON products(name, sku);
+CREATE INDEX idx_sale_transactions_date_id ON sale_transactions(transaction_date, id);
+CREATE INDEX idx_stock_movements_created_id ON stock_movements(created_at, id);
 
 -- =============================================================================
 -- END OF SCHEMA – NO SAMPLE DATA INSERTED
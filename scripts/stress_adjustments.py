@@ -0,0 +1,145 @@
+"""Concurrent stress test for stock write-offs: check-then-insert vs AdjustStock.
+
+Many threads write off damaged stock from one product at the same time,
+asking for more than is on hand in total. Both modes must finish with
+stock >= 0 and a movement ledger that adds up; the check-then-insert mode
+also reports how often its pre-check passed but the write was refused
+(the race the old route lost before the trigger guarded it).
+Run from the project root against a test database:
+    python -m scripts.stress_adjustments --threads 16 --ops 50 --stock 200
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode
+from dotenv import load_dotenv
+
+from app.models import stock_movement as movement_model
+
+load_dotenv()
+
+def connect():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD")
+    )
+
+def check_then_insert(conn, sku, quantity, movement_type_id, user_id):
+    """The previous route: read stock, check, then insert and commit."""
+    current = movement_model.get_product_stock_level(conn, sku)
+    if quantity > current:
+        # End the read too, or the next check reuses this REPEATABLE READ snapshot
+        conn.rollback()
+        return "refused"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO stock_movements (product_sku, movement_type_id, quantity, reason, created_by) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (sku, movement_type_id, quantity, "stress test", user_id)
+        )
+        conn.commit()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        if e.errno == errorcode.ER_SIGNAL_EXCEPTION:
+            return "raced"
+        raise
+    finally:
+        cursor.close()
+    return "ok"
+
+def adjust_stock(conn, sku, quantity, movement_type_id, user_id):
+    try:
+        movement_model.create_stock_adjustment(conn, sku, quantity, movement_type_id, None, "stress test", user_id)
+    except ValueError:
+        return "refused"
+    return "ok"
+
+def run_mode(operation, sku, args, movement_type_id):
+    outcomes, latencies, lock = [], [], threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker():
+        conn = connect()
+        local_outcomes, local_latencies = [], []
+        barrier.wait()
+        for _ in range(args.ops):
+            start = time.perf_counter()
+            local_outcomes.append(operation(conn, sku, args.quantity, movement_type_id, args.user_id))
+            local_latencies.append((time.perf_counter() - start) * 1000)
+        conn.close()
+        with lock:
+            outcomes.extend(local_outcomes)
+            latencies.extend(local_latencies)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes, latencies, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=50, help="Write-offs per thread")
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--stock", type=int, default=200, help="Starting stock (keep below threads*ops*quantity)")
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM movement_types WHERE name = 'damage'")
+    movement_type_id = cursor.fetchone()[0]
+    sku = f"STRESS-{os.getpid()}"
+    cursor.execute(
+        "INSERT INTO products (sku, barcode, name, quantity_in_stock, is_active) VALUES (%s, %s, %s, 0, FALSE)",
+        (sku, sku, "Stress test product")
+    )
+    conn.commit()
+
+    modes = (("check-then-insert", check_then_insert), ("AdjustStock", adjust_stock))
+    print(f"{args.threads} threads x {args.ops} write-offs of {args.quantity}, starting stock {args.stock}")
+    print(f"{'mode':<18} {'ok':>5} {'refused':>8} {'raced':>6} {'final':>6} {'min':>5} "
+          f"{'ledger':>7} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for name, operation in modes:
+            cursor.execute("DELETE FROM stock_movements WHERE product_sku = %s", (sku,))
+            cursor.execute("UPDATE products SET quantity_in_stock = %s WHERE sku = %s", (args.stock, sku))
+            conn.commit()
+
+            outcomes, latencies, elapsed = run_mode(operation, sku, args, movement_type_id)
+
+            cursor.execute("SELECT quantity_in_stock FROM products WHERE sku = %s", (sku,))
+            final = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT COALESCE(SUM(quantity), 0), COALESCE(MIN(new_quantity), 0) "
+                "FROM stock_movements WHERE product_sku = %s", (sku,)
+            )
+            written_off, lowest = cursor.fetchone()
+            conn.commit()
+            ledger = "ok" if final == args.stock - written_off and final >= 0 and lowest >= 0 else "BROKEN"
+            latencies.sort()
+            print(f"{name:<18} {outcomes.count('ok'):>5} {outcomes.count('refused'):>8} "
+                  f"{outcomes.count('raced'):>6} {final:>6} {lowest:>5} {ledger:>7} "
+                  f"{len(outcomes) / elapsed:>8.0f} {statistics.median(latencies):>8.2f} "
+                  f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:>8.2f}")
+    finally:
+        cursor.execute("DELETE FROM stock_movements WHERE product_sku = %s", (sku,))
+        cursor.execute("DELETE FROM sku_change_log WHERE product_sku = %s", (sku,))
+        cursor.execute("DELETE FROM products WHERE sku = %s", (sku,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()